@@ -0,0 +1,161 @@
+"""Load test for the /search API. Run from the logic directory:
+
+    python -m Benchmark.loadtest [--url http://127.0.0.1:8000] [--concurrency 16]
+                                 [--requests 500 | --duration 30] [--maps maze random]
+                                 [--sizes 64 256] [--mix bfs=2 astar=3 jps=1]
+                                 [--distinct 1000] [--binary] [--json report.json]
+
+Without --url the app is driven in process through httpx's ASGI
+transport, so client and server share one event loop and one CPU: the
+numbers then include client overhead and are best used to compare
+server-side changes against each other. With --url a running server
+(e.g. uvicorn search:app) is measured. Each request uses one of
+--distinct random (start, algorithm) pairs per map, so the share of
+result cache hits can be tuned. Reports throughput and latency
+percentiles, overall and per algorithm."""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+import numpy as np
+
+from utils import print_table
+from Benchmark.maps import GENERATORS
+
+
+def request_bodies(kinds, sizes, mix, distinct, seed):
+    """(algorithm, JSON body) pairs: distinct queries per generated map, with
+    random open starts and algorithms drawn with the weights of mix. Each
+    map's grid and walls are serialized once and shared by its queries."""
+    rng = random.Random(seed)
+    algorithms, weights = zip(*mix.items())
+    bodies = []
+    for size in sizes:
+        for kind in kinds:
+            grid, _, goals = GENERATORS[kind](size, size, seed)
+            walls = np.argwhere(grid.grid)
+            prefix = '{{"grid":{},"walls":{},'.format(json.dumps(grid.grid.tolist()), json.dumps(walls.tolist()))
+            open_cells = np.flatnonzero(grid.grid.reshape(-1) == 0)
+            for _ in range(distinct):
+                y, x = divmod(int(open_cells[rng.randrange(len(open_cells))]), size)
+                algorithm = rng.choices(algorithms, weights)[0]
+                body = prefix + '"start":[{},{}],"goals":{},"algorithm":"{}"}}'.format(
+                    x, y, json.dumps([list(goal) for goal in goals]), algorithm)
+                bodies.append((algorithm, body.encode()))
+    return bodies
+
+
+async def run_load(client, bodies, concurrency, requests, duration, headers, seed):
+    """Send requests from concurrency workers until requests have been sent
+    or duration seconds have passed. Returns (samples, elapsed) where each
+    sample is (algorithm, latency seconds, ok)."""
+    rng = random.Random(seed)
+    binary = 'Accept' in headers  # binary bodies are not inspected for error messages
+    samples = []
+    sent = [0]
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if deadline is None and sent[0] >= requests:
+                return
+            sent[0] += 1
+            algorithm, body = rng.choice(bodies)
+            began = time.perf_counter()
+            try:
+                response = await client.post('/search', content=body, headers=headers)
+                ok = response.status_code == 200 and (binary or not response.json()['message'].startswith('Error'))
+            except httpx.HTTPError:
+                ok = False
+            samples.append((algorithm, time.perf_counter() - began, ok))
+
+    began = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - began
+
+
+def summarize(samples, elapsed):
+    """Throughput and latency percentiles (ms), overall and per algorithm."""
+    def stats(name, group):
+        latency = np.array([seconds for _, seconds, _ in group]) * 1000
+        return {
+            'algorithm': name,
+            'requests': len(group),
+            'errors': sum(1 for _, _, ok in group if not ok),
+            'rps': len(group) / elapsed if elapsed else 0.0,
+            'mean_ms': float(latency.mean()),
+            'p50_ms': float(np.percentile(latency, 50)),
+            'p90_ms': float(np.percentile(latency, 90)),
+            'p99_ms': float(np.percentile(latency, 99)),
+            'max_ms': float(latency.max()),
+        }
+
+    rows = [stats('all', samples)] if samples else []
+    for algorithm in sorted({sample[0] for sample in samples}):
+        rows.append(stats(algorithm, [sample for sample in samples if sample[0] == algorithm]))
+    return {'elapsed_seconds': elapsed, 'results': rows}
+
+
+def parse_mix(items):
+    mix = {}
+    for item in items:
+        algorithm, _, weight = item.partition('=')
+        mix[algorithm] = float(weight or 1)
+    return mix
+
+
+async def main_async(args):
+    bodies = request_bodies(args.maps, args.sizes, parse_mix(args.mix), args.distinct, args.seed)
+    headers = {'Content-Type': 'application/json'}
+    if args.binary:
+        headers['Accept'] = 'application/octet-stream'
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=None,
+                                   limits=httpx.Limits(max_connections=args.concurrency))
+    else:
+        from search import app, search_pool
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://loadtest', timeout=None)
+    try:
+        samples, elapsed = await run_load(client, bodies, args.concurrency, args.requests, args.duration, headers, args.seed)
+    finally:
+        await client.aclose()
+        if not args.url:
+            search_pool.shutdown()
+    return summarize(samples, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='base URL of a running server (default: drive the app in process)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500, help='requests to send (ignored with --duration)')
+    parser.add_argument('--duration', type=float, help='send requests for this many seconds instead')
+    parser.add_argument('--maps', nargs='+', default=['maze', 'random'], choices=list(GENERATORS))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64, 256])
+    parser.add_argument('--mix', nargs='+', default=['bfs=2', 'astar=3', 'gbfs=1', 'jps=1'],
+                        help='algorithm=weight pairs')
+    parser.add_argument('--distinct', type=int, default=1000, help='distinct queries per map')
+    parser.add_argument('--binary', action='store_true', help='ask for the binary response encoding')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    report['args'] = vars(args)
+    columns = ['algorithm', 'requests', 'errors', 'rps', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms']
+    print_table([[round(row[column], 1) if isinstance(row[column], float) else row[column] for column in columns]
+                 for row in report['results']], header=columns)
+    print('elapsed {:.2f} s'.format(report['elapsed_seconds']))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Throughput of the text map parsers on generated wall files. Run from the
+logic directory:
+
+    python -m Benchmark.map_parsing [--walls 10000 1000000] [--size 10000] [--repeat 3]
+
+Compares the line-by-line parser the Testcase files were read with before
+(kept below as legacy_parse_file), followed by Grid.create_walls, against
+MapIO.parse_file (bulk tokenizer, walls as tuples) and MapIO.load_text_map
+(bulk tokenizer streaming blocks into the rasterizer). The parse-only rows
+leave out rasterizing, which dominates on large maps. Times are the best
+of --repeat runs; every loader must read the same walls and build the
+same grid."""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from utils import print_table
+from Grid import Grid
+from MapIO import iter_wall_blocks, load_text_map, parse_file, read_header, read_line_data
+
+
+def legacy_parse_file(filename):
+    """The text parser before MapIO's bulk tokenizer: every line is kept in
+    memory, then each wall is parsed with read_line_data."""
+    with open(filename, 'r') as file:
+        lines = []
+        for line in file:
+            clean = line.strip()
+            if clean and not clean.startswith("#"):
+                lines.append(clean)
+        rows, cols = read_line_data(lines[0])
+        initial_state = read_line_data(lines[1])
+        goals = [read_line_data(g.strip()) for g in lines[2].split('|')]
+        walls = [read_line_data(line) for line in lines[3:]]
+        return {'rows': rows, 'cols': cols, 'initial_state': initial_state, 'goals': goals, 'walls': walls}
+
+
+def write_wall_file(filename, size, walls, seed):
+    """A size x size map with walls random rectangles of up to 8 x 8 cells."""
+    rng = np.random.default_rng(seed)
+    rects = np.column_stack((rng.integers(0, size, (walls, 2)), rng.integers(1, 9, (walls, 2))))
+    with open(filename, 'w') as file:
+        file.write("[{0},{0}]\n(0,0)\n({1},{1}) | (0,{1})\n".format(size, size - 1))
+        file.write(''.join('({},{},{},{})\n'.format(*rect) for rect in rects.tolist()))
+
+
+def best_time(function, repeat):
+    best = result = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def to_grid(data):
+    grid = Grid(data['rows'], data['cols'])
+    grid.create_walls(data['walls'])
+    return grid, len(data['walls'])
+
+
+def count_walls(filename):
+    with open(filename, 'rb') as file:
+        line_number = read_header(file, filename)[-1]
+        return sum(len(walls) for walls in iter_wall_blocks(file, filename, line_number + 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--walls', type=int, nargs='+', default=[10000, 1000000])
+    parser.add_argument('--size', type=int, default=10000, help='rows and columns of the map')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Each returns the grid built (None for the parse-only rows) and the number of walls read
+    parsers = (('legacy (parse only)', lambda name: (None, len(legacy_parse_file(name)['walls']))),
+               ('iter_wall_blocks (parse only)', lambda name: (None, count_walls(name))),
+               ('legacy + create_walls', lambda name: to_grid(legacy_parse_file(name))),
+               ('parse_file + create_walls', lambda name: to_grid(parse_file(name))),
+               ('load_text_map', lambda name: (load_text_map(name)['grid'], None)))
+    table = []
+    with tempfile.TemporaryDirectory() as directory:
+        for walls in args.walls:
+            filename = os.path.join(directory, 'walls-{}.txt'.format(walls))
+            write_wall_file(filename, args.size, walls, args.seed)
+            megabytes = os.path.getsize(filename) / 1e6
+            reference = None
+            for name, load in parsers:
+                elapsed, (grid, count) = best_time(lambda: load(filename), args.repeat)
+                if count is not None and count != walls:
+                    raise AssertionError("{} read {} walls".format(name, count))
+                if grid is not None:
+                    reference = reference or grid.fingerprint()
+                    if grid.fingerprint() != reference:
+                        raise AssertionError("{} built a different grid".format(name))
+                table.append([walls, name, round(elapsed * 1000, 1), round(megabytes / elapsed, 1),
+                              round(walls / elapsed / 1e6, 2)])
+    print_table(table, header=['walls', 'parser', 'ms', 'MB/s', 'Mwalls/s'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Map generators for the benchmarks. Every generator returns
+(grid, start, goals) with states as (x, y) tuples."""
+
+import random
+
+import numpy as np
+
+from Grid import Grid
+
+
+def open_map(rows, cols, seed=0):
+    """No walls; start in the top-left corner, goal in the bottom-right one."""
+    return Grid(rows, cols), (0, 0), [(cols - 1, rows - 1)]
+
+
+def random_map(rows, cols, seed=0, density=0.3):
+    """Each cell is a wall with probability density; 3x3 blocks in the
+    start (top-left) and goal (bottom-right) corners are kept open, but a
+    path between them is not guaranteed."""
+    rng = np.random.default_rng(seed)
+    walls = rng.random((rows, cols)) < density
+    walls[:3, :3] = walls[-3:, -3:] = False
+    grid = Grid(rows, cols)
+    grid.create_wall_with_positions(np.argwhere(walls))
+    return grid, (0, 0), [(cols - 1, rows - 1)]
+
+
+def rooms_map(rows, cols, seed=0, room=16):
+    """Square rooms of side room - 1 separated by one-cell walls, with one
+    random door in every wall segment between two neighboring rooms, so
+    every room is reachable. Start is in the top-left room, goal in the
+    bottom-right one."""
+    rng = random.Random(seed)
+    walls = np.zeros((rows, cols), dtype=bool)
+    walls[room::room, :] = True
+    walls[:, room::room] = True
+    for top in range(0, rows, room):
+        bottom = min(top + room, rows)
+        for left in range(0, cols, room):
+            right = min(left + room, cols)
+            if right < cols:   # door in the wall column to the right of this room
+                walls[rng.randrange(top + (top > 0), bottom), right] = False
+            if bottom < rows:  # door in the wall row below this room
+                walls[bottom, rng.randrange(left + (left > 0), right)] = False
+    walls[0, 0] = walls[rows - 1, cols - 1] = False
+    grid = Grid(rows, cols)
+    grid.create_wall_with_positions(np.argwhere(walls))
+    return grid, (0, 0), [(cols - 1, rows - 1)]
+
+
+def maze_map(rows, cols, seed=0):
+    """Perfect maze carved by an (iterative) recursive backtracker. Rooms sit
+    on odd (x, y) cells, everything else starts as wall; start is the
+    top-left room and the goal the bottom-right room."""
+    rng = random.Random(seed)
+    wall = bytearray(b'\x01') * (rows * cols)
+    wall[cols + 1] = 0
+    stack = [(1, 1)]
+    while stack:
+        x, y = stack[-1]
+        options = [(x + dx, y + dy) for dx, dy in ((0, -2), (0, 2), (-2, 0), (2, 0))
+                   if 0 < x + dx < cols - 1 and 0 < y + dy < rows - 1 and wall[(y + dy) * cols + x + dx]]
+        if not options:
+            stack.pop()
+            continue
+        nx, ny = rng.choice(options)
+        wall[((y + ny) // 2) * cols + (x + nx) // 2] = 0
+        wall[ny * cols + nx] = 0
+        stack.append((nx, ny))
+
+    grid = Grid(rows, cols)
+    cells = np.frombuffer(wall, dtype=np.uint8).reshape(rows, cols)
+    grid.create_wall_with_positions(np.argwhere(cells))
+    last_x = cols - 2 if (cols - 2) % 2 else cols - 3
+    last_y = rows - 2 if (rows - 2) % 2 else rows - 3
+    return grid, (1, 1), [(last_x, last_y)]
+
+
+# Generators by name, as used on the benchmark command lines
+GENERATORS = {
+    'open': open_map,
+    'random': random_map,
+    'maze': maze_map,
+    'rooms': rooms_map,
+}
@@ -0,0 +1,184 @@
+"""Benchmark every runRobotSearch algorithm on the Testcase files and on
+generated maps. Run from the logic directory:
+
+    python -m Benchmark.suite [--maps testcases open random maze rooms]
+                              [--sizes 64 256 1024 4096] [--algorithms bfs astar ...]
+                              [--repeat 3] [--output results.json] [--compare old.json]
+
+Each run starts cold (fresh Grid, empty heuristic, distance field,
+hierarchy, landmark and jump point caches). Wall time is the best of
+--repeat runs; peak memory is measured with tracemalloc in one extra run
+(skip it with --no-memory, since tracing slows the search down). Results are written as JSON so runs of
+different engine versions can be diffed with --compare. Algorithms that
+cannot finish on large maps (iterative deepening A*) are skipped above
+LIMITS unless --no-limits is given."""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import get_args
+
+import numpy as np
+
+from utils import print_table
+from Grid import Grid
+from RobotProblem import GridRobotProblem
+from Heuristics import heuristic_cache
+from DistanceField import field_cache
+from Hierarchy import hierarchy_cache
+from Landmarks import landmark_cache, alt_cache
+from SearchHandle.InformedSearch import jump_cache
+from search import Algorithm, parse_file, runRobotSearch
+from Benchmark.maps import GENERATORS
+
+# Largest map (in cells) each algorithm is run on by default
+LIMITS = {'cus1': 64 * 64, 'ida': 64 * 64}
+
+
+def testcase_maps(pattern='Testcase/*.txt'):
+    """(name, grid, start, goals) for each map file matching pattern."""
+    for filename in sorted(glob.glob(pattern)):
+        data = parse_file(filename)
+        grid = Grid(data['rows'], data['cols'])
+        grid.create_walls(data['walls'])
+        yield os.path.basename(filename), grid, data['initial_state'], data['goals']
+
+
+def generated_maps(kinds, sizes, seed):
+    for size in sizes:
+        for kind in kinds:
+            grid, start, goals = GENERATORS[kind](size, size, seed)
+            yield '{}-{}'.format(kind, size), grid, start, goals
+
+
+def run_once(grid, start, goals, algorithm):
+    """One cold search: returns (node, total_nodes, visited count, seconds)."""
+    heuristic_cache.clear()
+    field_cache.clear()
+    hierarchy_cache.clear()
+    landmark_cache.clear()
+    alt_cache.clear()
+    jump_cache.clear()
+    problem = GridRobotProblem(start, goals, Grid(grid.rows, grid.cols, bytearray(grid.cells)))
+    began = time.perf_counter()
+    node, total_nodes, visited_nodes = runRobotSearch(problem, algorithm)
+    return node, total_nodes, len(visited_nodes), time.perf_counter() - began
+
+
+def measure(name, grid, start, goals, algorithm, repeat, memory):
+    """Result record for algorithm on one map; a search that raises is
+    recorded with its error instead of stopping the suite."""
+    result = {
+        'map': name,
+        'rows': grid.rows,
+        'cols': grid.cols,
+        'walls': int(np.count_nonzero(grid.grid)),
+        'algorithm': algorithm,
+    }
+    times = []
+    try:
+        for _ in range(repeat):
+            node, total_nodes, visited, seconds = run_once(grid, start, goals, algorithm)
+            times.append(seconds)
+        peak = None
+        if memory:
+            tracemalloc.start()
+            try:
+                run_once(grid, start, goals, algorithm)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    except Exception as e:
+        result.update(success=False, error='{}: {}'.format(type(e).__name__, e))
+        return result
+    found = node is not None and not isinstance(node, str)
+    result.update({
+        'success': found,
+        'path_cost': node.path_cost if found else None,
+        'expansions': total_nodes,
+        'visited': visited,
+        'seconds': min(times),
+        'seconds_all': times,
+        'peak_bytes': peak,
+    })
+    return result
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {'commit': commit or None, 'python': sys.version.split()[0], 'numpy': np.__version__,
+            'platform': platform.platform(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def compare(results, baseline):
+    """Table of time and expansion ratios against a previous results file."""
+    old = {(r['map'], r['algorithm']): r for r in baseline['results']}
+    table = []
+    for r in results:
+        before = old.get((r['map'], r['algorithm']))
+        if before is None or 'error' in before or 'error' in r:
+            continue
+        table.append([r['map'], r['algorithm'], round(before['seconds'] * 1000, 2), round(r['seconds'] * 1000, 2),
+                      round(before['seconds'] / r['seconds'], 2) if r['seconds'] else '-',
+                      before['expansions'], r['expansions'], before['path_cost'], r['path_cost']])
+    print_table(table, header=['map', 'algorithm', 'old ms', 'new ms', 'speedup',
+                               'old exp', 'new exp', 'old cost', 'new cost'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--maps', nargs='+', default=['testcases'] + list(GENERATORS),
+                        choices=['testcases'] + list(GENERATORS))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64, 256, 1024, 4096])
+    parser.add_argument('--algorithms', nargs='+', default=list(get_args(Algorithm)), choices=get_args(Algorithm))
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc peak memory run')
+    parser.add_argument('--no-limits', action='store_true', help='run every algorithm on every map size')
+    parser.add_argument('--output', help='write the JSON results here instead of stdout')
+    parser.add_argument('--compare', help='previous JSON results to compare against')
+    args = parser.parse_args()
+    if args.compare and not args.output:
+        parser.error('--compare needs --output (the comparison table is printed to stdout)')
+
+    maps = []
+    if 'testcases' in args.maps:
+        maps.append(testcase_maps())
+    maps.append(generated_maps([kind for kind in args.maps if kind != 'testcases'], args.sizes, args.seed))
+
+    results = []
+    for source in maps:
+        for name, grid, start, goals in source:
+            for algorithm in args.algorithms:
+                if not args.no_limits and grid.rows * grid.cols > LIMITS.get(algorithm, float('inf')):
+                    continue
+                result = measure(name, grid, start, goals, algorithm, max(args.repeat, 1), not args.no_memory)
+                results.append(result)
+                if 'error' in result:
+                    print('{:<16} {:<6} failed: {}'.format(name, algorithm, result['error']), file=sys.stderr)
+                else:
+                    print('{:<16} {:<6} {:>10.2f} ms  {:>9} expanded'.format(
+                        name, algorithm, result['seconds'] * 1000, result['expansions']), file=sys.stderr)
+
+    report = {'environment': environment(), 'args': vars(args), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    else:
+        json.dump(report, sys.stdout, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
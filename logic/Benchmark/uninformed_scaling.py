@@ -0,0 +1,53 @@
+"""Scaling of depth_first_graph_search and breadth_first_graph_search on
+recursive-backtracker mazes. Run from the logic directory:
+
+    python -m Benchmark.uninformed_scaling [--sizes 64 128 256 512] [--generic]
+
+--generic also times the Node-based searchers (the path generic Problem
+subclasses take). With O(1) frontier membership the time per expanded
+node should stay flat as the maze grows."""
+
+import argparse
+import time
+
+from utils import print_table
+from RobotProblem import GridRobotProblem
+from SearchHandle.UninformedSearch import breadth_first_graph_search, depth_first_graph_search
+from Benchmark.maps import maze_map
+
+
+class NodeGridRobotProblem(GridRobotProblem):
+    """GridRobotProblem that opts out of compilation, forcing the Node-based searchers."""
+
+    def compile(self):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64, 128, 256, 512])
+    parser.add_argument('--generic', action='store_true', help='also time the Node-based searchers')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    problem_types = [('grid', GridRobotProblem)]
+    if args.generic:
+        problem_types.append(('node', NodeGridRobotProblem))
+
+    table = []
+    for size in args.sizes:
+        grid, start, goals = maze_map(size, size, args.seed)
+        for search in (depth_first_graph_search, breadth_first_graph_search):
+            for mode, problem_type in problem_types:
+                problem = problem_type(start, goals, grid)
+                began = time.perf_counter()
+                node, total_nodes, _ = search(problem)
+                elapsed = time.perf_counter() - began
+                table.append(['{0}x{0}'.format(size), search.__name__, mode, total_nodes,
+                              len(node.path()) - 1 if node else -1,
+                              round(elapsed * 1000, 1), round(elapsed * 1e6 / max(total_nodes, 1), 2)])
+    print_table(table, header=['maze', 'search', 'mode', 'expanded', 'path', 'ms', 'us/node'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+# ______________________________________________________________________________
+# Bounded LRU cache shared by the server-side caches
+class LRUCache:
+    """A dict-like least-recently-used cache bounded both by entry count
+    (maxsize) and by total size in bytes (maxbytes, measured with the
+    sizeof function). Looking a key up moves it to the most recently used
+    end; inserting evicts from the least recently used end until both
+    bounds hold. An entry larger than maxbytes on its own is not stored.
+    hits/misses/evictions count get() outcomes and removals. Safe to share
+    between threads."""
+
+    def __init__(self, maxsize=128, maxbytes=None, sizeof=lambda value: 0):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.data = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = Lock()
+
+    def get(self, key, default=None):
+        """Return the value for key (marking it recently used), or default."""
+        with self.lock:
+            try:
+                value, _ = self.data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Insert or replace key, then evict until the cache is within bounds."""
+        size = self.sizeof(value)
+        with self.lock:
+            if key in self.data:
+                self.nbytes -= self.data.pop(key)[1]
+            if self.maxbytes is not None and size > self.maxbytes:
+                return
+            self.data[key] = (value, size)
+            self.nbytes += size
+            while len(self.data) > self.maxsize or (self.maxbytes is not None and self.nbytes > self.maxbytes):
+                self.nbytes -= self.data.popitem(last=False)[1][1]
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        """Remove key and return its value, or default."""
+        with self.lock:
+            if key not in self.data:
+                return default
+            value, size = self.data.pop(key)
+            self.nbytes -= size
+            return value
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.nbytes = 0
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def stats(self):
+        """Counters and current occupancy, e.g. for a metrics endpoint."""
+        return {'entries': len(self.data), 'bytes': self.nbytes, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
@@ -0,0 +1,108 @@
+import numpy as np
+
+from Cache import LRUCache
+
+# Byte for each flow-field move code (0 = no move, then UP, DOWN, LEFT, RIGHT)
+_MOVE_CHARS = np.frombuffer(b'.UDLR', dtype=np.uint8)
+
+
+# ______________________________________________________________________________
+# Goal distance field (reverse multi-source BFS) and the flow field derived from it
+class DistanceField:
+    """Step distance from every cell of a Grid to its nearest goal, computed
+    once with a multi-source BFS seeded with all goals. Any start can then
+    be answered in O(path length) by descending the field, and the
+    per-cell next move (flow field) can be shared by a whole fleet heading
+    for the same goals. Goals outside the grid or on walls cannot be
+    entered and are ignored as sources. Only the int32 distance array is
+    kept, so a field is cheap to cache."""
+
+    def __init__(self, grid, goals):
+        graph = grid.neighbor_table()
+        self.rows, self.cols = grid.rows, grid.cols
+        self.goals = set(map(tuple, goals))
+        sources = [graph.encode(goal) for goal in self.goals if grid.isMovable(*goal)]
+        self.dist = graph.distances(sources)
+        self.distance = memoryview(self.dist)
+        self.nbytes = self.dist.nbytes
+
+    def path_from(self, start):
+        """Cell indices from start to its nearest goal, following strictly
+        decreasing distances (first neighbor in UP, DOWN, LEFT, RIGHT order
+        on ties); None if no goal is reachable."""
+        x, y = start
+        rows, cols, distance = self.rows, self.cols, self.distance
+        if not (0 <= x < cols and 0 <= y < rows):
+            return None
+        index = y * cols + x
+        if tuple(start) in self.goals:
+            return [index]
+        path = [index]
+        current = distance[index]
+        if current == -1:
+            # A start that cannot be entered (a wall) may still be left: step to its best neighbor
+            reachable = [(distance[n], n) for n in self._neighbors(index) if distance[n] != -1]
+            if not reachable:
+                return None
+            current, index = min(reachable, key=lambda pair: pair[0])
+            path.append(index)
+        while current > 0:
+            current -= 1
+            for neighbor in self._neighbors(index):
+                if distance[neighbor] == current:
+                    index = neighbor
+                    break
+            path.append(index)
+        return path
+
+    def _neighbors(self, index):
+        y, x = divmod(index, self.cols)
+        if y > 0:
+            yield index - self.cols
+        if y < self.rows - 1:
+            yield index + self.cols
+        if x > 0:
+            yield index - 1
+        if x < self.cols - 1:
+            yield index + 1
+
+    def flow_field(self):
+        """uint8 array (rows, cols) of the move each cell should take towards
+        the nearest goal: 1 UP, 2 DOWN, 3 LEFT, 4 RIGHT, 0 for goals, walls
+        and cells with no path. Matches the first step of path_from."""
+        dist = self.dist.reshape(self.rows, self.cols)
+        moves = np.zeros(dist.shape, dtype=np.uint8)
+        target = dist - 1
+        shifted = np.full(dist.shape, -2, dtype=np.int32)
+        for code, (src, dst) in enumerate((
+                ((slice(1, None), slice(None)), (slice(None, -1), slice(None))),   # UP: neighbor is row - 1
+                ((slice(None, -1), slice(None)), (slice(1, None), slice(None))),   # DOWN
+                ((slice(None), slice(1, None)), (slice(None), slice(None, -1))),   # LEFT
+                ((slice(None), slice(None, -1)), (slice(None), slice(1, None))),   # RIGHT
+        ), start=1):
+            shifted.fill(-2)
+            shifted[src] = dist[dst]
+            moves[(moves == 0) & (dist > 0) & (shifted == target)] = code
+        return moves
+
+    def flow_rows(self, grid):
+        """The flow field as one string per row: U/D/L/R is the next move,
+        G a goal, # a wall and . a cell with no path to any goal."""
+        chars = _MOVE_CHARS[self.flow_field()]
+        chars[self.dist.reshape(self.rows, self.cols) == 0] = ord('G')
+        chars[grid.grid == 1] = ord('#')
+        return [row.tobytes().decode('ascii') for row in chars]
+
+
+# Fields cached per (grid contents, goal set); bounded by count and by bytes
+field_cache = LRUCache(maxsize=32, maxbytes=256 << 20, sizeof=lambda field: field.nbytes)
+
+
+def distance_field(grid, goals):
+    """Return the DistanceField for grid and goals, computing it only on a cache miss."""
+    key = (grid.fingerprint(), tuple(sorted(set(map(tuple, goals)))))
+    field = field_cache.get(key)
+    if field is None:
+        field = DistanceField(grid, goals)
+        field_cache.put(key, field)
+    return field
@@ -0,0 +1,82 @@
+import struct
+
+import numpy as np
+
+# Media type of the binary search result (see encode_search_response)
+BINARY_MEDIA_TYPE = 'application/octet-stream'
+
+# magic, flags, total_nodes, cols, path length, visited length, message length
+_HEADER = struct.Struct('<4sI i I I I I')
+_MAGIC = b'PFB1'
+_SUCCESS = 1
+_PATH_ACTIONS = 2
+
+# Action letter for each (dx, dy) step
+_STEP_LETTERS = {(0, -1): 'U', (0, 1): 'D', (-1, 0): 'L', (1, 0): 'R'}
+
+
+# ______________________________________________________________________________
+# Compact binary form of a SearchResponse
+def encode_search_response(response, cols, start=None, path_actions=False):
+    """Pack a SearchResponse into bytes, all little-endian:
+
+        header   '4sI i I I I I': b'PFB1', flags (1 success, 2 path as
+                 actions), total_nodes, cols, path length, visited length,
+                 message length in bytes
+        visited  int32[visited length] cell indices (y * cols + x)
+        path     int32[path length] cell indices, in the order of the JSON
+                 path; or, with flag 2, path length bytes of ASCII
+                 run-length encoded actions from start (see encode_actions)
+        message  UTF-8
+
+    A path that is not a chain of single steps from start is always sent
+    as cell indices. The int32 sections come first, so they are 4-byte aligned and can be
+    read in place (e.g. a JavaScript Int32Array over the buffer)."""
+    visited = _cell_indices(response.visited_nodes, cols)
+    actions = encode_actions(start, response.path) if path_actions else None
+    path_actions = actions is not None
+    if path_actions:
+        path = actions.encode('ascii')
+        path_length = len(path)
+    else:
+        path = _cell_indices(response.path, cols)
+        path_length = len(response.path)
+    message = response.message.encode('utf-8')
+    flags = (_SUCCESS if response.success else 0) | (_PATH_ACTIONS if path_actions else 0)
+    header = _HEADER.pack(_MAGIC, flags, response.total_nodes, cols, path_length, len(response.visited_nodes), len(message))
+    return b''.join((header, visited, path, message))
+
+
+def _cell_indices(cells, cols):
+    if not cells:
+        return b''
+    xy = np.asarray(cells, dtype=np.int64)
+    return (xy[:, 1] * cols + xy[:, 0]).astype('<i4').tobytes()
+
+
+def encode_actions(start, path):
+    """Run-length encode the moves along path as letter-count pairs, e.g.
+    'R3D1L2'. path is in the order SearchResponse uses (goal first, without
+    the start unless start and goal coincide); the actions go from start to
+    the goal. Returns None if consecutive cells are not neighbors."""
+    cells = [tuple(cell) for cell in reversed(path)]
+    if not cells or cells[0] != tuple(start):
+        cells.insert(0, tuple(start))
+    runs = []
+    for (x0, y0), (x1, y1) in zip(cells, cells[1:]):
+        letter = _STEP_LETTERS.get((x1 - x0, y1 - y0))
+        if letter is None:
+            return None
+        if runs and runs[-1][0] == letter:
+            runs[-1][1] += 1
+        else:
+            runs.append([letter, 1])
+    return ''.join('{}{}'.format(letter, count) for letter, count in runs)
+
+
+def wants_binary(requested, accept):
+    """Whether to answer in binary: the request's format field if given,
+    else the Accept header."""
+    if requested is not None:
+        return requested == 'binary'
+    return BINARY_MEDIA_TYPE in (accept or '')
@@ -0,0 +1,92 @@
+import inspect
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from threading import Lock
+
+from Grid import Grid
+
+
+# ______________________________________________________________________________
+# Process-pool execution of searches, with grids handed over in shared memory
+class SharedGrid:
+    """A copy of a Grid's cells in a named shared memory block. Worker
+    processes attach to it by name (attach_grid) and wrap the block in a
+    Grid without copying, so a search request only pickles the block name,
+    the grid size and the query. The owner calls release() once every
+    worker using it has finished."""
+
+    def __init__(self, grid):
+        self.rows, self.cols = grid.rows, grid.cols
+        self.shm = shared_memory.SharedMemory(create=True, size=max(grid.rows * grid.cols, 1))
+        self.shm.buf[:grid.rows * grid.cols] = grid.cells
+        self.name = self.shm.name
+
+    def release(self):
+        """Free the block."""
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def release_after(self, futures):
+        """Release the block once every future using it is done (or cancelled)."""
+        remaining = [len(futures)]
+        lock = Lock()
+
+        def finished(_):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                self.release()
+
+        for future in futures:
+            future.add_done_callback(finished)
+
+
+_ATTACH_TAKES_TRACK = 'track' in inspect.signature(shared_memory.SharedMemory).parameters
+
+
+def attach_grid(name, rows, cols):
+    """In a worker: attach to a SharedGrid's block and return (block, Grid).
+    The Grid reads the shared cells directly. Close the block (detach_grid)
+    once the Grid is no longer used."""
+    if _ATTACH_TAKES_TRACK:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        # Before Python 3.13 attaching also registers the block with the resource
+        # tracker, which would then unlink it (and warn) when this worker exits
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args: None
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+    return shm, Grid(rows, cols, shm.buf[:rows * cols])
+
+
+def detach_grid(shm, grid):
+    """Drop the worker's views of the block, then close it."""
+    grid.grid = grid.cells = None
+    shm.close()
+
+
+class SearchPool:
+    """Lazily started, persistent process pool for CPU-bound searches, so a
+    long search runs outside the server process (and its GIL) and the
+    number of searches running at once scales with cores."""
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+
+    def submit(self, fn, *args):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self.pool.submit(fn, *args)
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
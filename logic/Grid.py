@@ -1,31 +1,119 @@
+import hashlib
 from typing import List, Tuple
 
-#Grid class to represent a 2D grid with walls 
+import numpy as np
+
+from GridGraph import GridGraph
+
+# Max cells of the difference array create_walls rasterizes per band (bounds its memory on huge maps)
+_RASTER_BAND_CELLS = 1 << 24
+
+#Grid class to represent a 2D grid with walls
 class Grid():
-    def __init__(self, rows: int, cols: int):
+    def __init__(self, rows: int, cols: int, cells=None):
         self.rows = rows
         self.cols = cols
-        self.grid = [[0] * cols for _ in range(rows)]  #Initialize a 2d grid, all cells are 0
-        
-    
+        # One contiguous byte per cell, row-major (index = y * cols + x), all cells are 0.
+        # self.cells is what isMovable reads; self.grid is a 2D NumPy view sharing the same memory.
+        # cells can be an existing writable buffer of rows * cols bytes to use as storage instead
+        self.cells = bytearray(rows * cols) if cells is None else cells
+        self.grid = np.frombuffer(self.cells, dtype=np.uint8).reshape(rows, cols)
+        # Bumped on every wall change so derived tables (neighbor table, ...) know to rebuild
+        self.version = 0
+        self._graph = None
+        self._fingerprint = None
+
+
     def create_wall(self, x:int, y:int, w:int, h:int): #(x, y) for top left corner, w for width, h for height of wall
         """Create a wall at the specified row and column."""
-        for i in range (x, min(x+ w, self.cols)):  #Ensure we don't go out of bounds
-            for j in range (y, min (y + h, self.rows)):
-                self.grid[j][i] = 1 #wall cells are 1
+        #Ensure we don't go out of bounds (a negative slice stop would wrap around)
+        x0, x1 = max(x, 0), max(min(x + w, self.cols), 0)
+        y0, y1 = max(y, 0), max(min(y + h, self.rows), 0)
+        self.grid[y0:y1, x0:x1] = 1 #wall cells are 1
+        self.version += 1
+
+    def create_walls(self, walls):
+        """Rasterize many (x, y, w, h) rectangles at once. Every rectangle adds
+        +1/-1 at its corners in a difference array whose 2D prefix sum counts
+        the rectangles covering each cell; the array is processed in bands of
+        rows so its size stays bounded on very large maps."""
+        rects = np.asarray(walls, dtype=np.int64).reshape(-1, 4)
+        if len(rects) == 0 or self.rows == 0 or self.cols == 0:
+            return
+        self.version += 1
+        x0 = np.clip(rects[:, 0], 0, self.cols)
+        y0 = np.clip(rects[:, 1], 0, self.rows)
+        x1 = np.clip(rects[:, 0] + rects[:, 2], 0, self.cols)
+        y1 = np.clip(rects[:, 1] + rects[:, 3], 0, self.rows)
+        keep = (x1 > x0) & (y1 > y0)
+        x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+
+        width = self.cols + 1
+        band = max(1, _RASTER_BAND_CELLS // width)
+        for top in range(0, self.rows, band):
+            bottom = min(top + band, self.rows)
+            hit = (y0 < bottom) & (y1 > top)
+            if not hit.any():
+                continue
+            bx0, bx1 = x0[hit], x1[hit]
+            by0 = np.maximum(y0[hit], top) - top
+            by1 = np.minimum(y1[hit], bottom) - top
+            corners = np.concatenate((by0 * width + bx0, by0 * width + bx1,
+                                      by1 * width + bx0, by1 * width + bx1))
+            weights = np.repeat(np.array([1, -1, -1, 1], dtype=np.int32), len(bx0))
+            size = (bottom - top + 1) * width
+            diff = np.bincount(corners, weights=weights, minlength=size).astype(np.int32)
+            cover = diff.reshape(-1, width).cumsum(axis=0).cumsum(axis=1)
+            self.grid[top:bottom][cover[:bottom - top, :self.cols] > 0] = 1
 
     def create_wall_with_positions(self, positions: List[Tuple[int, int]]):
-        for row, col in positions:
-            if 0 <= row < self.rows and 0 <= col < self.cols:
-                self.grid[row][col] = 1 
+        cells = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+        row, col = cells[:, 0], cells[:, 1]
+        inside = (0 <= row) & (row < self.rows) & (0 <= col) & (col < self.cols)
+        self.grid[row[inside], col[inside]] = 1
+        self.version += 1
+
+    def update_walls_with_positions(self, add: List[Tuple[int, int]], remove: List[Tuple[int, int]]):
+        """Turn the (row, col) positions of add into walls and clear those of
+        remove, as one change: a position listed in both ends up clear,
+        positions outside the grid are ignored, and the version is bumped
+        once if any cell changed. Returns the (row, col) array of the cells
+        whose state changed, each once."""
+        positions = np.concatenate((np.asarray(add, dtype=np.int64).reshape(-1, 2),
+                                    np.asarray(remove, dtype=np.int64).reshape(-1, 2)))
+        values = np.repeat(np.array([1, 0], dtype=np.uint8), (len(positions) - len(remove), len(remove)))
+        row, col = positions[:, 0], positions[:, 1]
+        inside = (0 <= row) & (row < self.rows) & (0 <= col) & (col < self.cols)
+        index, values = (row * self.cols + col)[inside], values[inside]
+        # The last entry for a cell wins (remove comes after add)
+        index, last = np.unique(index[::-1], return_index=True)
+        values = values[::-1][last]
+        cells = self.grid.reshape(-1)
+        flips = cells[index] != values
+        index = index[flips]
+        if index.size:
+            cells[index] = values[flips]
+            self.version += 1
+        return np.column_stack(np.divmod(index, self.cols))
+
+    def fingerprint(self) -> str:
+        """Hash of the grid size and contents, usable as a cache key across requests."""
+        if self._fingerprint is None or self._fingerprint[0] != self.version:
+            digest = hashlib.blake2b(self.cells, digest_size=16)
+            digest.update(b'%d,%d' % (self.rows, self.cols))
+            self._fingerprint = (self.version, digest.hexdigest())
+        return self._fingerprint[1]
+
+    def neighbor_table(self):
+        """Return the CSR neighbor table of the grid, rebuilding it only after walls changed."""
+        if self._graph is None or self._graph_version != self.version:
+            self._graph = GridGraph(self)
+            self._graph_version = self.version
+        return self._graph
 
     # return the boolean value for checking if the cell is movable or not
     def isMovable(self, x: int, y: int) -> bool:
-        if (0 <= x < self.cols) and (0 <= y < self.rows) and self.grid[y][x] != 1:
+        if (0 <= x < self.cols) and (0 <= y < self.rows) and self.cells[y * self.cols + x] != 1:
             return True
         else:
             return False
-
-
-
-    
\ No newline at end of file
@@ -0,0 +1,102 @@
+import numpy as np
+
+# Neighbor order used everywhere (same order as GridRobotProblem.actions)
+ACTIONS = ('UP', 'DOWN', 'LEFT', 'RIGHT')
+
+
+# ______________________________________________________________________________
+# Compressed-sparse-row adjacency of a Grid (states are flat cell indices)
+class GridGraph:
+    """Neighbor table of a Grid in CSR form. Cell (x, y) is encoded as the
+    flat index y * cols + x; the neighbors of cell i are
+    indices[indptr[i]:indptr[i + 1]], listed in ACTIONS order, exactly the
+    cells GridRobotProblem.actions would allow from (x, y). The table is
+    built once with array operations; indptr and indices are memoryviews
+    over the NumPy arrays so Python loops index them as plain ints."""
+
+    def __init__(self, grid):
+        self.rows = rows = grid.rows
+        self.cols = cols = grid.cols
+        self.size = rows * cols
+        movable = grid.grid != 1
+
+        # valid[y, x, d] is True when moving from (x, y) in direction d stays on an open cell
+        valid = np.zeros((rows, cols, 4), dtype=bool)
+        valid[1:, :, 0] = movable[:-1, :]   # UP
+        valid[:-1, :, 1] = movable[1:, :]   # DOWN
+        valid[:, 1:, 2] = movable[:, :-1]   # LEFT
+        valid[:, :-1, 3] = movable[:, 1:]   # RIGHT
+        valid = valid.reshape(-1, 4)
+
+        deltas = np.array([-cols, cols, -1, 1], dtype=np.int64)
+        targets = np.arange(self.size, dtype=np.int64)[:, None] + deltas
+        indptr = np.zeros(self.size + 1, dtype=np.int64)
+        np.cumsum(valid.sum(axis=1), out=indptr[1:])
+
+        self.indptr_array = indptr
+        self.indices_array = targets[valid].astype(np.int32)
+        self.indptr = memoryview(self.indptr_array)
+        self.indices = memoryview(self.indices_array)
+        # Flat open-cell mask (index = y * cols + x) for the array-based searchers
+        self.movable = movable.reshape(-1)
+
+    def distances(self, sources):
+        """Multi-source BFS: int32 array of the step count from the nearest
+        source to every cell (-1 where unreachable), following the table's
+        edges outward from the sources. Large layers are expanded with array
+        gathers over the CSR table, small ones (long corridors, mazes) with
+        a plain Python loop, where per-layer array overhead would dominate."""
+        dist = np.full(self.size, -1, dtype=np.int32)
+        layer = np.unique(np.asarray(sources, dtype=np.int64))
+        dist[layer] = 0
+        distance = memoryview(dist)
+        indptr, indices = self.indptr, self.indices
+        depth = 0
+        while layer.size:
+            depth += 1
+            if layer.size < 64:
+                following = []
+                for index in layer.tolist():
+                    for k in range(indptr[index], indptr[index + 1]):
+                        child = indices[k]
+                        if distance[child] == -1:
+                            distance[child] = depth
+                            following.append(child)
+                layer = np.array(following, dtype=np.int64)
+            else:
+                starts = self.indptr_array[layer]
+                counts = self.indptr_array[layer + 1] - starts
+                offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+                children = self.indices_array[offsets]
+                layer = np.unique(children[dist[children] == -1]).astype(np.int64)
+                dist[layer] = depth
+        return dist
+
+    def neighbors(self, index):
+        """Return the neighbor indices of the given cell index."""
+        return self.indices[self.indptr[index]:self.indptr[index + 1]]
+
+    def encode(self, state):
+        """(x, y) -> flat cell index."""
+        x, y = state
+        return y * self.cols + x
+
+    def decode(self, index):
+        """Flat cell index -> (x, y)."""
+        y, x = divmod(index, self.cols)
+        return (x, y)
+
+    def contains(self, state):
+        x, y = state
+        return 0 <= x < self.cols and 0 <= y < self.rows
+
+    def action(self, index, next_index):
+        """Return the action that moves from index to the neighboring next_index."""
+        delta = next_index - index
+        if delta == -self.cols:
+            return 'UP'
+        elif delta == self.cols:
+            return 'DOWN'
+        elif delta == -1:
+            return 'LEFT'
+        return 'RIGHT'
@@ -0,0 +1,54 @@
+import numpy as np
+
+from Cache import LRUCache
+
+# Larger than any grid distance; marks "no goal yet" inside the distance transform
+_FAR = 1 << 40
+
+
+# ______________________________________________________________________________
+# Per-cell heuristic tables for the grid searchers
+def manhattan_table(rows, cols, goals):
+    """Flat int32 array (index = y * cols + x) of the Manhattan distance from
+    every cell to its nearest goal, cached per (grid size, goal set).
+    Searchers read it by state index instead of taking a min over all goals
+    on every call. Goals outside the grid still count, as they do in
+    robot_manhattan_heuristic."""
+    key = (rows, cols, tuple(sorted(set(map(tuple, goals)))))
+    table = heuristic_cache.get(key)
+    if table is None:
+        table = _manhattan_transform(rows, cols, key[2])
+        heuristic_cache.put(key, table)
+    return table
+
+
+def _manhattan_transform(rows, cols, goals):
+    """Exact L1 distance transform in two separable passes (along rows, then
+    along columns); each pass is a forward and a backward running minimum,
+    so the cost is O(cells) whatever the number of goals."""
+    inside = [(x, y) for x, y in goals if 0 <= x < cols and 0 <= y < rows]
+    outside = [(x, y) for x, y in goals if not (0 <= x < cols and 0 <= y < rows)]
+    dist = np.full((rows, cols), _FAR, dtype=np.int64)
+    if inside:
+        xs, ys = np.array(inside).T
+        dist[ys, xs] = 0
+        dist = _running_l1(dist, axis=1)
+        dist = _running_l1(dist, axis=0)
+    if outside:
+        x = np.arange(cols)
+        y = np.arange(rows)[:, None]
+        for gx, gy in outside:
+            np.minimum(dist, np.abs(x - gx) + np.abs(y - gy), out=dist)
+    return np.minimum(dist, np.iinfo(np.int32).max).astype(np.int32).reshape(-1)
+
+
+def _running_l1(dist, axis):
+    """min over k of dist[k] + |i - k| along axis, via prefix/suffix minima."""
+    position = np.arange(dist.shape[axis]).reshape((1, -1) if axis == 1 else (-1, 1))
+    forward = np.minimum.accumulate(dist - position, axis=axis) + position
+    backward = np.flip(np.minimum.accumulate(np.flip(dist + position, axis), axis=axis), axis) - position
+    return np.minimum(forward, backward)
+
+
+# Tables cached per (rows, cols, goals); bounded by count and by bytes
+heuristic_cache = LRUCache(maxsize=64, maxbytes=256 << 20, sizeof=lambda table: table.nbytes)
@@ -0,0 +1,370 @@
+from collections import deque
+
+import numpy as np
+
+from Cache import LRUCache
+from Heuristics import manhattan_table
+from utils import IndexedPriorityQueue
+
+# Side of the square clusters; at most 32, so a cluster never has more than 64 entrances (one bit each)
+CLUSTER_SIZE = 16
+# Open runs along a cluster border at least this long get a transition at both ends, shorter ones one in the middle
+_WIDE_ENTRANCE = 6
+# Clusters whose intra-cluster distances are computed together (bounds the bitset arrays to ~8 MB)
+_CLUSTER_BATCH = 4096
+# Abstract search node standing for "any goal"
+_GOAL = -1
+
+
+# ______________________________________________________________________________
+# HPA* abstraction of a Grid: clusters, entrances and intra-cluster distances
+class Hierarchy:
+    """Hierarchical abstraction of a Grid (HPA*). The grid is split into
+    square clusters of cluster_size cells. Along each border between two
+    clusters, every maximal run of cells that are open on both sides is an
+    entrance: one transition (a pair of facing cells) in the middle of a
+    short run, one at each end of a run of _WIDE_ENTRANCE cells or more.
+    The transition cells are the nodes of the abstract graph; facing cells
+    are linked with cost 1, and the cells of one cluster with their
+    shortest distance inside the cluster, precomputed for every cluster.
+
+    The intra-cluster distances are computed for many clusters at once as
+    bitset BFS: each entrance owns one bit of an unsigned word per cell,
+    and every step ORs the cells' bits into their open neighbors, so one
+    array pass advances the BFS of all entrances of all clusters in the
+    batch.
+
+    Built from a previous Hierarchy of the same grid shape, only the
+    clusters whose cells or entrances changed are recomputed; the rest
+    share the previous distance tables (see grid_hierarchy)."""
+
+    def __init__(self, grid, cluster_size=CLUSTER_SIZE, previous=None):
+        if not 1 <= cluster_size <= 32:
+            raise ValueError("cluster_size must be between 1 and 32, got {}".format(cluster_size))
+        self.rows, self.cols = grid.rows, grid.cols
+        self.cluster_size = cluster_size
+        self.clusters_x = -(-grid.cols // cluster_size)
+        self.clusters_y = -(-grid.rows // cluster_size)
+        self.clusters = self.clusters_x * self.clusters_y
+        # Snapshot of the cells the abstraction describes, diffed by the next rebuild
+        self.cells = bytes(grid.cells)
+        movable = grid.grid != 1
+
+        first, second = self._transitions(movable)
+        self.links = {}
+        for a, b in zip(first.tolist(), second.tolist()):
+            self.links.setdefault(a, []).append(b)
+            self.links.setdefault(b, []).append(a)
+        cells = np.unique(np.concatenate((first, second)))
+        owner = self._cluster_of(cells)
+        order = np.argsort(owner, kind='stable')
+        counts = np.bincount(owner, minlength=self.clusters)
+        self.entrances = [part.tolist() for part in np.split(cells[order], np.cumsum(counts)[:-1])]
+        self.slot = {cell: slot for entrances in self.entrances for slot, cell in enumerate(entrances)}
+
+        if previous is None:
+            stale = range(self.clusters)
+            self.intra = [None] * self.clusters
+        else:
+            changed = np.flatnonzero(np.frombuffer(previous.cells, dtype=np.uint8) != np.frombuffer(self.cells, dtype=np.uint8))
+            stale = set(self._cluster_of(changed).tolist())
+            stale.update(k for k in range(self.clusters) if self.entrances[k] != previous.entrances[k])
+            stale = sorted(stale)
+            self.intra = list(previous.intra)
+        self.rebuilt_clusters = len(stale)
+        self._intra_distances(movable, cells[order], owner[order], stale)
+        self.nbytes = (len(self.cells) + sum(table.nbytes for table in self.intra if table is not None)
+                       + 200 * len(cells))  # rough size of the entrance lists and dicts
+
+    def rebuilt(self, grid):
+        """Hierarchy of grid (same shape, possibly other walls) reusing the
+        distance tables of the clusters that did not change."""
+        if (grid.rows, grid.cols) != (self.rows, self.cols):
+            return Hierarchy(grid, self.cluster_size)
+        return Hierarchy(grid, self.cluster_size, previous=self)
+
+    def _cluster_of(self, index):
+        """Cluster number of a cell index (or of an array of them)."""
+        y, x = divmod(index, self.cols)
+        return (y // self.cluster_size) * self.clusters_x + x // self.cluster_size
+
+    def _bounds(self, cluster):
+        """(x0, y0, x1, y1) cell range of a cluster, end exclusive."""
+        cy, cx = divmod(cluster, self.clusters_x)
+        c = self.cluster_size
+        return cx * c, cy * c, min(cx * c + c, self.cols), min(cy * c + c, self.rows)
+
+    def _transitions(self, movable):
+        """Cell index arrays (first, second) of the facing cells of every
+        transition, over all vertical borders and then all horizontal ones."""
+        c, cols = self.cluster_size, self.cols
+        firsts, seconds = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+        xs = np.arange(c - 1, self.cols - 1, c)
+        if xs.size:
+            line, offset = self._entrance_points(movable[:, xs].T & movable[:, xs + 1].T)
+            firsts.append(offset * cols + xs[line])
+            seconds.append(firsts[-1] + 1)
+        ys = np.arange(c - 1, self.rows - 1, c)
+        if ys.size:
+            line, offset = self._entrance_points(movable[ys, :] & movable[ys + 1, :])
+            firsts.append(ys[line] * cols + offset)
+            seconds.append(firsts[-1] + cols)
+        return np.concatenate(firsts), np.concatenate(seconds)
+
+    def _entrance_points(self, open_pairs):
+        """(line, offset) of the transitions along border lines, given a
+        boolean array (lines, length) of the positions open on both sides;
+        runs are cut where a line passes from one cluster to the next."""
+        c = self.cluster_size
+        position = np.arange(open_pairs.shape[1])
+        before = np.zeros_like(open_pairs)
+        before[:, 1:] = open_pairs[:, :-1]
+        before[:, position % c == 0] = False
+        after = np.zeros_like(open_pairs)
+        after[:, :-1] = open_pairs[:, 1:]
+        after[:, position % c == c - 1] = False
+        line, start = np.nonzero(open_pairs & ~before)
+        _, end = np.nonzero(open_pairs & ~after)  # row-major order pairs every end with its start
+        length = end - start + 1
+        wide = length >= _WIDE_ENTRANCE
+        return (np.concatenate((line[~wide], line[wide], line[wide])),
+                np.concatenate((start[~wide] + (length[~wide] - 1) // 2, start[wide], end[wide])))
+
+    def _intra_distances(self, movable, cells, owner, clusters):
+        """Fill self.intra[k] for the given clusters with the (E, E) int32
+        table of step distances between their E entrances inside the
+        cluster (-1 if not connected there). cells are all entrance cells
+        sorted by their cluster numbers owner."""
+        c, cols = self.cluster_size, self.cols
+        for k in clusters:
+            self.intra[k] = None
+        clusters = np.asarray(clusters, dtype=np.int64)
+        clusters = clusters[np.bincount(owner, minlength=self.clusters)[clusters] > 0]
+        if not clusters.size:
+            return
+        padded = np.zeros((self.clusters_y * c, self.clusters_x * c), dtype=bool)
+        padded[:self.rows, :self.cols] = movable
+        blocks = padded.reshape(self.clusters_y, c, self.clusters_x, c).swapaxes(1, 2).reshape(-1, c, c)
+        first = np.concatenate(([0], np.cumsum(np.bincount(owner, minlength=self.clusters))))
+        slots = np.arange(len(cells)) - first[owner]
+        y, x = np.divmod(cells, cols)
+        local = (y % c) * c + x % c
+        for begin in range(0, len(clusters), _CLUSTER_BATCH):
+            batch = clusters[begin:begin + _CLUSTER_BATCH]
+            n = len(batch)
+            position = np.full(self.clusters, -1, dtype=np.int64)
+            position[batch] = np.arange(n)
+            mine = np.flatnonzero(position[owner] >= 0)  # entrances of the batch, grouped by cluster
+            # Narrowest unsigned type with a bit for every entrance of a cluster in the batch
+            width = 8
+            while width < slots[mine].max() + 1:
+                width *= 2
+            word = np.dtype('<u{}'.format(width // 8))
+            who, at, bit = position[owner[mine]], local[mine], slots[mine].astype(word)
+            open_bits = np.where(blocks[batch], ~word.type(0), word.type(0))
+            reached = np.zeros((n, c, c), dtype=word)
+            reached.reshape(n, -1)[who, at] = word.type(1) << bit
+            dist = np.full((len(mine), width), -1, dtype=np.int32)  # [entrance, source slot]
+            dist[np.arange(len(mine)), slots[mine]] = 0
+            # Only clusters whose reached bits still change take part in a step
+            active = np.arange(n)
+            step = 0
+            while active.size:
+                step += 1
+                m = len(active)
+                current = reached[active]
+                grown = current.copy()
+                grown[:, 1:, :] |= current[:, :-1, :]
+                grown[:, :-1, :] |= current[:, 1:, :]
+                grown[:, :, 1:] |= current[:, :, :-1]
+                grown[:, :, :-1] |= current[:, :, 1:]
+                grown &= open_bits[active]
+                changed = (grown != current).reshape(m, -1).any(axis=1)
+                slot_of = np.full(n, -1, dtype=np.int64)
+                slot_of[active] = np.arange(m)
+                entry = np.flatnonzero(slot_of[who] >= 0)
+                row, cell = slot_of[who[entry]], at[entry]
+                new = grown.reshape(m, -1)[row, cell] & ~current.reshape(m, -1)[row, cell]
+                hit = np.flatnonzero(new)
+                if hit.size:
+                    bits = np.unpackbits(new[hit].view(np.uint8).reshape(-1, width // 8), axis=1, bitorder='little')
+                    rows = dist[entry[hit]]
+                    rows[bits.astype(bool)] = step
+                    dist[entry[hit]] = rows
+                reached[active] = grown
+                active = active[changed]
+            bounds = np.concatenate(([0], np.cumsum(np.bincount(who, minlength=n))))
+            for i, k in enumerate(batch.tolist()):
+                size = bounds[i + 1] - bounds[i]
+                self.intra[k] = dist[bounds[i]:bounds[i + 1], :size].copy()
+
+    def _local_bfs(self, sources, cluster, targets=None):
+        """BFS from sources that stays inside cluster. Returns (dist,
+        parent, target, expansions): dicts over the reached cells, and the
+        first target reached (None if targets is None or none was)."""
+        cols, cells = self.cols, self.cells
+        x0, y0, x1, y1 = self._bounds(cluster)
+        dist = dict.fromkeys(sources, 0)
+        parent = dict.fromkeys(sources, -1)
+        queue = deque(sources)
+        expansions = 0
+        while queue:
+            index = queue.popleft()
+            expansions += 1
+            if targets is not None and index in targets:
+                return dist, parent, index, expansions
+            y, x = divmod(index, cols)
+            # Same neighbor order as the searchers: UP, DOWN, LEFT, RIGHT
+            for child, inside in ((index - cols, y > y0), (index + cols, y < y1 - 1), (index - 1, x > x0), (index + 1, x < x1 - 1)):
+                if inside and cells[child] != 1 and child not in dist:
+                    dist[child] = dist[index] + 1
+                    parent[child] = index
+                    queue.append(child)
+        return dist, parent, None, expansions
+
+    def _neighbors(self, index):
+        y, x = divmod(index, self.cols)
+        if y > 0:
+            yield index - self.cols
+        if y < self.rows - 1:
+            yield index + self.cols
+        if x > 0:
+            yield index - 1
+        if x < self.cols - 1:
+            yield index + 1
+
+    def _local_path(self, source, targets, cluster):
+        """Cells after source up to the nearest of targets, inside cluster."""
+        _, parent, index, expansions = self._local_bfs([source], cluster, targets)
+        path = []
+        while index != source:
+            path.append(index)
+            index = parent[index]
+        path.reverse()
+        return path, expansions
+
+    def search(self, start, goals, visited=None):
+        """HPA* from start to the nearest of goals, both (x, y). The start
+        and the goals are connected to the entrances of their clusters by
+        BFS inside those clusters, A* (Manhattan heuristic) finds the
+        cheapest route through the abstract graph, and each of its edges is
+        refined into cells by BFS inside its cluster. The path is optimal in
+        the abstract graph, which is close to but not always a shortest
+        path. Returns (path, visited, expansions): the path as cell indices
+        from start to a goal (None if the abstract graph has no route), the
+        abstract nodes in expansion order and the count of expanded nodes
+        and cells. Goals on walls or off the grid cannot be entered and are
+        ignored. Expanded nodes are appended to visited if given (e.g. a
+        Streaming.DeadlineLog, which stops the search at its deadline)."""
+        cols = self.cols
+        source = start[1] * cols + start[0]
+        goal_cells = {y * cols + x for x, y in goals
+                      if 0 <= x < cols and 0 <= y < self.rows and self.cells[y * cols + x] != 1}
+        if tuple(start) in set(map(tuple, goals)):
+            return [source], [source], 1
+        if not goal_cells:
+            return None, [], 0
+
+        # Temporary nodes: the start, joined to the entrances of its cluster, and
+        # its open neighbors across the cluster border (the start may be a wall,
+        # which no transition leads out of), joined to the entrances of theirs
+        inserted = {}
+        home = self._cluster_of(source)
+        crossings = [child for child in self._neighbors(source)
+                     if self.cells[child] != 1 and self._cluster_of(child) != home]
+        expansions = 0
+        for cell in [source] + crossings:
+            cluster = self._cluster_of(cell)
+            dist, _, _, count = self._local_bfs([cell], cluster)
+            expansions += count
+            edges = [(entrance, dist[entrance]) for entrance in self.entrances[cluster] if entrance in dist and entrance != cell]
+            direct = [dist[goal] for goal in goal_cells if goal in dist]
+            if direct:
+                edges.append((_GOAL, min(direct)))
+            inserted[cell] = edges
+        inserted[source] += [(cell, 1) for cell in crossings]
+        by_cluster = {}
+        for cell in goal_cells:
+            by_cluster.setdefault(self._cluster_of(cell), []).append(cell)
+        goal_edges = {}
+        for cluster, cells in by_cluster.items():
+            dist, _, _, count = self._local_bfs(cells, cluster)
+            expansions += count
+            for cell in self.entrances[cluster]:
+                if cell in dist:
+                    goal_edges[cell] = dist[cell]
+
+        h = manhattan_table(self.rows, cols, goals)
+        g = {source: 0}
+        parent = {source: None}
+        keys = {source: (h[source], 0)}
+        frontier = IndexedPriorityQueue('min', keys.__getitem__)
+        frontier.append(source)
+        closed = set()
+        visited = [] if visited is None else visited
+        while frontier:
+            node = frontier.pop()
+            if node == _GOAL:
+                break
+            closed.add(node)
+            visited.append(node)
+            expansions += 1
+            if node in inserted:
+                edges = list(inserted[node])
+            else:
+                cluster = self._cluster_of(node)
+                row = self.intra[cluster][self.slot[node]].tolist()
+                edges = [(cell, d) for cell, d in zip(self.entrances[cluster], row) if d > 0]
+                if node in goal_edges:
+                    edges.append((_GOAL, goal_edges[node]))
+            edges.extend((cell, 1) for cell in self.links.get(node, ()))
+            for child, cost in edges:
+                if child in closed:
+                    continue
+                child_cost = g[node] + cost
+                if child not in g or child_cost < g[child]:
+                    g[child] = child_cost
+                    parent[child] = node
+                    # Equal f: prefer the deeper node, which open areas are full of
+                    keys[child] = (child_cost + (0 if child == _GOAL else h[child]), -child_cost)
+                    frontier.append(child)
+        else:
+            return None, visited, expansions
+
+        # Refine the abstract route into cells
+        route = [_GOAL]
+        while parent[route[-1]] is not None:
+            route.append(parent[route[-1]])
+        route.reverse()
+        path = [source]
+        for node, following in zip(route, route[1:]):
+            if following == _GOAL:
+                cells, count = self._local_path(node, goal_cells, self._cluster_of(node))
+            elif self._cluster_of(node) != self._cluster_of(following):
+                cells, count = [following], 0
+            else:
+                cells, count = self._local_path(node, {following}, self._cluster_of(node))
+            path.extend(cells)
+            expansions += count
+        return path, visited, expansions
+
+
+# Hierarchies cached per (grid contents, cluster size); bounded by count and by bytes
+hierarchy_cache = LRUCache(maxsize=8, maxbytes=512 << 20, sizeof=lambda hierarchy: hierarchy.nbytes)
+# Cache key of the latest hierarchy built for each (rows, cols, cluster size), the base for partial rebuilds
+_latest = {}
+
+
+def grid_hierarchy(grid, cluster_size=CLUSTER_SIZE):
+    """Return the Hierarchy of grid. On a cache miss, the latest hierarchy
+    built for a grid of the same shape (if still cached) is rebuilt for
+    the new walls, recomputing only the clusters that changed."""
+    key = (grid.fingerprint(), cluster_size)
+    hierarchy = hierarchy_cache.get(key)
+    if hierarchy is None:
+        shape = (grid.rows, grid.cols, cluster_size)
+        base = hierarchy_cache.get(_latest.get(shape))
+        hierarchy = base.rebuilt(grid) if base is not None else Hierarchy(grid, cluster_size)
+        hierarchy_cache.put(key, hierarchy)
+        _latest[shape] = key
+    return hierarchy
@@ -0,0 +1,131 @@
+import numpy as np
+
+from Cache import LRUCache
+from Heuristics import manhattan_table
+
+# Landmarks picked per grid
+NUM_LANDMARKS = 8
+
+
+# ______________________________________________________________________________
+# ALT (A*, landmarks, triangle inequality) heuristic tables
+class Landmarks:
+    """Step distances from a few landmark cells of a Grid to every cell,
+    one BFS (GridGraph.distances) per landmark. Landmarks are picked
+    farthest-point first: each one is the open cell farthest from all
+    landmarks so far. Cells no landmark reaches yet (another connected
+    area) count as infinitely far; such an area gets the cell farthest
+    from the first of its cells found, unless it is too small to be worth
+    a landmark. The distances are kept as one (landmarks, cells) array of
+    int16, or int32 on maps where a distance may not fit, with -1 for
+    cells a landmark cannot reach."""
+
+    def __init__(self, grid, count=NUM_LANDMARKS):
+        graph = grid.neighbor_table()
+        self.rows, self.cols = grid.rows, grid.cols
+        open_cells = np.flatnonzero(graph.movable)
+        dtype = np.int16 if graph.size < np.iinfo(np.int16).max else np.int32
+        self.landmarks = []
+        rows = []
+        far = np.iinfo(np.int64).max
+        nearest = np.full(graph.size, far, dtype=np.int64)  # distance to the closest landmark so far
+        # Areas smaller than this get no landmark of their own (random maps are full of pockets)
+        smallest = open_cells.size // (4 * count)
+        while len(self.landmarks) < count and open_cells.size:
+            score = nearest[open_cells]
+            best = int(np.argmax(score))
+            if score[best] <= 0:
+                break
+            if score[best] == far:
+                # First landmark of a new area: the cell farthest from the area's first cell
+                first = _large_area_cell(graph, open_cells[score == far], nearest, smallest)
+                if first is None:
+                    continue
+                landmark = int(np.argmax(graph.distances([first])))
+            else:
+                landmark = int(open_cells[best])
+            dist = graph.distances([landmark])
+            self.landmarks.append(landmark)
+            rows.append(dist.astype(dtype))
+            reach = dist.astype(np.int64)
+            reach[dist < 0] = far
+            np.minimum(nearest, reach, out=nearest)
+        self.dist = np.stack(rows) if rows else np.zeros((0, graph.size), dtype=dtype)
+        self.nbytes = self.dist.nbytes
+
+    def table(self, targets):
+        """Flat int32 array of the ALT lower bound on the step distance from
+        every cell to the nearest of targets, (x, y) states: for each
+        landmark L, the distance from d(L, cell) to the nearest d(L, t),
+        which the triangle inequality makes a lower bound on d(cell, t) for
+        every target t. The maximum over landmarks is combined with the
+        Manhattan distance, so the table is never weaker than it. Both are
+        consistent, so the table can replace the Manhattan heuristic
+        anywhere."""
+        h = manhattan_table(self.rows, self.cols, targets).copy()
+        cells = [y * self.cols + x for x, y in targets if 0 <= x < self.cols and 0 <= y < self.rows]
+        for row in self.dist:
+            values = row[cells]
+            values = np.unique(values[values >= 0]).astype(np.int32)
+            if not values.size:
+                continue
+            dist = row.astype(np.int32)
+            position = np.searchsorted(values, dist)
+            below = values[np.maximum(position - 1, 0)]
+            above = values[np.minimum(position, values.size - 1)]
+            bound = np.minimum(np.abs(dist - below), np.abs(above - dist))
+            bound[dist < 0] = 0  # the landmark says nothing about cells it cannot reach
+            np.maximum(h, bound, out=h)
+        return h
+
+
+def _large_area_cell(graph, candidates, nearest, smallest):
+    """The first of candidates (open cells no landmark reaches) whose
+    connected area has at least smallest cells, or None. Areas are sized
+    by a BFS that stops at smallest cells, so each pocket passed over
+    costs its own size rather than a pass over the map; their cells are
+    marked reached (nearest 0) so they are never candidates again."""
+    indptr, indices = graph.indptr, graph.indices
+    for cell in candidates.tolist():
+        if nearest[cell] == 0:
+            continue
+        area, seen = [cell], {cell}
+        for index in area:
+            if len(area) >= smallest:
+                return cell
+            for k in range(indptr[index], indptr[index + 1]):
+                child = indices[k]
+                if child not in seen:
+                    seen.add(child)
+                    area.append(child)
+        if len(area) >= smallest:
+            return cell
+        nearest[area] = 0
+    return None
+
+
+# Landmark distances cached per grid contents; bounded by count and by bytes
+landmark_cache = LRUCache(maxsize=16, maxbytes=512 << 20, sizeof=lambda landmarks: landmarks.nbytes)
+# ALT tables cached per (grid contents, targets)
+alt_cache = LRUCache(maxsize=64, maxbytes=256 << 20, sizeof=lambda table: table.nbytes)
+
+
+def grid_landmarks(grid):
+    """Return the Landmarks of grid, computing them only on a cache miss."""
+    key = grid.fingerprint()
+    landmarks = landmark_cache.get(key)
+    if landmarks is None:
+        landmarks = Landmarks(grid)
+        landmark_cache.put(key, landmarks)
+    return landmarks
+
+
+def alt_table(grid, targets):
+    """Return the ALT heuristic table of grid for targets (see
+    Landmarks.table), cached per (grid contents, target set)."""
+    key = (grid.fingerprint(), tuple(sorted(set(map(tuple, targets)))))
+    table = alt_cache.get(key)
+    if table is None:
+        table = grid_landmarks(grid).table(key[1])
+        alt_cache.put(key, table)
+    return table
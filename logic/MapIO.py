@@ -0,0 +1,282 @@
+import argparse
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from Grid import Grid
+
+# magic, flags, rows, cols, start x, start y, goal count, occupancy offset
+_HEADER = struct.Struct('<4sI I I i i I Q')
+_MAGIC = b'PFM1'
+_PACKED = 1
+# The occupancy section starts on a multiple of this, so it can be mapped and viewed in place
+_ALIGN = 64
+
+
+# ______________________________________________________________________________
+# Testcase text format: [rows, cols] / (x, y) start / goals separated by '|' /
+# one (x, y, w, h) wall rectangle per line; '#' lines are comments
+
+def read_line_data(text: str):
+    data = text.strip('[]()\n')
+    return tuple(map(int, data.split(',')))
+
+
+def _header_line(file, filename, line_number, what):
+    """Read up to the next line that is neither blank nor a comment.
+    Returns (its text, its line number)."""
+    for line in file:
+        line_number += 1
+        clean = line.strip().decode('ascii', 'replace')
+        if clean and not clean.startswith("#"):
+            return clean, line_number
+    raise ValueError("{}: missing the {} line".format(filename, what))
+
+
+def _header_values(text, count, filename, line_number, what):
+    try:
+        values = read_line_data(text)
+    except ValueError:
+        values = ()
+    if len(values) != count:
+        raise ValueError("{}:{}: expected the {} as {} integers, got {!r}".format(filename, line_number, what, count, text))
+    return values
+
+
+def read_header(file, filename='<map>'):
+    """Read the map size, start and goal lines from a text map opened in
+    binary mode. Returns (rows, cols, initial_state, goals, lines read);
+    the file is left at the first wall line."""
+    text, line_number = _header_line(file, filename, 0, 'map size')
+    rows, cols = _header_values(text, 2, filename, line_number, 'map size')
+    text, line_number = _header_line(file, filename, line_number, 'start')
+    initial_state = _header_values(text, 2, filename, line_number, 'start')
+    text, line_number = _header_line(file, filename, line_number, 'goals')
+    goals = [_header_values(goal.strip(), 2, filename, line_number, 'goal') for goal in text.split('|')]
+    return rows, cols, initial_state, goals, line_number
+
+
+# Bytes read per block when streaming wall lines
+_BLOCK_SIZE = 1 << 24
+# Most parsed walls load_text_map holds before rasterizing them (32 bytes each)
+_RASTER_BATCH = 1 << 22
+# Wall line separators, all read as spaces
+_SEPARATORS = bytes.maketrans(b',()[]\t\r', b'       ')
+# What may be left of a wall line once separators are spaces
+_NUMBER_CHARS = b'0123456789- \n'
+
+
+def _wall_line_error(block, filename, first_line):
+    """Find the first malformed wall line of block and raise a ValueError
+    naming it; the slow, line by line path of _parse_walls."""
+    for number, line in enumerate(block.split(b'\n'), first_line):
+        clean = line.strip()
+        if not clean or clean.startswith(b'#'):
+            continue
+        text = clean.decode('ascii', 'replace')
+        try:
+            values = [int(token) for token in clean.translate(_SEPARATORS).split()]
+        except ValueError:
+            raise ValueError("{}:{}: expected a wall as 4 integers (x, y, w, h), got {!r}".format(filename, number, text)) from None
+        if len(values) != 4:
+            raise ValueError("{}:{}: expected a wall as 4 integers (x, y, w, h), got {!r}".format(filename, number, text))
+    raise ValueError("{}:{}: malformed wall lines".format(filename, first_line))
+
+
+def _parse_walls(block, filename, first_line):
+    """Parse a block of whole wall lines (bytes) into an (n, 4) int64 array
+    of (x, y, w, h) rows, with no Python loop over lines or numbers:
+    commas, brackets and whitespace become spaces (bytes.translate) and
+    np.fromstring reads all the numbers at once. NumPy also checks that
+    every line holds 4 or no numbers; blank and '#' lines are skipped.
+    On any problem the block is re-read line by line to raise a ValueError
+    with the line number, counted from first_line."""
+    if b'#' in block:
+        # Blank out comment lines (rare in large files), keeping the line count
+        block = b'\n'.join(b'' if line.lstrip().startswith(b'#') else line for line in block.split(b'\n'))
+    text = block.translate(_SEPARATORS)
+    if not text.strip():
+        return np.zeros((0, 4), dtype=np.int64)
+    if text.translate(None, _NUMBER_CHARS):
+        _wall_line_error(block, filename, first_line)
+    chars = np.frombuffer(text, dtype=np.uint8)
+    digit = (chars - ord('0')) < 10
+    # A '-' must start a number: digit after it, space or line start before it
+    minus = np.flatnonzero(chars == ord('-'))
+    if minus.size:
+        after = np.minimum(minus + 1, chars.size - 1)
+        before = np.maximum(minus - 1, 0)
+        if not (digit[after] & (minus + 1 < chars.size) & ((minus == 0) | (chars[before] <= ord(' ')))).all():
+            _wall_line_error(block, filename, first_line)
+    starts = digit.copy()
+    starts[1:] &= ~digit[:-1]
+    line_starts = np.flatnonzero(chars == ord('\n')) + 1
+    line_starts = np.insert(line_starts[line_starts < chars.size], 0, 0)
+    counts = np.add.reduceat(starts, line_starts, dtype=np.int32)
+    if ((counts != 0) & (counts != 4)).any():
+        _wall_line_error(block, filename, first_line)
+    return np.fromstring(text, dtype=np.int64, sep=' ').reshape(-1, 4)
+
+
+def iter_wall_blocks(file, filename='<map>', first_line=1, block_size=_BLOCK_SIZE):
+    """Yield the wall rectangles of a text map opened in binary mode (and
+    positioned after its header, see read_header) as (n, 4) int64 arrays,
+    one per block of about block_size bytes, so files with millions of
+    walls are never held in memory at once. first_line is the line number
+    of the current file position."""
+    rest = b''
+    while True:
+        chunk = file.read(block_size)
+        block = rest + chunk
+        if chunk:
+            cut = block.rfind(b'\n') + 1
+            block, rest = block[:cut], block[cut:]
+        if block:
+            yield _parse_walls(block, filename, first_line)
+            first_line += block.count(b'\n')
+        if not chunk:
+            return
+
+
+def parse_file(filename):
+    """Parse the input file to create a grid and initial/goal states."""
+    with open(filename, 'rb') as file:
+        rows, cols, initial_state, goals, line_number = read_header(file, filename)
+        walls = [tuple(wall) for block in iter_wall_blocks(file, filename, line_number + 1) for wall in block.tolist()]
+
+        return {
+            'map_size': (rows, cols),
+            'rows': rows,
+            'cols': cols,
+            'initial_state': initial_state,
+            'goals': goals,
+            'walls': walls
+        }
+
+
+def load_text_map(filename, block_size=_BLOCK_SIZE):
+    """Stream a text map straight into a Grid: parsed blocks of wall lines
+    are handed to the rasterizer (Grid.create_walls) in batches of up to
+    _RASTER_BATCH walls, since each call makes a pass over the whole map.
+    Returns the dict of load_binary_map ('walls' is empty, 'wall_count'
+    says how many were drawn)."""
+    with open(filename, 'rb') as file:
+        rows, cols, initial_state, goals, line_number = read_header(file, filename)
+        grid = Grid(rows, cols)
+        wall_count = 0
+        pending = []
+        for walls in iter_wall_blocks(file, filename, line_number + 1, block_size):
+            pending.append(walls)
+            wall_count += len(walls)
+            if sum(map(len, pending)) >= _RASTER_BATCH:
+                grid.create_walls(np.concatenate(pending))
+                pending = []
+        if pending:
+            grid.create_walls(np.concatenate(pending))
+    return {
+        'map_size': (rows, cols),
+        'rows': rows,
+        'cols': cols,
+        'initial_state': initial_state,
+        'goals': goals,
+        'walls': [],
+        'wall_count': wall_count,
+        'grid': grid,
+    }
+
+
+# ______________________________________________________________________________
+# Binary map format, for maps too large to rasterize from text on every load
+
+def write_binary_map(filename, grid, initial_state, goals, packed=False):
+    """Write grid, the start and the goals to filename, all little-endian:
+
+        header     '4sI I I i i I Q': b'PFM1', flags (1 bit-packed),
+                   rows, cols, start x, start y, goal count, occupancy offset
+        goals      int32[goal count, 2] (x, y) pairs
+        padding    zero bytes up to the occupancy offset (a multiple of 64)
+        occupancy  rows * cols bytes, row-major, 1 for walls; or, with flag
+                   1, the same cells packed 8 per byte (np.packbits,
+                   little bit order)
+
+    Unpacked maps load without copying (see load_binary_map); packed ones
+    are 8 times smaller on disk but are unpacked into memory on load."""
+    goals = np.asarray(goals, dtype='<i4').reshape(-1, 2)
+    offset = -(-(_HEADER.size + goals.nbytes) // _ALIGN) * _ALIGN
+    x, y = initial_state
+    cells = grid.grid.reshape(-1)
+    occupancy = np.packbits(cells, bitorder='little') if packed else cells
+    with open(filename, 'wb') as file:
+        file.write(_HEADER.pack(_MAGIC, _PACKED if packed else 0, grid.rows, grid.cols, x, y, len(goals), offset))
+        file.write(goals.tobytes())
+        file.write(bytes(offset - _HEADER.size - goals.nbytes))
+        file.write(occupancy.tobytes())
+
+
+def load_binary_map(filename):
+    """Load a map written by write_binary_map. Returns the dict of
+    parse_file with the rectangle list replaced by the ready 'grid'
+    ('walls' is empty). The cells of an unpacked map are a copy-on-write
+    memory map of the file: they are read once, to check that every byte
+    is 0 or 1, and not copied, and wall changes stay private to this
+    process. Raises ValueError for files that are not binary maps, are cut
+    short, or hold other occupancy bytes."""
+    with open(filename, 'rb') as file:
+        if os.fstat(file.fileno()).st_size < _HEADER.size:
+            raise ValueError("{}: not a binary map (file too short)".format(filename))
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+    magic, flags, rows, cols, x, y, goal_count, offset = _HEADER.unpack_from(buffer)
+    if magic != _MAGIC:
+        raise ValueError("{}: not a binary map (bad magic {!r})".format(filename, magic))
+    size = rows * cols
+    length = -(-size // 8) if flags & _PACKED else size
+    if offset < _HEADER.size + 8 * goal_count or len(buffer) < offset + length:
+        raise ValueError("{}: truncated binary map ({} bytes, {} expected)".format(filename, len(buffer), offset + length))
+    goals = np.frombuffer(buffer, dtype='<i4', count=2 * goal_count, offset=_HEADER.size).reshape(-1, 2)
+    if flags & _PACKED:
+        cells = np.unpackbits(np.frombuffer(buffer, dtype=np.uint8, count=length, offset=offset),
+                              count=size, bitorder='little')
+        cells = bytearray(cells.tobytes())
+    else:
+        # Searchers take only 1 for a wall, np.packbits (write_binary_map) any nonzero byte
+        occupancy = np.frombuffer(buffer, dtype=np.uint8, count=size, offset=offset)
+        if size and occupancy.max() > 1:
+            cell = int(np.argmax(occupancy > 1))
+            raise ValueError("{}: occupancy byte {} at cell {} is not 0 or 1".format(filename, occupancy[cell], cell))
+        cells = memoryview(buffer)[offset:offset + size]
+    return {
+        'map_size': (rows, cols),
+        'rows': rows,
+        'cols': cols,
+        'initial_state': (x, y),
+        'goals': [tuple(goal) for goal in goals.tolist()],
+        'walls': [],
+        'grid': Grid(rows, cols, cells),
+    }
+
+
+def is_binary_map(filename):
+    """True if filename starts with the binary map magic."""
+    with open(filename, 'rb') as file:
+        return file.read(len(_MAGIC)) == _MAGIC
+
+
+def convert_text_map(source, destination, packed=False):
+    """Convert a Testcase text map to the binary format. Returns the loaded
+    text map (see load_text_map)."""
+    data = load_text_map(source)
+    write_binary_map(destination, data['grid'], data['initial_state'], data['goals'], packed)
+    return data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a Testcase text map to the binary map format.")
+    parser.add_argument('source', help="text map (e.g. Testcase/test1.txt)")
+    parser.add_argument('destination', help="binary map to write")
+    parser.add_argument('--packed', action='store_true',
+                        help="store 8 cells per byte (smaller, but loading unpacks instead of mapping the file)")
+    args = parser.parse_args()
+    data = convert_text_map(args.source, args.destination, args.packed)
+    print("Wrote {} ({} x {}, {} walls)".format(args.destination, data['rows'], data['cols'], data['wall_count']))
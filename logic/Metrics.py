@@ -0,0 +1,111 @@
+from bisect import bisect_left
+from threading import Lock
+
+# Bucket upper bounds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = tuple(16 * 4 ** i for i in range(11))            # 16 .. 16M cells / frontier entries
+RATE_BUCKETS = tuple(1000 * 4 ** i for i in range(8))           # 1k .. 16M expansions per second
+
+
+# ______________________________________________________________________________
+# Minimal Prometheus-style metrics (text exposition format 0.0.4)
+class Histogram:
+    """Cumulative-bucket histogram with one series per label tuple."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels, buckets):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.series = {}  # label values -> [counts per bucket (+Inf last), sum]
+
+    def observe(self, value, *label_values):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self):
+        for label_values, (counts, total) in sorted(self.series.items()):
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                yield '{}_bucket{{{}le="{}"}} {}'.format(self.name, labels + ',' if labels else '', bound, cumulative)
+            yield '{}_sum{{{}}} {}'.format(self.name, labels, total)
+            yield '{}_count{{{}}} {}'.format(self.name, labels, cumulative)
+
+
+class Counter:
+    """Monotonic counter with one series per label tuple."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labels):
+        self.name, self.help, self.labels = name, help, labels
+        self.series = {}
+
+    def inc(self, amount, *label_values):
+        self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def samples(self):
+        for label_values, value in sorted(self.series.items()):
+            yield '{}{{{}}} {}'.format(self.name, _labels(self.labels, label_values), value)
+
+
+def _labels(names, values):
+    return ','.join('{}="{}"'.format(name, value) for name, value in zip(names, values))
+
+
+class SearchMetrics:
+    """Server-side search metrics, updated from the stats each search
+    reports (see search.solve_safely) and rendered for /metrics. Updates
+    come from the event loop thread and searches running in the thread
+    pool, so they are serialized by a lock."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.latency = Histogram('search_latency_seconds', 'Wall time of one search.', ('algorithm',), LATENCY_BUCKETS)
+        self.rate = Histogram('search_expansions_per_second', 'Node expansions per second of one search.', ('algorithm',), RATE_BUCKETS)
+        self.frontier = Histogram('search_frontier_peak', 'Largest frontier size reached by one search (grid searchers only).', ('algorithm',), SIZE_BUCKETS)
+        self.cells = Histogram('search_request_cells', 'Grid size (rows * cols) of each search query.', ('algorithm',), SIZE_BUCKETS)
+        self.searches = Counter('search_searches_total', 'Searches run, by outcome (found, not_found, error, timeout).', ('algorithm', 'outcome'))
+        self.expansions = Counter('search_expansions_total', 'Nodes expanded by searches.', ('algorithm',))
+        self.queries = Counter('search_queries_total', 'Search queries received, by whether the result cache answered them.', ('algorithm', 'cached'))
+        self.metrics = (self.latency, self.rate, self.frontier, self.cells, self.searches, self.expansions, self.queries)
+
+    def observe_query(self, algorithm, cells, cached):
+        with self.lock:
+            self.cells.observe(cells, algorithm)
+            self.queries.inc(1, algorithm, 'true' if cached else 'false')
+
+    def observe_search(self, stats):
+        """Record one search from its stats dict (algorithm, outcome, and,
+        unless it timed out, seconds, expansions and frontier_peak)."""
+        algorithm = stats['algorithm']
+        with self.lock:
+            self.searches.inc(1, algorithm, stats['outcome'])
+            seconds = stats.get('seconds')
+            if seconds is None:
+                return
+            self.latency.observe(seconds, algorithm)
+            self.expansions.inc(stats['expansions'], algorithm)
+            if seconds > 0:
+                self.rate.observe(stats['expansions'] / seconds, algorithm)
+            if stats.get('frontier_peak') is not None:
+                self.frontier.observe(stats['frontier_peak'], algorithm)
+
+    def render(self, extra=()):
+        """Text exposition of every metric, followed by the single values in
+        extra, given as (name, type, help, value)."""
+        lines = []
+        with self.lock:
+            for metric in self.metrics:
+                lines.append('# HELP {} {}'.format(metric.name, metric.help))
+                lines.append('# TYPE {} {}'.format(metric.name, metric.kind))
+                lines.extend(metric.samples())
+        for name, kind, help, value in extra:
+            lines.append('# HELP {} {}'.format(name, help))
+            lines.append('# TYPE {} {}'.format(name, kind))
+            lines.append('{} {}'.format(name, value))
+        return '\n'.join(lines) + '\n'
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class Node:
     """A node in a search tree. Contains a pointer to the parent (the node
     that this is a successor of) and to the actual state for this node. Note
@@ -8,6 +11,9 @@ class Node:
     an explanation of how the f and h values are handled. You will not need to
     subclass this class."""
 
+    # f, h and f_back are the slots memoize() caches the search functions' values in
+    __slots__ = ('state', 'parent', 'action', 'path_cost', 'depth', 'f', 'h', 'f_back')
+
     def __init__(self, state, parent=None, action=None, path_cost=0):
         """Create a search tree Node, derived from a parent by an action."""
         self.state = state
@@ -60,4 +66,25 @@ class Node:
         # stored in the node instead of the node
         # object itself to quickly search a node
         # with the same state in a Hash Table
-        return hash(self.state)
\ No newline at end of file
+        return hash(self.state)
+
+
+# ______________________________________________________________________________
+# Flat search records for grid searches (one slot per cell index)
+class SearchRecords:
+    """Struct-of-arrays replacement for Node objects when states are the cell
+    indices of a CompiledGridProblem. parent[i] is the index i was reached
+    from (-1 for the root and unreached cells), g[i] its path cost and f[i]
+    its priority key; closed[i] is 1 once i has been expanded. Nothing is
+    allocated per generated child; the path is rebuilt from parent links
+    once the search ends (CompiledGridProblem.solution_node). g and f are
+    only allocated when costs=True. The fields are memoryviews over NumPy
+    arrays, so element access from Python returns plain ints."""
+
+    __slots__ = ('parent', 'g', 'f', 'closed')
+
+    def __init__(self, size, costs=False):
+        self.parent = memoryview(np.full(size, -1, dtype=np.int32))
+        self.g = memoryview(np.full(size, -1, dtype=np.int32)) if costs else None
+        self.f = memoryview(np.zeros(size, dtype=np.int64)) if costs else None
+        self.closed = bytearray(size)
@@ -44,6 +44,12 @@ class Problem:
         and action. The default method costs 1 for every step in the path."""
         return c + 1
 
+    def visit_log(self):
+        """Return the list a search appends the states it visits to. A
+        subclass may hand out a list that also watches the search (see
+        GridRobotProblem.visit_log)."""
+        return []
+
     def value(self, state):
         """For optimization problems, each state has a value. Hill Climbing
         and related algorithms try to maximize this value."""
@@ -1,4 +1,8 @@
 from Problem import Problem
+from Node import Node
+from Heuristics import manhattan_table
+from Landmarks import alt_table
+from Streaming import DeadlineLog
 
 # ______________________________________________________________________________
 # Define the Grid Robot Problem (for the Robot navigation)
@@ -7,6 +11,8 @@ class GridRobotProblem(Problem):
         """Initialize the grid problem with initial state, goal state and grid."""
         super().__init__(initial, goal)
         self.grid = grid
+        self.visit_sink = None  # optional VisitStream the grid searchers write visited cells to
+        self.deadline = None  # optional time.time() past which searches give up (see visit_log)
 
     def actions(self, state):
         actions = []
@@ -43,4 +49,97 @@ class GridRobotProblem(Problem):
         if isinstance(self.goal, list):
             return state in self.goal
         else:
-            return state == self.goal
\ No newline at end of file
+            return state == self.goal
+
+    def visit_log(self):
+        """The list a search appends visited states (or cell indices) to: a
+        Streaming.DeadlineLog that stops the search once deadline has
+        passed, or a plain list when the problem has no deadline."""
+        return [] if self.deadline is None else DeadlineLog(self.deadline)
+
+    def compile(self):
+        """Return the CompiledGridProblem for this problem (built once and cached),
+        or None when the initial state lies outside the grid."""
+        compiled = getattr(self, '_compiled', None)
+        if compiled is None or compiled.graph is not self.grid.neighbor_table():
+            if not (0 <= self.initial[0] < self.grid.cols and 0 <= self.initial[1] < self.grid.rows):
+                return None
+            compiled = self._compiled = CompiledGridProblem(self)
+        return compiled
+
+
+# ______________________________________________________________________________
+# Integer-encoded form of GridRobotProblem used by the grid searchers
+class CompiledGridProblem:
+    """A GridRobotProblem whose states are flat cell indices (y * cols + x) and
+    whose successors come from the grid's precomputed CSR neighbor table.
+    Searchers work on indices only; solution_node and decode_all turn them
+    back into the (x, y) tuples and Node chain of the public API."""
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.graph = graph = problem.grid.neighbor_table()
+        self.rows, self.cols, self.size = graph.rows, graph.cols, graph.size
+        self.indptr, self.indices = graph.indptr, graph.indices
+        self.initial = graph.encode(problem.initial)
+        self.goal_states = problem.goal if isinstance(problem.goal, list) else [problem.goal]
+        self.goals = [graph.encode(goal) for goal in self.goal_states if graph.contains(goal)]
+        self.goal_set = set(self.goals)
+        self.frontier_peak = None  # largest frontier of the last search, set by the grid searchers
+        self.side_expansions = None  # (forward, backward) expansions of the last bidirectional search
+
+    def decode(self, index):
+        y, x = divmod(index, self.cols)
+        return (x, y)
+
+    def decode_all(self, indices):
+        """Turn a list of cell indices into a list of (x, y) states."""
+        cols = self.cols
+        return [(i % cols, i // cols) for i in indices]
+
+    def visit_log(self):
+        """The list a searcher appends visited cell indices to: the problem's
+        visit_sink when one is attached (see Streaming.VisitStream), else a
+        fresh list (see GridRobotProblem.visit_log)."""
+        sink = self.problem.visit_sink
+        return self.problem.visit_log() if sink is None else sink
+
+    def tie_break(self, index):
+        """Rank of the state in (x, y) tuple order, so priority queues of indices
+        break ties exactly as queues of Nodes do."""
+        y, x = divmod(index, self.cols)
+        return x * self.rows + y
+
+    def heuristic_table(self, backward=False):
+        """Manhattan distance to the closest goal (to the initial state if
+        backward) for every cell, as a table read by state index. The table
+        is shared per (grid size, targets) through Heuristics.manhattan_table."""
+        targets = [self.problem.initial] if backward else self.goal_states
+        return memoryview(manhattan_table(self.rows, self.cols, targets))
+
+    def alt_table(self, backward=False):
+        """Like heuristic_table, with the ALT landmark bound (see
+        Landmarks.Landmarks.table), cached per grid and targets."""
+        targets = [self.problem.initial] if backward else self.goal_states
+        return memoryview(alt_table(self.problem.grid, targets))
+
+    def path(self, parent, index):
+        """Follow parent links (parent[root] == -1) back from index; return the
+        cell indices from the root to index."""
+        path = []
+        while index != -1:
+            path.append(index)
+            index = parent[index]
+        path.reverse()
+        return path
+
+    def solution_node(self, parent, index):
+        """Rebuild the Node chain ending at index from the parent links."""
+        return self.node_from_path(self.path(parent, index))
+
+    def node_from_path(self, path):
+        """Build the Node chain (states, actions and unit path costs) for a list of cell indices."""
+        node = Node(self.decode(path[0]))
+        for previous, index in zip(path, path[1:]):
+            node = Node(self.decode(index), node, self.graph.action(previous, index), node.path_cost + 1)
+        return node
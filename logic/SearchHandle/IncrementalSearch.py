@@ -0,0 +1,215 @@
+from utils import IndexedPriorityQueue
+from Node import Node
+from SearchHandle.InformedSearch import astar_search
+
+import numpy as np
+
+# g / rhs of cells with no known path to a goal
+INFINITY = 1 << 30
+
+
+# ______________________________________________________________________________
+# D* Lite (incremental replanning on a changing grid)
+
+class DStarLite:
+    """D* Lite planner for a GridRobotProblem (Koenig & Likhachev 2002, the
+    basic version). The search runs backwards from the goals: g[i] is the
+    step distance from cell i to the nearest goal as far as the last plan
+    established, rhs[i] the one-step lookahead min(1 + g[j]) over the open
+    neighbors j of i (0 for open goals; walls other than the start, which
+    may be left like in the other searchers, are never reached and keep
+    rhs infinite). Cells where the two differ are queued
+    with key (min(g, rhs) + h(start, i) + km, min(g, rhs)), h being the
+    Manhattan distance to the current start.
+
+    The planner keeps g, rhs and its queue between calls. After walls
+    change, update_cells (or sync) re-evaluates only the cells next to the
+    changed ones, and the next plan() repairs the search from there, so the
+    work grows with the size of the change, not of the map. move_start
+    moves the start (e.g. a robot that has taken some steps) without
+    losing that state; km keeps the queued keys valid. The planner reads
+    walls from its own snapshot of the grid, updated by update_cells and
+    sync, so it never sees a change it has not been told about."""
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.grid = grid = problem.grid
+        self.rows, self.cols, self.size = grid.rows, grid.cols, grid.rows * grid.cols
+        self.blocked = bytearray(grid.cells)
+        goals = problem.goal if isinstance(problem.goal, list) else [problem.goal]
+        self.goal_states = set(map(tuple, goals))
+        self.goal_set = {y * self.cols + x for x, y in self.goal_states if 0 <= x < self.cols and 0 <= y < self.rows}
+        self.start = self.last = self.encode(problem.initial)
+        self.km = 0
+        self.g = memoryview(np.full(self.size, INFINITY, dtype=np.int32))
+        self.rhs = memoryview(np.full(self.size, INFINITY, dtype=np.int32))
+        self.keys = {}
+        self.queue = IndexedPriorityQueue('min', self.keys.__getitem__)
+        for goal in self.goal_set:
+            if self.blocked[goal] != 1:
+                self.rhs[goal] = 0
+                self._push(goal)
+
+    def encode(self, state):
+        x, y = state
+        return y * self.cols + x
+
+    def decode(self, index):
+        y, x = divmod(index, self.cols)
+        return (x, y)
+
+    def action(self, index, next_index):
+        """Return the action that moves from index to the neighboring next_index."""
+        delta = next_index - index
+        if delta == -self.cols:
+            return 'UP'
+        elif delta == self.cols:
+            return 'DOWN'
+        elif delta == -1:
+            return 'LEFT'
+        return 'RIGHT'
+
+    def _neighbors(self, index):
+        """Cells next to index inside the grid, in UP, DOWN, LEFT, RIGHT order."""
+        y, x = divmod(index, self.cols)
+        if y > 0:
+            yield index - self.cols
+        if y < self.rows - 1:
+            yield index + self.cols
+        if x > 0:
+            yield index - 1
+        if x < self.cols - 1:
+            yield index + 1
+
+    def _heuristic(self, index):
+        sy, sx = divmod(self.start, self.cols)
+        y, x = divmod(index, self.cols)
+        return abs(x - sx) + abs(y - sy)
+
+    def _key(self, index):
+        best = min(self.g[index], self.rhs[index])
+        return (best + self._heuristic(index) + self.km, best)
+
+    def _push(self, index):
+        self.keys[index] = self._key(index)
+        self.queue.append(index)
+
+    def _update_vertex(self, index):
+        """Recompute rhs[index] from its open neighbors and (de)queue it
+        depending on whether it is now consistent."""
+        if index in self.goal_set and self.blocked[index] != 1:
+            self.rhs[index] = 0
+        elif self.blocked[index] == 1 and index != self.start:
+            # Only the start may stand on a wall (and leave it); other walls are never reached
+            self.rhs[index] = INFINITY
+        else:
+            g, blocked = self.g, self.blocked
+            best = INFINITY
+            for child in self._neighbors(index):
+                if blocked[child] != 1 and g[child] + 1 < best:
+                    best = g[child] + 1
+            self.rhs[index] = best
+        if index in self.queue:
+            del self.queue[index]
+        if self.g[index] != self.rhs[index]:
+            self._push(index)
+
+    def compute_shortest_path(self, visited_nodes):
+        """Process queued cells until the start is consistent and no queued
+        key is below its key. Returns the number of cells expanded, each
+        appended to visited_nodes before it leaves the queue, so a log that
+        raises (Streaming.DeadlineLog) leaves the planner consistent."""
+        g, rhs, queue, keys, blocked = self.g, self.rhs, self.queue, self.keys, self.blocked
+        start = self.start
+        expansions = 0
+        while queue and (queue.peek()[0] < self._key(start) or rhs[start] != g[start]):
+            old_key, index = queue.peek()
+            new_key = self._key(index)
+            if old_key < new_key:
+                keys[index] = new_key
+                queue.append(index)
+                continue
+            visited_nodes.append(index)
+            queue.pop()
+            expansions += 1
+            # Cells that can step onto index: its neighbors, unless index is a wall
+            predecessors = () if blocked[index] == 1 else list(self._neighbors(index))
+            if g[index] > rhs[index]:
+                g[index] = rhs[index]
+                for neighbor in predecessors:
+                    self._update_vertex(neighbor)
+            else:
+                g[index] = INFINITY
+                for neighbor in predecessors:
+                    self._update_vertex(neighbor)
+                self._update_vertex(index)
+        return expansions
+
+    def move_start(self, state):
+        """Move the start to state (x, y), keeping the search state."""
+        self.last, self.start = self.start, self.encode(state)
+        self.km += self._heuristic(self.last)
+        # A wall can be left only while it is the start
+        for index in (self.last, self.start):
+            if self.blocked[index] == 1:
+                self._update_vertex(index)
+
+    def update_cells(self, cells):
+        """Take over the current wall state of the given (x, y) cells from
+        the grid and re-evaluate the cells whose distances may depend on
+        them. Returns the number of cells that actually changed."""
+        changed = []
+        for x, y in cells:
+            if 0 <= x < self.cols and 0 <= y < self.rows:
+                index = y * self.cols + x
+                if self.blocked[index] != self.grid.cells[index]:
+                    self.blocked[index] = self.grid.cells[index]
+                    changed.append(index)
+        for index in changed:
+            # Entering index became possible or impossible: its neighbors' lookahead changes
+            for neighbor in self._neighbors(index):
+                self._update_vertex(neighbor)
+            self._update_vertex(index)
+        return len(changed)
+
+    def sync(self):
+        """update_cells for every cell where the grid differs from the
+        planner's snapshot (one array comparison over the map)."""
+        changed = np.flatnonzero(np.frombuffer(self.blocked, dtype=np.uint8) != self.grid.grid.reshape(-1))
+        return self.update_cells(self.decode(index) for index in changed.tolist())
+
+    def plan(self, visited_nodes=None):
+        """Bring the search up to date and return (node, total_nodes,
+        visited_nodes) like the other searchers, for the current start.
+        The path follows the cheapest neighbor (UP, DOWN, LEFT, RIGHT on
+        ties) from the start; total_nodes and visited_nodes cover the cells
+        expanded by this call only. Expanded cell indices are logged into
+        visited_nodes if given (see GridRobotProblem.visit_log)."""
+        initial = self.decode(self.start)
+        if initial in self.goal_states:
+            return Node(initial), 1, [initial]
+        if visited_nodes is None:
+            visited_nodes = []
+        expansions = self.compute_shortest_path(visited_nodes)
+        visited_nodes = [self.decode(index) for index in visited_nodes]
+        g, blocked = self.g, self.blocked
+        if self.rhs[self.start] >= INFINITY:
+            return None, expansions, visited_nodes
+        node = Node(initial)
+        index = self.start
+        while index not in self.goal_set:
+            following = min((child for child in self._neighbors(index) if blocked[child] != 1), key=g.__getitem__)
+            node = Node(self.decode(following), node, self.action(index, following), node.path_cost + 1)
+            index = following
+        return node, expansions, visited_nodes
+
+
+def dstar_lite_search(problem):
+    """One D* Lite plan from scratch (see DStarLite); a planner kept across
+    wall changes is what makes it incremental. Non-grid problems and starts
+    off the grid fall back to astar_search."""
+    grid = getattr(problem, 'grid', None)
+    x, y = problem.initial
+    if grid is None or not (0 <= x < grid.cols and 0 <= y < grid.rows):
+        return astar_search(problem)
+    return DStarLite(problem).plan(problem.visit_log())
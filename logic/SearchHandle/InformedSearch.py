@@ -1,23 +1,30 @@
-from utils import memoize, manhattan_distance, PriorityQueue
-from Node import Node
+from utils import memoize, manhattan_distance, IndexedPriorityQueue
+from Node import Node, SearchRecords
+from Hierarchy import CLUSTER_SIZE, grid_hierarchy
+from Landmarks import alt_table
+from Cache import LRUCache
+
+import numpy as np
 
 # ______________________________________________________________________________
 # Informed (Heuristic) Search
-def best_first_graph_search(problem, f, display=False):
+def best_first_graph_search(problem, f, display=False, queue=IndexedPriorityQueue):
     """Search the nodes with the lowest f scores first.
     You specify the function f(node) that you want to minimize; for example,
     if f is a heuristic estimate to the goal, then we have greedy best
     first search; if f is node.depth then we have breadth-first search.
     There is a subtlety: the line "f = memoize(f, 'f')" means that the f
     values will be cached on the nodes as they are computed. So after doing
-    a best first search you can examine the f values of the path returned."""
+    a best first search you can examine the f values of the path returned.
+    The frontier is an IndexedPriorityQueue by default; pass
+    queue=LazyPriorityQueue to compare against lazy deletion."""
     f = memoize(f, 'f')
     node = Node(problem.initial)
-    frontier = PriorityQueue('min', f)
+    frontier = queue('min', f)
     frontier.append(node)
     explored = set()
     #  Keep track of visited nodes for display purposes
-    visited_nodes = []
+    visited_nodes = problem.visit_log()
     total_nodes_visited = 0
     while frontier:
         node = frontier.pop()
@@ -26,7 +33,7 @@ def best_first_graph_search(problem, f, display=False):
         # check the goal test
         if problem.goal_test(node.state):
             if display:
-                print(len(explored), "paths have been expanded and", len(frontier), "paths remain in the frontier")
+                print(total_nodes_visited - 1, "paths have been expanded and", len(frontier), "paths remain in the frontier")
             return node, total_nodes_visited, visited_nodes
         explored.add(node.state)
         for child in node.expand(problem):
@@ -39,6 +46,50 @@ def best_first_graph_search(problem, f, display=False):
     return None, total_nodes_visited, visited_nodes
 
 
+def best_first_grid_search(problem, h, g_weight=1, display=False, queue=IndexedPriorityQueue):
+    """best_first_graph_search over the cell indices of a CompiledGridProblem,
+    with f(i) = g_weight * g(i) + h[i] (g_weight=0 gives greedy best-first,
+    1 gives A*); h is a heuristic table indexed by state. Priorities are packed into one int, f * size + tie_break(i),
+    so ties are broken in the same (x, y) order as a queue of Nodes."""
+    indptr, indices, goals = problem.indptr, problem.indices, problem.goal_set
+    size, tie_break = problem.size, problem.tie_break
+    initial = problem.initial
+    records = SearchRecords(size, costs=True)
+    parent, g, keys, explored = records.parent, records.g, records.f, records.closed
+    g[initial] = 0
+    keys[initial] = h[initial] * size + tie_break(initial)
+    frontier = queue('min', keys.__getitem__)
+    frontier.append(initial)
+    visited_nodes = problem.visit_log()
+    total_nodes_visited = 0
+    frontier_peak = 0
+    while frontier:
+        if len(frontier) > frontier_peak:
+            frontier_peak = len(frontier)
+        index = frontier.pop()
+        total_nodes_visited += 1
+        visited_nodes.append(index)
+        if index in goals:
+            if display:
+                print(total_nodes_visited - 1, "paths have been expanded and", len(frontier), "paths remain in the frontier")
+            problem.frontier_peak = frontier_peak
+            return problem.solution_node(parent, index), total_nodes_visited, problem.decode_all(visited_nodes)
+        explored[index] = 1
+        child_cost = g[index] + 1
+        for k in range(indptr[index], indptr[index + 1]):
+            child = indices[k]
+            if explored[child]:
+                continue
+            key = (g_weight * child_cost + h[child]) * size + tie_break(child)
+            if child not in frontier or key < frontier[child]:
+                g[child] = child_cost
+                parent[child] = index
+                keys[child] = key
+                frontier.append(child)
+    problem.frontier_peak = frontier_peak
+    return None, total_nodes_visited, problem.decode_all(visited_nodes)
+
+
 def robot_manhattan_heuristic(node, problem, backtrack=False):
     if backtrack:
         return manhattan_distance(node.state, problem.initial)
@@ -46,11 +97,27 @@ def robot_manhattan_heuristic(node, problem, backtrack=False):
         return min(manhattan_distance(node.state, goal) for goal in problem.goal)
 
 
+def alt_heuristic(node, problem, backtrack=False):
+    """ALT heuristic: the landmark lower bound on the distance to the
+    closest goal (to the initial state if backtrack), never below the
+    Manhattan distance; see Landmarks. Pass it as h to astar_search or
+    bidirectional_astar_search; grid searches then read the whole table."""
+    if backtrack:
+        targets = [problem.initial]
+    else:
+        targets = problem.goal if isinstance(problem.goal, list) else [problem.goal]
+    x, y = node.state
+    return int(alt_table(problem.grid, targets)[y * problem.grid.cols + x])
+
+
 # Greedy best-first search is accomplished by specifying f(n) = h(n).
 def greedy_best_first_graph_search(problem, h = robot_manhattan_heuristic, display=False):
     """Greedy best-first graph search is best_first_graph_search with f(n) = h(n).
     You need to specify the h function when you call greedy_best_first_graph_search,
     or else in your Problem subclass."""
+    compiled = problem.compile() if hasattr(problem, 'compile') else None
+    if compiled is not None and h is robot_manhattan_heuristic:
+        return best_first_grid_search(compiled, compiled.heuristic_table(), 0, display)
     return  best_first_graph_search(problem, lambda n: h(n, problem), display)
 
 
@@ -60,122 +127,492 @@ def astar_search(problem, h = robot_manhattan_heuristic, display=False):
     """A* search is best-first graph search with f(n) = g(n)+h(n).
     You need to specify the h function when you call astar_search, or
     else in your Problem subclass."""
+    compiled = problem.compile() if hasattr(problem, 'compile') else None
+    if compiled is not None and h is robot_manhattan_heuristic:
+        return best_first_grid_search(compiled, compiled.heuristic_table(), 1, display)
+    if compiled is not None and h is alt_heuristic:
+        return best_first_grid_search(compiled, compiled.alt_table(), 1, display)
     h = memoize(h or problem.h, 'h')
     return best_first_graph_search(problem, lambda n: n.path_cost + h(n, problem), display)
 
+# ______________________________________________________________________________
+# Iterative deepening A* (IDA*)
+
+def iterative_deepening_astar_search(problem, h = robot_manhattan_heuristic, table_size=1 << 20):
+    """Depth-first search bounded by f(n) = g(n) + h(n), repeated with the
+    bound raised to the smallest f that exceeded it, until a goal is found.
+    Iterative (an explicit stack, so long corridors cannot overflow the
+    recursion limit), with a transposition table of the best g reached per
+    state, kept across iterations: a state reached again at a higher cost,
+    or at the same cost within one iteration, is not searched again. The
+    table holds at most table_size states; when full, new states are simply
+    not recorded. On grids, a start whose connected component holds no
+    goal is answered by one BFS instead of raising the bound until every
+    path has been tried. total_nodes counts the expansions of every
+    iteration, visited_nodes those of the last one (written to
+    problem.visit_log(), so a deadline stops the search)."""
+    compiled = problem.compile() if hasattr(problem, 'compile') else None
+    if compiled is not None and h is robot_manhattan_heuristic:
+        return ida_star_grid_search(compiled, compiled.heuristic_table(), table_size)
+    if compiled is not None and not goal_reachable(compiled):
+        return None, 0, []
+    h = memoize(h or problem.h, 'h')
+    root = Node(problem.initial)
+    bound = h(root, problem)
+    total_nodes_visited = 0
+    best_g = {root.state: (0, 0)}  # state: (best g, iteration that reached it)
+    iteration = 0
+    while True:
+        visited_nodes = problem.visit_log()
+        visited_nodes.append(root.state)
+        total_nodes_visited += 1
+        if problem.goal_test(root.state):
+            return root, total_nodes_visited, visited_nodes
+        next_bound = float('inf')
+        stack = [(root, iter(root.expand(problem)))]  # path nodes with the children still to try
+        on_path = {root.state}
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                on_path.discard(node.state)
+                continue
+            f = child.path_cost + h(child, problem)
+            if f > bound:
+                next_bound = min(next_bound, f)
+                continue
+            if child.state in on_path:
+                continue
+            best = best_g.get(child.state)
+            if best is not None and (best[0] < child.path_cost or best == (child.path_cost, iteration)):
+                continue
+            if best is not None or len(best_g) < table_size:
+                best_g[child.state] = (child.path_cost, iteration)
+            total_nodes_visited += 1
+            visited_nodes.append(child.state)
+            if problem.goal_test(child.state):
+                return child, total_nodes_visited, visited_nodes
+            stack.append((child, iter(child.expand(problem))))
+            on_path.add(child.state)
+        if next_bound == float('inf'):
+            return None, total_nodes_visited, visited_nodes
+        bound = next_bound
+        iteration += 1
+
+
+def goal_reachable(problem):
+    """True if a goal of the CompiledGridProblem lies in the start's
+    connected component (one BFS over it, see GridGraph.distances)."""
+    dist = problem.graph.distances([problem.initial])
+    return any(dist[goal] >= 0 for goal in problem.goals)
+
+
+def ida_star_grid_search(problem, h, table_size=1 << 20):
+    """iterative_deepening_astar_search on a CompiledGridProblem with the
+    heuristic table h. The current path is kept as parallel lists of cell
+    indices and next-edge positions in the CSR table, with a bitmap of the
+    cells on it."""
+    indptr, indices, goals = problem.indptr, problem.indices, problem.goal_set
+    initial = problem.initial
+    if initial not in goals and not goal_reachable(problem):
+        return None, 0, []
+    on_path = bytearray(problem.size)
+    bound = h[initial]
+    total_nodes_visited = 0
+    best_g = {initial: (0, 0)}  # cell: (best g, iteration that reached it)
+    iteration = 0
+    while True:
+        visited_nodes = problem.visit_log()
+        visited_nodes.append(initial)
+        total_nodes_visited += 1
+        if initial in goals:
+            return problem.node_from_path([initial]), total_nodes_visited, problem.decode_all(visited_nodes)
+        next_bound = None
+        path, edge = [initial], [indptr[initial]]
+        on_path[initial] = 1
+        while path:
+            index, k = path[-1], edge[-1]
+            if k == indptr[index + 1]:
+                path.pop()
+                edge.pop()
+                on_path[index] = 0
+                continue
+            edge[-1] = k + 1
+            child = indices[k]
+            g = len(path)
+            f = g + h[child]
+            if f > bound:
+                if next_bound is None or f < next_bound:
+                    next_bound = f
+                continue
+            if on_path[child]:
+                continue
+            best = best_g.get(child)
+            if best is not None and (best[0] < g or best == (g, iteration)):
+                continue
+            if best is not None or len(best_g) < table_size:
+                best_g[child] = (g, iteration)
+            total_nodes_visited += 1
+            visited_nodes.append(child)
+            if child in goals:
+                return problem.node_from_path(path + [child]), total_nodes_visited, problem.decode_all(visited_nodes)
+            path.append(child)
+            edge.append(indptr[child])
+            on_path[child] = 1
+        if next_bound is None:
+            return None, total_nodes_visited, problem.decode_all(visited_nodes)
+        bound = next_bound
+        iteration += 1
+
+
+# ______________________________________________________________________________
+# Jump Point Search (4-connected)
+
+def jump_point_search(problem, display=False):
+    """A* over jump points instead of every cell. From each jump point the
+    search only scans the canonical directions (forward and the two
+    perpendicular ones; all four from the start) and "jumps" along them
+    until it reaches a goal, a wall, or a cell with a forced neighbor. With
+    4-connected moves a horizontal scan stops next to a wall corner that
+    opens up/down, and a vertical scan also stops wherever a horizontal scan
+    from it would find a jump point. Costs are the straight-line lengths of
+    the jumps, so paths stay optimal while open areas cost a handful of
+    expansions; the scans themselves are precomputed for the whole grid
+    (jump_tables), so each jump is a table lookup. total_nodes and visited_nodes count expanded jump points;
+    the returned Node chain lists every cell of the path. Non-grid problems
+    fall back to astar_search."""
+    compiled = problem.compile() if hasattr(problem, 'compile') else None
+    if compiled is None:
+        return astar_search(problem, display=display)
+    return jump_point_grid_search(compiled, display)
+
+
+def jump_point_grid_search(problem, display=False):
+    """jump_point_search on a CompiledGridProblem, with every jump answered
+    from the precomputed tables of jump_tables."""
+    cols, size = problem.cols, problem.size
+    goals, h, tie_break = problem.goal_set, problem.heuristic_table(), problem.tie_break
+    up, down, left, right = jump_tables(problem)
+    initial = problem.initial
+    records = SearchRecords(size, costs=True)
+    parent, g, keys, explored = records.parent, records.g, records.f, records.closed
+    g[initial] = 0
+    keys[initial] = h[initial] * size + tie_break(initial)
+    frontier = IndexedPriorityQueue('min', keys.__getitem__)
+    frontier.append(initial)
+    visited_nodes = problem.visit_log()
+    total_nodes_visited = 0
+    frontier_peak = 0
+    while frontier:
+        if len(frontier) > frontier_peak:
+            frontier_peak = len(frontier)
+        index = frontier.pop()
+        total_nodes_visited += 1
+        visited_nodes.append(index)
+        if index in goals:
+            if display:
+                print(total_nodes_visited - 1, "jump points have been expanded and", len(frontier), "remain in the frontier")
+            problem.frontier_peak = frontier_peak
+            return problem.node_from_path(_fill_jumps(problem.path(parent, index), cols)), total_nodes_visited, problem.decode_all(visited_nodes)
+        explored[index] = 1
+        came_from = parent[index]
+        if came_from == -1:
+            tables = (up, down, left, right)
+        elif abs(index - came_from) < cols:  # arrived horizontally
+            tables = (up, down, right if index > came_from else left)
+        else:
+            tables = (left, right, down if index > came_from else up)
+        for table in tables:
+            point = table[index]
+            if point == -1 or explored[point]:
+                continue
+            distance = abs(point - index)
+            cost = g[index] + (distance if distance < cols else distance // cols)
+            key = (cost + h[point]) * size + tie_break(point)
+            if point not in frontier or key < frontier[point]:
+                g[point] = cost
+                parent[point] = index
+                keys[point] = key
+                frontier.append(point)
+    problem.frontier_peak = frontier_peak
+    return None, total_nodes_visited, problem.decode_all(visited_nodes)
+
+
+def jump_tables(problem):
+    """The (up, down, left, right) tables of jump_table_arrays for a
+    CompiledGridProblem, as memoryviews, cached per (grid contents, goal
+    cells) in jump_cache: building them is O(cells), so on a large map it
+    would cost far more than the search itself on every query."""
+    key = (problem.problem.grid.fingerprint(), tuple(sorted(problem.goal_set)))
+    tables = jump_cache.get(key)
+    if tables is None:
+        tables = jump_table_arrays(problem)
+        jump_cache.put(key, tables)
+    return tuple(memoryview(table) for table in tables)
+
+
+# Jump tables cached per (grid contents, goal cells); four int32 tables per entry
+jump_cache = LRUCache(maxsize=32, maxbytes=256 << 20, sizeof=lambda tables: sum(table.nbytes for table in tables))
+
+
+def jump_table_arrays(problem):
+    """For every cell, the jump point reached by scanning UP, DOWN, LEFT and
+    RIGHT from it (-1 if the scan runs into a wall first), computed for the
+    whole grid at once. A cell stops a horizontal scan if it is a goal or has
+    a forced neighbor (open above/below while the cell behind that is
+    blocked); it stops a vertical scan if it is a goal, has a forced
+    neighbor to the left/right, or a horizontal scan from it finds a jump
+    point."""
+    rows, cols = problem.rows, problem.cols
+    padded = np.zeros((rows + 2, cols + 2), dtype=bool)
+    padded[1:-1, 1:-1] = problem.graph.movable.reshape(rows, cols)
+    free = padded[1:-1, 1:-1]
+    goal = np.zeros(rows * cols, dtype=bool)
+    goal[problem.goals] = True
+    goal = goal.reshape(rows, cols)
+    above, below = padded[:-2, 1:-1], padded[2:, 1:-1]
+    left_of, right_of = padded[1:-1, :-2], padded[1:-1, 2:]
+    up_left, up_right = padded[:-2, :-2], padded[:-2, 2:]
+    down_left, down_right = padded[2:, :-2], padded[2:, 2:]
+
+    stop_right = free & (goal | (above & ~up_left) | (below & ~down_left))
+    stop_left = free & (goal | (above & ~up_right) | (below & ~down_right))
+    right = _scan(stop_right, free, axis=1, forward=True)
+    left = _scan(stop_left, free, axis=1, forward=False)
+    horizontal = (right != -1) | (left != -1)
+    stop_down = free & (goal | horizontal | (left_of & ~up_left) | (right_of & ~up_right))
+    stop_up = free & (goal | horizontal | (left_of & ~down_left) | (right_of & ~down_right))
+    down = _scan(stop_down, free, axis=0, forward=True)
+    up = _scan(stop_up, free, axis=0, forward=False)
+    return tuple(table.reshape(-1) for table in (up, down, left, right))
+
+
+def _scan(stop, free, axis, forward):
+    """Flat index of the first cell past each cell along axis (increasing if
+    forward) that is a wall or a stop cell; -1 where that cell is a wall or
+    the scan leaves the grid."""
+    rows, cols = stop.shape
+    length = stop.shape[axis]
+    event = stop | ~free
+    position = np.arange(length).reshape((1, -1) if axis == 1 else (-1, 1))
+    if forward:
+        first = np.where(event, position, length)
+        first = np.flip(np.minimum.accumulate(np.flip(first, axis), axis=axis), axis)
+        following = np.full_like(first, length)
+        if axis == 1:
+            following[:, :-1] = first[:, 1:]
+        else:
+            following[:-1, :] = first[1:, :]
+        found = following < length
+    else:
+        last = np.maximum.accumulate(np.where(event, position, -1), axis=axis)
+        following = np.full_like(last, -1)
+        if axis == 1:
+            following[:, 1:] = last[:, :-1]
+        else:
+            following[1:, :] = last[:-1, :]
+        found = following >= 0
+    target = np.clip(following, 0, length - 1)
+    if axis == 1:
+        flat = np.arange(rows).reshape(-1, 1) * cols + target
+    else:
+        flat = target * cols + np.arange(cols).reshape(1, -1)
+    hit = found & np.take_along_axis(stop, target, axis=axis)
+    return np.where(hit, flat, -1).astype(np.int32)
+
+
+def _fill_jumps(jump_points, cols):
+    """Expand a list of jump point indices (consecutive ones on a straight line) into every cell in between."""
+    path = jump_points[:1]
+    for start, end in zip(jump_points, jump_points[1:]):
+        step = (cols if abs(end - start) >= cols else 1) * (1 if end > start else -1)
+        path.extend(range(start + step, end + step, step))
+    return path
+
+
+# ______________________________________________________________________________
+# Hierarchical pathfinding (HPA*)
+
+# Action for each (dx, dy) step
+_STEP_ACTIONS = {(0, -1): 'UP', (0, 1): 'DOWN', (-1, 0): 'LEFT', (1, 0): 'RIGHT'}
+
+
+def hierarchical_search(problem, cluster_size=CLUSTER_SIZE):
+    """HPA*: search the abstract graph of cluster entrances of the grid's
+    cached Hierarchy, then refine the route into cells inside each cluster
+    (see Hierarchy.search). The abstraction is built once per grid and
+    patched cluster by cluster when walls change, so on very large maps a
+    query costs an abstract search plus a few cluster-sized BFS instead of
+    a flat search over millions of cells. Paths are near-optimal, not
+    always shortest. total_nodes counts abstract nodes and cells expanded;
+    visited_nodes lists the abstract nodes (entrance cells) expanded.
+    Non-grid problems and starts off the grid fall back to astar_search."""
+    grid = getattr(problem, 'grid', None)
+    x, y = problem.initial
+    if grid is None or not (0 <= x < grid.cols and 0 <= y < grid.rows):
+        return astar_search(problem)
+    goals = problem.goal if isinstance(problem.goal, list) else [problem.goal]
+    path, visited, expansions = grid_hierarchy(grid, cluster_size).search(problem.initial, goals, problem.visit_log())
+    cols = grid.cols
+    visited_nodes = [(index % cols, index // cols) for index in visited]
+    if path is None:
+        return None, expansions, visited_nodes
+    node = Node(problem.initial)
+    for index in path[1:]:
+        state = (index % cols, index // cols)
+        node = Node(state, node, _STEP_ACTIONS[(state[0] - node.state[0], state[1] - node.state[1])], node.path_cost + 1)
+    return node, expansions, visited_nodes
+
+
 # ______________________________________________________________________________
 # custom search method 
 
 def bidirectional_astar_search(problem, h = robot_manhattan_heuristic, display=False):
-    """Bidirectional search is a search method that simultaneously searches
-    from the initial state and the goal state, meeting in the middle."""
-   
+    """Bidirectional A*: a forward search from the initial state (h(n)) and a
+    backward search seeded with every goal that can be entered (h(n,
+    problem, True), the estimate back to the initial state). Each step expands the side with
+    the smaller frontier, so many goals on the backward side do not make
+    the two searches grow unevenly. Every state reached from both sides
+    gives a path; the cheapest one found (cost mu) is kept, and the search
+    stops once mu <= max(fmin forward, fmin backward), the smallest f on
+    either frontier: with consistent heuristics no path not found yet can
+    be cheaper (front-to-end bidirectional A*). The backward side expands
+    nodes with the problem's own actions, so actions must be reversible.
+    The expansions of each side are left in problem.side_expansions as
+    (forward, backward)."""
+    compiled = problem.compile() if hasattr(problem, 'compile') else None
+    if compiled is not None and h is robot_manhattan_heuristic:
+        return bidirectional_grid_search(compiled, compiled.heuristic_table(), compiled.heuristic_table(backward=True), display)
+    if compiled is not None and h is alt_heuristic:
+        return bidirectional_grid_search(compiled, compiled.alt_table(), compiled.alt_table(backward=True), display)
     h = memoize(h or problem.h, 'h')
-    f = memoize(lambda n: n.path_cost + h(n, problem ), 'f')
-    f_back = memoize(lambda n: n.path_cost + h(n, problem,True ), 'f_back')
-
-    
-    # Initialize the forward and backward frontiers
-    forward_frontier = PriorityQueue('min', f)
-    backward_frontier = PriorityQueue('min', f_back)
-    
-    # Initialize the explored sets
-    forward_explored = set()
-    backward_explored = set()
-    
-    # Initialize the forward search node
-    forward_node = Node(problem.initial)
-    forward_frontier.append(forward_node)
-
-    # Dictionaries to store the actual nodes for easier access
-    forward_explored_dict = {}
-    backward_explored_dict = {}
-
-    # Initialize the list to keep track of visited nodes
-    visited_nodes_forward = []
-    visited_nodes_backward = []
-    
-
-    if problem.goal_test(forward_node.state):
-        return forward_node, 1
-    
-    total_nodes_visited = 0
+    f = memoize(lambda n: n.path_cost + h(n, problem), 'f')
+    f_back = memoize(lambda n: n.path_cost + h(n, problem, True), 'f_back')
 
+    root = Node(problem.initial)
+    visited_nodes = problem.visit_log()
+    if problem.goal_test(root.state):
+        problem.side_expansions = (1, 0)
+        return root, 1, [root.state]
     goals = problem.goal if isinstance(problem.goal, list) else [problem.goal]
+    # Goals that cannot be entered (walls, off the grid) are not seeded, as in bidirectional_grid_search
+    grid = getattr(problem, 'grid', None)
+    if grid is not None:
+        goals = [goal for goal in goals if grid.isMovable(*goal)]
+    # Per side: frontier, best node reached per state, expanded states
+    sides = [(IndexedPriorityQueue('min', f), {}, set()), (IndexedPriorityQueue('min', f_back), {}, set())]
+    for (frontier, reached, _), seeds in zip(sides, ([root], [Node(goal) for goal in goals])):
+        for node in seeds:
+            frontier.append(node)
+            reached[node.state] = node
+    best, meeting = None, None
+    expanded = [0, 0]
+    while sides[0][0] and sides[1][0]:
+        if best is not None and best <= max(sides[0][0].peek()[0], sides[1][0].peek()[0]):
+            break
+        side = 0 if len(sides[0][0]) <= len(sides[1][0]) else 1
+        frontier, reached, closed = sides[side]
+        other_reached = sides[1 - side][1]
+        node = frontier.pop()
+        closed.add(node.state)
+        expanded[side] += 1
+        visited_nodes.append(node.state)
+        for child in node.expand(problem):
+            if child.state in closed:
+                continue
+            previous = reached.get(child.state)
+            if previous is not None and previous.path_cost <= child.path_cost:
+                continue
+            reached[child.state] = child
+            frontier.append(child)
+            other = other_reached.get(child.state)
+            if other is not None and (best is None or child.path_cost + other.path_cost < best):
+                best = child.path_cost + other.path_cost
+                meeting = (child, other) if side == 0 else (other, child)
+    if display:
+        print(expanded[0], "forward and", expanded[1], "backward paths have been expanded")
+    problem.side_expansions = tuple(expanded)
+    if meeting is None:
+        return None, sum(expanded), visited_nodes
+    return merge_nodes_of_paths(*meeting), sum(expanded), visited_nodes
 
-    for goal in goals:
-        backward_node = Node(goal)
-        backward_frontier.append(backward_node)
-
-    
-    while forward_frontier and backward_frontier:
-        # Expand the forward search
-        forward_node = forward_frontier.pop()
-        backward_node = backward_frontier.pop()
-        total_nodes_visited += 2
-
-         # add the new forward node to the explored set 
-        forward_explored.add(forward_node.state)
-        forward_explored_dict[forward_node.state] = forward_node
-        visited_nodes_forward.append(forward_node.state)
-
-        # Expand the backward node 
-        backward_explored.add(backward_node.state)
-        backward_explored_dict[backward_node.state] = backward_node
-        visited_nodes_backward.append(backward_node.state)
-        
-        if forward_node.state in backward_explored:
-            return merge_nodes_of_paths(forward_node, backward_explored_dict[forward_node.state]), total_nodes_visited, visited_nodes_forward + visited_nodes_backward
-
-        if backward_node.state in forward_explored:
-            return merge_nodes_of_paths(forward_explored_dict[backward_node.state], backward_node), total_nodes_visited, visited_nodes_forward + visited_nodes_backward
-        
-        # search loop for the forward search
-        for child in forward_node.expand(problem):
-            if child.state not in forward_explored and child not in forward_frontier:
-                forward_frontier.append(child)
-            elif child in forward_frontier:
-                if f(child) < forward_frontier[child]:
-                    del forward_frontier[child]
-                    forward_frontier.append(child)
-        
-        # search loop for the backward search
-        for child in backward_node.expand(problem):
-            if child.state not in backward_explored and child not in backward_frontier:
-                backward_frontier.append(child)
-            elif child in backward_frontier:
-                if f_back(child) < backward_frontier[child]:
-                    del backward_frontier[child]
-                    backward_frontier.append(child)
-    
-    return None, total_nodes_visited, visited_nodes_forward + visited_nodes_backward
+
+def bidirectional_grid_search(problem, h_forward, h_backward, display=False):
+    """bidirectional_astar_search on a CompiledGridProblem, with heuristic
+    tables for both directions. Grid moves are reversible, so the backward
+    side walks the same CSR table; goals that are walls or off the grid
+    cannot be entered and are not seeded. Priorities are packed as in
+    best_first_grid_search, so both sides break ties like Node queues."""
+    indptr, indices, movable = problem.indptr, problem.indices, problem.graph.movable
+    size, tie_break = problem.size, problem.tie_break
+    initial = problem.initial
+    visited_nodes = problem.visit_log()
+    if initial in problem.goal_set:
+        problem.side_expansions = (1, 0)
+        visited_nodes.append(initial)
+        return problem.node_from_path([initial]), 1, problem.decode_all(visited_nodes)
+    sides = []
+    for h, seeds in ((h_forward, [initial]), (h_backward, [goal for goal in problem.goals if movable[goal]])):
+        records = SearchRecords(size, costs=True)
+        frontier = IndexedPriorityQueue('min', records.f.__getitem__)
+        for seed in seeds:
+            records.g[seed] = 0
+            records.f[seed] = h[seed] * size + tie_break(seed)
+            frontier.append(seed)
+        sides.append((frontier, records, h))
+    forward, backward = sides[0][0], sides[1][0]
+    best, meeting = None, -1
+    expanded = [0, 0]
+    frontier_peak = 0
+    while forward and backward:
+        if len(forward) + len(backward) > frontier_peak:
+            frontier_peak = len(forward) + len(backward)
+        if best is not None and best <= max(forward.peek()[0], backward.peek()[0]) // size:
+            break
+        side = 0 if len(forward) <= len(backward) else 1
+        frontier, records, h = sides[side]
+        parent, g, keys, closed = records.parent, records.g, records.f, records.closed
+        other_g = sides[1 - side][1].g
+        index = frontier.pop()
+        closed[index] = 1
+        expanded[side] += 1
+        visited_nodes.append(index)
+        child_cost = g[index] + 1
+        for k in range(indptr[index], indptr[index + 1]):
+            child = indices[k]
+            if closed[child] or (g[child] != -1 and g[child] <= child_cost):
+                continue
+            g[child] = child_cost
+            parent[child] = index
+            keys[child] = (child_cost + h[child]) * size + tie_break(child)
+            frontier.append(child)
+            if other_g[child] != -1 and (best is None or child_cost + other_g[child] < best):
+                best, meeting = child_cost + other_g[child], child
+    if display:
+        print(expanded[0], "forward and", expanded[1], "backward paths have been expanded")
+    problem.side_expansions = tuple(expanded)
+    problem.frontier_peak = frontier_peak
+    if best is None:
+        return None, sum(expanded), problem.decode_all(visited_nodes)
+    # Forward parents lead back to the initial state, backward parents on to a goal
+    path = problem.path(sides[0][1].parent, meeting)
+    index = sides[1][1].parent[meeting]
+    while index != -1:
+        path.append(index)
+        index = sides[1][1].parent[index]
+    return problem.node_from_path(path), sum(expanded), problem.decode_all(visited_nodes)
 
 def merge_nodes_of_paths(meeting_forward_node, meeting_backward_node):
-    """Merge the nodes from the forward and backward nodes."""
-    # Get the backward path from goal to meeting point
-    backward_path_nodes = []
-    current = meeting_backward_node 
+    """Join a forward node and a backward node for the same state into one
+    Node chain from the initial state to the backward search's goal."""
+    result_node = meeting_forward_node
+    current = meeting_backward_node
+    # Walk the backward chain towards its goal, undoing each action
     while current.parent is not None:
-        backward_path_nodes.append(current)
+        step_cost = current.path_cost - current.parent.path_cost
+        result_node = Node(current.parent.state, result_node, reverse_action(current.action), result_node.path_cost + step_cost)
         current = current.parent
-    backward_path_nodes.append(current)  # Add the goal node
-    
-    # Reverse to get path from meeting point to goal (excluding meeting point)
-    backward_path_nodes.reverse()
-    if len(backward_path_nodes) > 1:
-        backward_path_nodes = backward_path_nodes[1:]  # Remove meeting point to avoid duplication
-    
-    # Start with the forward node (which has the correct path from initial to meeting point)
-    result_node = meeting_forward_node
-    
-    # Extend the path by adding the backward path nodes
-    for backward_node in backward_path_nodes:
-        # Create a new node that continues from the current result
-        new_node = Node(backward_node.state)
-        new_node.parent = result_node
-        new_node.action = reverse_action(backward_node.action)  # Keep the original action
-        result_node = new_node
-    
     return result_node
 
 def reverse_action(action):
@@ -1,7 +1,10 @@
 from utils import *
-from Node import Node
+from Node import Node, SearchRecords
+from DistanceField import distance_field
 from collections import deque
 
+import numpy as np
+
 def depth_first_graph_search(problem):
     """
     Search the deepest nodes in the search tree first.
@@ -10,22 +13,29 @@ def depth_first_graph_search(problem):
     Does not get trapped by loops.
     If two paths reach a state, only use the first one.
     """
+    compiled = problem.compile() if hasattr(problem, 'compile') else None
+    if compiled is not None:
+        return depth_first_grid_search(compiled)
     frontier = [(Node(problem.initial))]  # Stack
+    frontier_states = {problem.initial}  # companion set of the states on the stack, for O(1) membership tests
     total_nodes_visited = 0 # For debugging purposes, to count total nodes expanded
-    visited_nodes = []  #to keep track of visited nodes
+    visited_nodes = problem.visit_log()  #to keep track of visited nodes
 
     # print("frontier:",frontier)
     explored = set()
     while frontier:
         node = frontier.pop()
+        frontier_states.discard(node.state)
         # print("node:",node)
         total_nodes_visited += 1
         visited_nodes.append(node.state)  # Add the current node to visited nodes
         if problem.goal_test(node.state):
             return node, total_nodes_visited, visited_nodes
         explored.add(node.state)
-        frontier.extend(child for child in node.expand(problem)
-                        if child.state not in explored and child not in frontier)
+        for child in node.expand(problem):
+            if child.state not in explored and child.state not in frontier_states:
+                frontier.append(child)
+                frontier_states.add(child.state)
         # print("frontier extend: \n",frontier)
     return None, total_nodes_visited, visited_nodes  # If no solution is found
 
@@ -35,28 +45,198 @@ def breadth_first_graph_search(problem):
     single line as below:
     return graph_search(problem, FIFOQueue())
     """
+    compiled = problem.compile() if hasattr(problem, 'compile') else None
+    if compiled is not None:
+        return breadth_first_grid_search(compiled)
     node = Node(problem.initial)
     frontier = deque([node])
+    frontier_states = {node.state}  # companion set of the queued states, for O(1) membership tests
     explored = set()
     total_nodes_visited = 0 
-    visited_nodes = []
+    visited_nodes = problem.visit_log()
 
     if problem.goal_test(node.state):
         return node, 1, visited_nodes
     
     while frontier:
         node = frontier.popleft()
+        frontier_states.discard(node.state)
         explored.add(node.state)
         total_nodes_visited += 1
         visited_nodes.append(node.state)  # Add the current node to visited nodes
         for child in node.expand(problem):
-            if child.state not in explored and child not in frontier:
+            if child.state not in explored and child.state not in frontier_states:
                 if problem.goal_test(child.state):
                     return child,  total_nodes_visited + 1, visited_nodes
                 frontier.append(child)
+                frontier_states.add(child.state)
     return None, total_nodes_visited, visited_nodes
 
 
+# ______________________________________________________________________________
+# Grid searchers: same visit order as above, but on a CompiledGridProblem, so
+# states are cell indices and successors come straight from the CSR table
+
+def depth_first_grid_search(problem):
+    """depth_first_graph_search over the cell indices of a CompiledGridProblem."""
+    indptr, indices, goals = problem.indptr, problem.indices, problem.goal_set
+    records = SearchRecords(problem.size)
+    parent, explored = records.parent, records.closed
+    frontier = [problem.initial]  # Stack
+    in_frontier = bytearray(problem.size)  # bitmap companion of the stack
+    in_frontier[problem.initial] = 1
+    total_nodes_visited = 0
+    frontier_peak = 0
+    visited_nodes = problem.visit_log()
+    while frontier:
+        if len(frontier) > frontier_peak:
+            frontier_peak = len(frontier)
+        index = frontier.pop()
+        in_frontier[index] = 0
+        total_nodes_visited += 1
+        visited_nodes.append(index)
+        if index in goals:
+            problem.frontier_peak = frontier_peak
+            return problem.solution_node(parent, index), total_nodes_visited, problem.decode_all(visited_nodes)
+        explored[index] = 1
+        for k in range(indptr[index], indptr[index + 1]):
+            child = indices[k]
+            if not explored[child] and not in_frontier[child]:
+                parent[child] = index
+                frontier.append(child)
+                in_frontier[child] = 1
+    problem.frontier_peak = frontier_peak
+    return None, total_nodes_visited, problem.decode_all(visited_nodes)
+
+
+def breadth_first_grid_search(problem):
+    """breadth_first_graph_search over the cell indices of a CompiledGridProblem."""
+    indptr, indices, goals = problem.indptr, problem.indices, problem.goal_set
+    initial = problem.initial
+    records = SearchRecords(problem.size)
+    parent, explored = records.parent, records.closed
+    if initial in goals:
+        return problem.solution_node(parent, initial), 1, []
+
+    frontier = deque([initial])
+    in_frontier = bytearray(problem.size)  # bitmap companion of the queue
+    in_frontier[initial] = 1
+    total_nodes_visited = 0
+    frontier_peak = 0
+    visited_nodes = problem.visit_log()
+    while frontier:
+        if len(frontier) > frontier_peak:
+            frontier_peak = len(frontier)
+        index = frontier.popleft()
+        in_frontier[index] = 0
+        explored[index] = 1
+        total_nodes_visited += 1
+        visited_nodes.append(index)
+        for k in range(indptr[index], indptr[index + 1]):
+            child = indices[k]
+            if not explored[child] and not in_frontier[child]:
+                parent[child] = index
+                if child in goals:
+                    problem.frontier_peak = frontier_peak
+                    return problem.solution_node(parent, child), total_nodes_visited + 1, problem.decode_all(visited_nodes)
+                frontier.append(child)
+                in_frontier[child] = 1
+    problem.frontier_peak = frontier_peak
+    return None, total_nodes_visited, problem.decode_all(visited_nodes)
+
+
+
+def wavefront_breadth_first_search(problem):
+    """Breadth-first search that advances a whole BFS layer at a time with
+    array operations. Only grid problems can be vectorized; any other
+    problem falls back to breadth_first_graph_search."""
+    compiled = problem.compile() if hasattr(problem, 'compile') else None
+    if compiled is None:
+        return breadth_first_graph_search(problem)
+    return wavefront_grid_search(compiled)
+
+
+def wavefront_grid_search(problem):
+    """Layer-synchronous BFS on a CompiledGridProblem. Each layer is an array
+    of cell indices in the order the queue-based search would dequeue them;
+    the next layer is every (parent, direction) shift of it that lands on an
+    open, unseen cell, keeping the first occurrence of each cell. This gives
+    the same path, node count and visited order as breadth_first_grid_search
+    (the visited list is layer by layer) without a Python step per cell."""
+    rows, cols, size = problem.rows, problem.cols, problem.size
+    movable = problem.graph.movable
+    parent = np.full(size, -1, dtype=np.int32)
+    initial = problem.initial
+    if initial in problem.goal_set:
+        return problem.solution_node(memoryview(parent), initial), 1, []
+
+    is_goal = np.zeros(size, dtype=bool)
+    is_goal[problem.goals] = True
+    seen = np.zeros(size, dtype=bool)
+    seen[initial] = True
+    layer = np.array([initial], dtype=np.int64)
+    layers = []
+    # Stream each layer into the visit log instead of keeping it, when the search
+    # is streamed or has a deadline (then checked once per layer)
+    watched = problem.problem.visit_sink is not None or problem.problem.deadline is not None
+    sink = problem.visit_log() if watched else None
+    total_nodes_visited = 0
+    while layer.size:
+        problem.frontier_peak = max(problem.frontier_peak or 0, layer.size)
+        x, y = layer % cols, layer // cols
+        # candidates[k, d]: neighbor of layer[k] in direction d (UP, DOWN, LEFT, RIGHT)
+        candidates = np.stack((layer - cols, layer + cols, layer - 1, layer + 1), axis=1)
+        ok = np.stack((y > 0, y < rows - 1, x > 0, x < cols - 1), axis=1)
+        candidates = np.where(ok, candidates, 0)
+        ok &= movable[candidates] & ~seen[candidates]
+        generated = candidates[ok]
+        origin = np.nonzero(ok)[0]
+        _, first = np.unique(generated, return_index=True)
+        first.sort()
+        nxt, origin = generated[first], origin[first]
+        parent[nxt] = layer[origin]
+        seen[nxt] = True
+
+        hits = np.flatnonzero(is_goal[nxt])
+        if hits.size:
+            # The queue search stops while expanding the parent of the first goal generated
+            goal = int(nxt[hits[0]])
+            layer = layer[:origin[hits[0]] + 1]
+            if sink is not None:
+                sink.extend(layer.tolist())
+                return problem.solution_node(memoryview(parent), goal), total_nodes_visited + layer.size + 1, problem.decode_all(sink)
+            layers.append(layer)
+            visited_nodes = np.concatenate(layers).tolist()
+            return problem.solution_node(memoryview(parent), goal), len(visited_nodes) + 1, problem.decode_all(visited_nodes)
+        if sink is not None:
+            sink.extend(layer.tolist())
+        else:
+            layers.append(layer)
+        total_nodes_visited += layer.size
+        layer = nxt
+    if sink is not None:
+        return None, total_nodes_visited, problem.decode_all(sink)
+    visited_nodes = np.concatenate(layers).tolist()
+    return None, total_nodes_visited, problem.decode_all(visited_nodes)
+
+
+
+def distance_field_search(problem):
+    """Answer a grid problem from the cached goal distance field (see
+    DistanceField): the field costs one multi-source BFS per grid and goal
+    set, after which every start is solved by descending it in O(path
+    length). The path is a shortest one; total_nodes and visited_nodes
+    cover the cells on it. Non-grid problems fall back to
+    breadth_first_graph_search."""
+    compiled = problem.compile() if hasattr(problem, 'compile') else None
+    if compiled is None:
+        return breadth_first_graph_search(problem)
+    path = distance_field(problem.grid, compiled.goal_states).path_from(problem.initial)
+    if path is None:
+        return None, 0, []
+    return compiled.node_from_path(path), len(path), compiled.decode_all(path)
+
+
 def depth_limited_search(node, problem, limit, explored=None, counter = None, visited_nodes = None):
     """
     Search the deepest nodes in the search tree first,
@@ -101,13 +281,11 @@ def iterative_deepening_search(problem, max_depth=100):
     It repeatedly calls depth_limited_search with increasing limits.
     """
     total_nodes_visited = 0
-    visited_nodes = []  # to keep track of visited nodes
+    visited_nodes = problem.visit_log()  # to keep track of visited nodes
     for depth in range(max_depth):
         explored = set()
-        visited_this_depth = []
-        result, count = depth_limited_search(Node(problem.initial), problem, depth, explored, None, visited_this_depth)
+        result, count = depth_limited_search(Node(problem.initial), problem, depth, explored, None, visited_nodes)
         total_nodes_visited += count
-        visited_nodes.extend(visited_this_depth)
         if result != 'cutoff':
             return result, total_nodes_visited, visited_nodes
     return None, total_nodes_visited, visited_nodes  # If no solution is found within the max depth
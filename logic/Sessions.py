@@ -0,0 +1,150 @@
+import asyncio
+import secrets
+import time
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+
+from SearchHandle.InformedSearch import astar_search
+from SearchHandle.IncrementalSearch import DStarLite
+
+# D* Lite planners kept per session (one per goal set, least recently used dropped first)
+MAX_PLANNERS = 4
+
+
+# ______________________________________________________________________________
+# Server-side grids that clients update with wall deltas
+class GridSession:
+    """A Grid kept on the server between requests. Searches and wall
+    changes on one session are serialized by its asyncio lock, so a
+    search never sees a half-applied delta. D* Lite planners for the
+    session's goal sets are kept too and told about every delta, so
+    'dstar' queries replan incrementally."""
+
+    def __init__(self, session_id, grid):
+        self.id = session_id
+        self.grid = grid
+        self.lock = asyncio.Lock()
+        self.planners = OrderedDict()  # goal set -> DStarLite
+        self.last_used = time.monotonic()
+
+    def apply_delta(self, add, remove):
+        """Add walls at the (row, col) positions of add and clear those of
+        remove (a cell in both is cleared, see
+        Grid.update_walls_with_positions). Returns the number of cells
+        whose state changed."""
+        changed = self.grid.update_walls_with_positions(add, remove)
+        cells = [(x, y) for y, x in changed.tolist()]
+        for planner in self.planners.values():
+            planner.update_cells(cells)
+        return len(cells)
+
+    def plan(self, problem):
+        """Search problem (on this session's grid) with the session's D* Lite
+        planner for its goals, creating the planner on first use. Starts off
+        the grid fall back to astar_search, like dstar_lite_search."""
+        x, y = problem.initial
+        if not (0 <= x < self.grid.cols and 0 <= y < self.grid.rows):
+            return astar_search(problem)
+        key = tuple(sorted(set(map(tuple, problem.goal))))
+        planner = self.planners.get(key)
+        if planner is None:
+            planner = self.planners[key] = DStarLite(problem)
+            while len(self.planners) > MAX_PLANNERS:
+                self.planners.popitem(last=False)
+        else:
+            self.planners.move_to_end(key)
+            if planner.decode(planner.start) != tuple(problem.initial):
+                planner.move_start(problem.initial)
+        return planner.plan(problem.visit_log())
+
+    def nbytes(self):
+        """Approximate memory held: the cells, the neighbor table if built,
+        and the planners' g/rhs arrays and wall snapshots."""
+        size = len(self.grid.cells)
+        graph = self.grid._graph
+        if graph is not None:
+            size += graph.indptr_array.nbytes + graph.indices_array.nbytes
+        return size + 9 * len(self.grid.cells) * len(self.planners)
+
+
+class SessionStore:
+    """GridSessions by id, evicted when idle for more than ttl seconds or,
+    least recently used first, when there are more than maxsize of them
+    or they hold more than maxbytes together (see GridSession.nbytes).
+    Safe to share between threads."""
+
+    def __init__(self, ttl=1800, maxsize=256, maxbytes=1 << 30):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.sessions = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+        self.lock = Lock()
+
+    def check_size(self, rows, cols):
+        """Raise ValueError if a rows x cols grid alone would be larger than
+        maxbytes; call it before allocating the grid."""
+        if rows * cols > self.maxbytes:
+            raise ValueError("grid of {} cells exceeds the session memory limit".format(rows * cols))
+
+    def create(self, grid):
+        """Store grid in a new session and return it. Raises ValueError if
+        the grid alone is larger than maxbytes (see check_size)."""
+        self.check_size(grid.rows, grid.cols)
+        session = GridSession(secrets.token_urlsafe(16), grid)
+        with self.lock:
+            self.sessions[session.id] = session
+        self.evict()
+        return session
+
+    def get(self, session_id):
+        """Return the live session with this id (marking it used), or None."""
+        now = time.monotonic()
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            if now - session.last_used > self.ttl:
+                del self.sessions[session_id]
+                self.expirations += 1
+                return None
+            session.last_used = now
+            self.sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id):
+        with self.lock:
+            return self.sessions.pop(session_id, None) is not None
+
+    def evict(self):
+        """Drop expired sessions, then the least recently used ones until
+        the count and memory bounds hold; the most recent one is kept."""
+        now = time.monotonic()
+        with self.lock:
+            while self.sessions:
+                session = next(iter(self.sessions.values()))
+                if now - session.last_used <= self.ttl:
+                    break
+                del self.sessions[session.id]
+                self.expirations += 1
+            total = sum(session.nbytes() for session in self.sessions.values())
+            while len(self.sessions) > 1 and (len(self.sessions) > self.maxsize or total > self.maxbytes):
+                _, session = self.sessions.popitem(last=False)
+                total -= session.nbytes()
+                self.evictions += 1
+
+    def expires_in(self, session):
+        return max(self.ttl - (time.monotonic() - session.last_used), 0.0)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def stats(self):
+        """Occupancy and eviction counters, e.g. for a metrics endpoint."""
+        with self.lock:
+            sessions = list(self.sessions.values())
+        return {'sessions': len(sessions), 'bytes': sum(session.nbytes() for session in sessions),
+                'evictions': self.evictions, 'expirations': self.expirations}
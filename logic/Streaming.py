@@ -0,0 +1,105 @@
+import json
+import time
+
+
+class SearchCancelled(Exception):
+    """Raised inside a streaming search once its consumer has gone away."""
+
+
+class SearchTimedOut(SearchCancelled):
+    """Raised inside a search that has run past its deadline (see DeadlineLog)."""
+
+
+# ______________________________________________________________________________
+# Chunked forwarding of visited cells while a search runs
+class VisitStream(list):
+    """Stand-in for a grid searcher's visited list (see
+    CompiledGridProblem.visit_log). Visited cell indices are buffered and,
+    every chunk_size cells, decoded to [x, y] pairs and handed to emit, so
+    exploration can be sent to a client while the search is still running
+    and the full visited list is never held in memory. finish() sends what
+    is left once the search returns. emit may block (back-pressure);
+    setting cancelled makes the next chunk abort the search, and once the
+    deadline (a time.time() value, if given) has passed the next full
+    chunk raises SearchTimedOut instead of being sent."""
+
+    def __init__(self, cols, chunk_size, emit, deadline=None):
+        super().__init__()
+        self.cols = cols
+        self.chunk_size = chunk_size
+        self.emit = emit
+        self.deadline = deadline
+        self.received = 0
+        self.cancelled = False
+
+    def append(self, index):
+        super().append(index)
+        if len(self) >= self.chunk_size:
+            self.check()
+            self.flush()
+
+    def extend(self, indices):
+        super().extend(indices)
+        if len(self) >= self.chunk_size:
+            self.check()
+            self.flush()
+
+    def check(self):
+        if self.deadline is not None and time.time() > self.deadline:
+            raise SearchTimedOut()
+
+    def send(self, chunk):
+        if self.cancelled:
+            raise SearchCancelled()
+        self.emit(chunk)
+
+    def flush(self):
+        cols = self.cols
+        for start in range(0, len(self), self.chunk_size):
+            self.send([[i % cols, i // cols] for i in self[start:start + self.chunk_size]])
+        self.received += len(self)
+        self.clear()
+
+    def finish(self, visited_nodes):
+        """Send the rest of the exploration. Searchers that do not write to
+        the stream (generic Node searchers) only return their visited list,
+        which is then sent in chunks instead."""
+        if self.received or self:
+            self.flush()
+        else:
+            for start in range(0, len(visited_nodes), self.chunk_size):
+                self.send([list(state) for state in visited_nodes[start:start + self.chunk_size]])
+
+
+class DeadlineLog(list):
+    """Stand-in for a searcher's visited list (see
+    GridRobotProblem.visit_log) that keeps every state or cell like a plain
+    list but, every check_every appends and on every extend, raises
+    SearchTimedOut once time.time() is past deadline. A search nobody waits
+    for any more then stops instead of holding its worker."""
+
+    def __init__(self, deadline, check_every=1024):
+        super().__init__()
+        self.deadline = deadline
+        self.check_every = check_every
+        self.countdown = check_every
+
+    def append(self, index):
+        super().append(index)
+        self.countdown -= 1
+        if self.countdown <= 0:
+            self.check()
+
+    def extend(self, indices):
+        super().extend(indices)
+        self.check()
+
+    def check(self):
+        self.countdown = self.check_every
+        if time.time() > self.deadline:
+            raise SearchTimedOut()
+
+
+def sse_event(event, data):
+    """Format one server-sent event whose data is JSON."""
+    return "event: {}\ndata: {}\n\n".format(event, data if isinstance(data, str) else json.dumps(data))
@@ -1,20 +1,81 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import logging
+import os
+import random
 import sys
+import time
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+import numpy as np
+from fastapi import FastAPI, Header, HTTPException, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import List, Tuple, Literal, Dict
+from typing import List, Tuple, Literal, Dict, Optional
 
 from utils import *
 from Grid import Grid
 from RobotProblem import GridRobotProblem
-from SearchHandle.UninformedSearch import (breadth_first_graph_search, depth_first_graph_search, iterative_deepening_search)
-from SearchHandle.InformedSearch import (greedy_best_first_graph_search, astar_search, bidirectional_astar_search)
+from SearchHandle.UninformedSearch import (breadth_first_graph_search, depth_first_graph_search, wavefront_breadth_first_search, distance_field_search)
+from DistanceField import distance_field
+from Cache import LRUCache
+from Executor import SharedGrid, SearchPool, attach_grid, detach_grid
+from Streaming import VisitStream, SearchCancelled, SearchTimedOut, sse_event
+from Encoding import BINARY_MEDIA_TYPE, encode_search_response, wants_binary
+from Metrics import SearchMetrics
+from Sessions import SessionStore
+from MapIO import parse_file, load_binary_map
+from SearchHandle.InformedSearch import (greedy_best_first_graph_search, astar_search, iterative_deepening_astar_search, bidirectional_astar_search, jump_point_search, hierarchical_search, alt_heuristic)
+from SearchHandle.IncrementalSearch import dstar_lite_search
 # ______________________________________________________________________________
 # Define the file handling functions for Robot navigation
 
 
-app = FastAPI()
+# ______________________________________________________________________________
+# Search execution: 'thread' (default) runs searches in the server's thread pool,
+# 'process' in a pool of worker processes that receive grids through shared memory
+SEARCH_EXECUTOR = os.environ.get('SEARCH_EXECUTOR', 'thread')
+SEARCH_WORKERS = int(os.environ.get('SEARCH_WORKERS') or 0) or None
+# Seconds a request waits for its search before answering with an error (unset: no limit).
+# Queued searches are then cancelled and running ones stop at their next visit
+# check (see GridRobotProblem.visit_log).
+SEARCH_TIMEOUT = float(os.environ['SEARCH_TIMEOUT']) if os.environ.get('SEARCH_TIMEOUT') else None
+
+search_pool = SearchPool(SEARCH_WORKERS)
+
+# ______________________________________________________________________________
+# Grid sessions (see /sessions): idle seconds before a session expires, and the
+# most sessions / bytes kept before the least recently used ones are evicted
+SESSION_TTL = float(os.environ.get('SESSION_TTL', '1800'))
+SESSION_MAX = int(os.environ.get('SESSION_MAX', '256'))
+SESSION_MAX_BYTES = int(os.environ.get('SESSION_MAX_BYTES', str(1 << 30)))
+
+sessions = SessionStore(SESSION_TTL, SESSION_MAX, SESSION_MAX_BYTES)
+
+# ______________________________________________________________________________
+# Logging and metrics: one summary line per search, at INFO for a sampled
+# fraction of searches (SEARCH_LOG_SAMPLE) and at DEBUG for all of them;
+# failures are always logged. Counters and histograms are served at /metrics.
+SEARCH_LOG_LEVEL = os.environ.get('SEARCH_LOG_LEVEL', 'INFO').upper()
+SEARCH_LOG_SAMPLE = float(os.environ.get('SEARCH_LOG_SAMPLE', '0.01'))
+
+logger = logging.getLogger('search')
+metrics = SearchMetrics()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    logging.basicConfig(format='%(asctime)s %(levelname)s %(name)s %(message)s')
+    logger.setLevel(SEARCH_LOG_LEVEL)
+    yield
+    search_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 #  CORS configuration to allow requests from specific origins
 origins = [
@@ -32,12 +93,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Algorithm keys accepted by the API (see runRobotSearch)
+Algorithm = Literal['bfs', 'dfs', 'gbfs', 'astar', 'cus1', 'cus2', 'wbfs', 'jps', 'field', 'ida', 'hpa', 'dstar', 'alt', 'bialt']
+
+
 class SearchRequest(BaseModel):
     grid: List[List[int]]  # 0 for empty, 1 for wall
     start: Tuple[int, int]
     goals: List[Tuple[int, int]]
     walls: List[Tuple[int, int]]
-    algorithm: Literal['bfs', 'dfs', 'gbfs', 'astar', 'cus1', 'cus2']
+    algorithm: Algorithm
+    # 'binary' answers with Encoding.encode_search_response; unset follows the Accept header
+    format: Optional[Literal['json', 'binary']] = None
+    # Binary path as int32 cell indices, or as a run-length encoded action string
+    path_encoding: Literal['cells', 'actions'] = 'cells'
 
 
 class SearchResponse(BaseModel):
@@ -49,48 +118,70 @@ class SearchResponse(BaseModel):
     message: str
 
 
-#________________________________________________________________________________
-# this part for command line execution
-filename = sys.argv[1]
-method = sys.argv[2]
+class SearchQuery(BaseModel):
+    start: Tuple[int, int]
+    goals: List[Tuple[int, int]]
+    algorithm: Algorithm
+
+
+class BatchSearchRequest(BaseModel):
+    grid: List[List[int]]  # 0 for empty, 1 for wall
+    walls: List[Tuple[int, int]]
+    queries: List[SearchQuery]
+    # > 1 fans the queries out over that many worker processes
+    workers: int = 1
 
-def read_line_data(text: str):
-    data = text.strip('[]()\n')
-    return tuple(map(int, data.split(',')))
 
+class BatchSearchResponse(BaseModel):
+    results: List[SearchResponse]  # one per query, in order
 
-def parse_file(filename):
-    """Parse the input file to create a grid and initial/goal states."""
-    with open(filename, 'r') as file:
-        lines = []
-        for line in file:
-            clean = line.strip()
-            if clean and not clean.startswith("#"):
-                lines.append(clean)
 
+class SessionRequest(BaseModel):
+    rows: int
+    cols: int
+    walls: List[Tuple[int, int]] = []  # (row, col) wall cells
 
-        # Parse map size
-        map_size = read_line_data(lines[0])
-        rows, cols = map_size[0], map_size[1]
 
-        # Parse initial state
-        initial_state = read_line_data(lines[1])
+class SessionResponse(BaseModel):
+    session_id: str
+    rows: int
+    cols: int
+    version: int  # bumped by every wall change
+    expires_in: float  # seconds left unless the session is used again
 
-        # Parse goal states
-        goal_raw = lines[2].split('|')
-        goals = [read_line_data(g.strip()) for g in goal_raw]
-        
-        # Parse walls from line 4 to the end
-        walls = [(read_line_data(line)) for line in lines[3:]]
 
-        return {
-            'map_size': map_size,
-            'rows': rows,
-            'cols': cols,
-            'initial_state': initial_state,
-            'goals': goals,
-            'walls': walls
-        }
+class SessionDelta(BaseModel):
+    add: List[Tuple[int, int]] = []  # (row, col) cells to turn into walls
+    remove: List[Tuple[int, int]] = []  # (row, col) wall cells to clear
+
+
+class SessionDeltaResponse(BaseModel):
+    version: int
+    changed: int  # cells whose state actually changed
+
+
+class SessionSearchRequest(BaseModel):
+    start: Tuple[int, int]
+    goals: List[Tuple[int, int]]
+    algorithm: Algorithm
+    format: Optional[Literal['json', 'binary']] = None
+    path_encoding: Literal['cells', 'actions'] = 'cells'
+
+
+class FlowFieldRequest(BaseModel):
+    grid: List[List[int]]  # 0 for empty, 1 for wall
+    goals: List[Tuple[int, int]]
+    walls: List[Tuple[int, int]]
+    include_distances: bool = False
+
+
+class FlowFieldResponse(BaseModel):
+    rows: int
+    cols: int
+    # One string per row: U/D/L/R next move towards the nearest goal, G goal, # wall, . no path
+    moves: List[str]
+    # Steps to the nearest goal per cell (-1 if unreachable), only if requested
+    distances: Optional[List[List[int]]] = None
 
 
 # ______________________________________________________________________________
@@ -99,16 +190,30 @@ def runRobotSearch(problem: GridRobotProblem, method: str):
     """Run the search algorithm based on the specified method."""
     if method.lower() == 'bfs':
        return breadth_first_graph_search(problem)
+    elif method.lower() == 'wbfs' or method.lower() == 'wavefront':
+       return wavefront_breadth_first_search(problem)
     elif method.lower() == 'dfs':
        return depth_first_graph_search(problem)
     elif method.lower() == "gbfs":
        return greedy_best_first_graph_search(problem)
     elif method.lower() == 'astar'or (method.lower() == "as") or (method.lower() == "a*"):
        return astar_search(problem)
-    elif method.lower() == 'cus1' or method.lower() == 'ids':
-       return iterative_deepening_search(problem)
-    elif method.lower() == 'cus2' or method.lower() == 'jps':
+    elif method.lower() == 'cus1' or method.lower() == 'ids' or method.lower() == 'ida':
+       return iterative_deepening_astar_search(problem)
+    elif method.lower() == 'cus2':
        return bidirectional_astar_search(problem)
+    elif method.lower() == 'alt':
+       return astar_search(problem, h=alt_heuristic)
+    elif method.lower() == 'bialt':
+       return bidirectional_astar_search(problem, h=alt_heuristic)
+    elif method.lower() == 'jps':
+       return jump_point_search(problem)
+    elif method.lower() == 'field':
+       return distance_field_search(problem)
+    elif method.lower() == 'hpa':
+       return hierarchical_search(problem)
+    elif method.lower() == 'dstar':
+       return dstar_lite_search(problem)
     else:
         raise ValueError("Unknown search method: {}".format(method))
 
@@ -117,15 +222,12 @@ def runRobotSearch(problem: GridRobotProblem, method: str):
 # =====================
 # API Endpoint
 # =====================
-@app.post("/search", response_model=SearchResponse)
-def search_route(request: SearchRequest):
-    """API endpoint to perform search on the grid."""
-    # Create the grid from the request data
+def build_grid(request):
+    """Create the Grid described by a request: its size comes from the grid
+    matrix and its walls from the (row, col) wall positions."""
     rows = len(request.grid)
     cols = len(request.grid[0]) if rows > 0 else 0
 
-    # print(request.grid)
-
     # Create the grid and add walls
     grid = Grid(rows, cols)
     # for wall in request.walls:
@@ -135,78 +237,436 @@ def search_route(request: SearchRequest):
 
     # Challenge________________________________________
     grid.create_wall_with_positions(request.walls)
+    return grid
+
+
+# Finished responses keyed by (grid key, start, goals, algorithm), so re-posting
+# the same query (animation replays, UI toggles) skips the search
+result_cache = LRUCache(maxsize=256, maxbytes=64 << 20, sizeof=lambda response: response_size(response))
+
+
+def response_size(response):
+    """Rough bytes held by a SearchResponse (two-int tuples dominate)."""
+    return 256 + 120 * (len(response.path) + len(response.visited_nodes))
 
-    print(grid.grid)
-    print(request.start, request.goals)
 
+def request_key(request):
+    """Grid key of a request (rows, cols, 'walls', hash of its wall
+    positions), read from the payload without building its Grid, so a
+    cache hit costs no pass over the cells. The same walls listed in
+    another order only make a cache miss."""
+    rows = len(request.grid)
+    cols = len(request.grid[0]) if rows > 0 else 0
+    digest = hashlib.blake2b(np.asarray(request.walls, dtype=np.int64).tobytes(), digest_size=16)
+    return (rows, cols, 'walls', digest.hexdigest())
+
+
+def grid_key(grid):
+    """Grid key of a Grid (rows, cols, 'cells', Grid.fingerprint)."""
+    return (grid.rows, grid.cols, 'cells', grid.fingerprint())
+
+
+def search_key(grid_key, start, goals, algorithm):
+    return (grid_key, tuple(start), tuple(map(tuple, goals)), algorithm)
+
+
+def solve(grid, start, goals, algorithm, visit_sink=None, stats=None, run=runRobotSearch, deadline=None):
+    """Run one search on grid and build its SearchResponse. With a
+    visit_sink (a VisitStream) the grid searchers stream visited cells into
+    it instead of collecting them in the response. The frontier peak of
+    grid searches (and the per-side expansions of bidirectional ones) is
+    stored in the stats dict, if given. run(problem, algorithm) performs
+    the search (e.g. a session's D* Lite planner instead of runRobotSearch).
+    With a deadline (a time.time() value) the search raises SearchTimedOut
+    once it has passed (see GridRobotProblem.visit_log)."""
     # Build problem instance
-    problem = GridRobotProblem(request.start, request.goals, grid)
+    problem = GridRobotProblem(start, goals, grid)
+    problem.visit_sink = visit_sink
+    problem.deadline = deadline
 
-    try:
-        result_node, total_nodes, visited_nodes = runRobotSearch(problem, request.algorithm)
-        print(result_node)
-        print(total_nodes)
-        print(visited_nodes)
-
-        if result_node is None:
-            return SearchResponse(
-                path=[], total_nodes = total_nodes, visited_nodes = visited_nodes, success=False, message="No path found.🥲"
-            )
-
-        # Reconstruct path
-        if isinstance(result_node, str) and result_node == 'cutoff':
-            return SearchResponse(
-                path=[], total_nodes = total_nodes, visited_nodes = visited_nodes, success=False, message="Search cutoff. No solution within depth limit.🥲"
-            )
-        else:
-            test = []
-            path = []
-            pnode = result_node
-            if pnode.parent is None:
-            # Start and goal are the same
-                path = [pnode.state]
-            else:
-                while pnode.parent:
-                    test.append(pnode.action)
-                    path.append(pnode.state)
-                    pnode = pnode.parent
-
-        path=path[::-1]
-        test= test[::-1]
-        print("Test path for backend: ",test)
-        print("Test nodes path for backend: ",path)
+    result_node, total_nodes, visited_nodes = run(problem, algorithm)
+    if stats is not None:
+        compiled = getattr(problem, '_compiled', None)
+        stats['frontier_peak'] = compiled.frontier_peak if compiled is not None else None
+        stats['side_expansions'] = getattr(compiled or problem, 'side_expansions', None)
+
+    if result_node is None:
         return SearchResponse(
-            path=path[::-1],  # from start to goal
-            total_nodes=total_nodes,
-            visited_nodes = visited_nodes,
-            success=True,
-            message="Path found successfully"
+            path=[], total_nodes = total_nodes, visited_nodes = visited_nodes, success=False, message="No path found.🥲"
         )
-    except Exception as e:
+
+    # Reconstruct path
+    if isinstance(result_node, str) and result_node == 'cutoff':
         return SearchResponse(
-            path=[],
-            total_nodes=0,
-            visited_nodes = visited_nodes,
-            success=False,
-            message=f"Error: {str(e)}"
+            path=[], total_nodes = total_nodes, visited_nodes = visited_nodes, success=False, message="Search cutoff. No solution within depth limit.🥲"
         )
-   
+    else:
+        path = []
+        pnode = result_node
+        if pnode.parent is None:
+        # Start and goal are the same
+            path = [pnode.state]
+        else:
+            while pnode.parent:
+                path.append(pnode.state)
+                pnode = pnode.parent
+
+    path=path[::-1]
+    return SearchResponse(
+        path=path[::-1],  # from start to goal
+        total_nodes=total_nodes,
+        visited_nodes = visited_nodes,
+        success=True,
+        message="Path found successfully"
+    )
+
+
+def error_response(message):
+    return SearchResponse(
+        path=[],
+        total_nodes=0,
+        visited_nodes = [],
+        success=False,
+        message=f"Error: {message}"
+    )
+
+
+def solve_safely(grid, start, goals, algorithm, visit_sink=None, run=runRobotSearch, deadline=None):
+    """solve(), timed and logged, with an exception turned into an error
+    response. Returns (response, ok, stats); only ok responses may be
+    cached, and stats is what SearchMetrics.observe_search records. With a
+    deadline (a time.time() value) the search gives up with a timeout
+    response once the deadline has passed."""
+    stats = {'algorithm': algorithm}
+    began = time.perf_counter()
+    timed_out = False
+    try:
+        response, ok = solve(grid, start, goals, algorithm, visit_sink, stats, run, deadline), True
+    except SearchTimedOut:
+        response, ok, timed_out = error_response("search timed out"), False, True
+    except SearchCancelled:
+        raise
+    except Exception as e:
+        logger.exception("search failed algorithm=%s rows=%d cols=%d", algorithm, grid.rows, grid.cols)
+        response, ok = error_response(str(e)), False
+    stats['seconds'] = time.perf_counter() - began
+    stats['expansions'] = response.total_nodes
+    stats['outcome'] = 'timeout' if timed_out else 'error' if not ok else 'found' if response.success else 'not_found'
+    level = logging.INFO if random.random() < SEARCH_LOG_SAMPLE else logging.DEBUG
+    if logger.isEnabledFor(level):
+        logger.log(level, "search algorithm=%s rows=%d cols=%d goals=%d outcome=%s expansions=%d path=%d "
+                   "frontier_peak=%s side_expansions=%s seconds=%.6f", algorithm, grid.rows, grid.cols, len(goals),
+                   stats['outcome'], response.total_nodes, len(response.path), stats.get('frontier_peak'),
+                   stats.get('side_expansions'), stats['seconds'])
+    return response, ok, stats
+
+
+def solve_shared(name, rows, cols, queries, deadline=None):
+    """Worker process entry point: solve queries on the grid in shared memory block name."""
+    shm, grid = attach_grid(name, rows, cols)
+    try:
+        return [solve_safely(grid, *query, deadline=deadline) for query in queries]
+    finally:
+        detach_grid(shm, grid)
+
+
+async def solve_in_pool(grid, queries, chunks, deadline=None):
+    """Solve queries in the worker pool, split into up to chunks tasks that
+    all read one shared memory copy of the grid. On timeout, tasks that have
+    not started are cancelled; running ones stop at deadline (see
+    solve_safely)."""
+    shared = SharedGrid(grid)
+    size = -(-len(queries) // chunks)
+    futures = []
+    try:
+        for i in range(0, len(queries), size):
+            futures.append(search_pool.submit(solve_shared, shared.name, grid.rows, grid.cols, queries[i:i + size], deadline))
+    finally:
+        if futures:
+            shared.release_after(futures)
+        else:
+            shared.release()
+    try:
+        parts = await asyncio.wait_for(asyncio.gather(*map(asyncio.wrap_future, futures)), SEARCH_TIMEOUT)
+    except asyncio.TimeoutError:
+        for future in futures:
+            future.cancel()
+        raise
+    return [result for part in parts for result in part]
+
+
+async def answer_queries(key, load_grid, queries, workers=1):
+    """SearchResponses for (start, goals, algorithm) queries on the grid with
+    grid key key (see request_key and grid_key), without blocking the event
+    loop. Cached answers are returned directly; for the rest, load_grid()
+    gives the Grid (called in the thread pool) and they are solved in the
+    thread pool, or in the process pool when SEARCH_EXECUTOR is 'process'
+    or more than one worker is asked for."""
+    keys = [search_key(key, *query) for query in queries]
+    results = [result_cache.get(query_key) for query_key in keys]
+    missing = [i for i, response in enumerate(results) if response is None]
+    for i, (_, _, algorithm) in enumerate(queries):
+        metrics.observe_query(algorithm, key[0] * key[1], results[i] is not None)
+    if not missing:
+        return results
+    pending = [queries[i] for i in missing]
+    grid = await run_in_threadpool(load_grid)
+    deadline = time.time() + SEARCH_TIMEOUT if SEARCH_TIMEOUT is not None else None
+    try:
+        if SEARCH_EXECUTOR == 'process' or workers > 1:
+            solved = await solve_in_pool(grid, pending, max(workers, 1), deadline)
+        else:
+            solved = await asyncio.wait_for(
+                run_in_threadpool(lambda: [solve_safely(grid, *query, deadline=deadline) for query in pending]), SEARCH_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("search timed out after %ss queries=%d rows=%d cols=%d", SEARCH_TIMEOUT, len(pending), grid.rows, grid.cols)
+        solved = [(error_response("search timed out"), False, {'algorithm': query[2], 'outcome': 'timeout'}) for query in pending]
+    for i, (response, ok, stats) in zip(missing, solved):
+        metrics.observe_search(stats)
+        results[i] = response
+        if ok:
+            result_cache.put(keys[i], response)
+    return results
+
+
+@app.post("/search", response_model=SearchResponse)
+async def search_route(request: SearchRequest, accept: Optional[str] = Header(None)):
+    """API endpoint to perform search on the grid. Answers in JSON, or in the
+    compact binary form (see Encoding) when the request's format field or
+    its Accept header asks for it."""
+    key = await run_in_threadpool(request_key, request)
+    response = (await answer_queries(key, lambda: build_grid(request), [(request.start, request.goals, request.algorithm)]))[0]
+    return search_body(response, request, key[1], accept)
+
+
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def batch_search_route(request: BatchSearchRequest):
+    """Answer many (start, goals, algorithm) queries on one grid. The grid,
+    its neighbor table and the heuristic/distance tables are built once and
+    shared by every query; with workers > 1 the queries are split over that
+    many tasks in the process pool, all reading one shared copy of the grid."""
+    key = await run_in_threadpool(request_key, request)
+    queries = [(query.start, query.goals, query.algorithm) for query in request.queries]
+    return BatchSearchResponse(results=await answer_queries(key, lambda: build_grid(request), queries, request.workers))
+
+
+async def stream_events(key, load_grid, start, goals, algorithm, chunk_size):
+    """Server-sent events for one search: 'visited' events carrying chunks of
+    [x, y] cells in visit order while the search runs in the thread pool
+    (always: the chunks have to reach this event loop), then one 'result'
+    event with the SearchResponse (its visited_nodes left empty). The
+    search blocks while the client is behind, stops once the client
+    disconnects, and gives up after SEARCH_TIMEOUT like /search. key and
+    load_grid are those of answer_queries."""
+    cached = result_cache.get(search_key(key, start, goals, algorithm))
+    metrics.observe_query(algorithm, key[0] * key[1], cached is not None)
+    if cached is not None:
+        for i in range(0, len(cached.visited_nodes), chunk_size):
+            yield sse_event('visited', [list(state) for state in cached.visited_nodes[i:i + chunk_size]])
+        yield sse_event('result', cached.model_copy(update={'visited_nodes': []}).model_dump_json())
+        return
+
+    grid = await run_in_threadpool(load_grid)
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue(maxsize=8)
+    deadline = time.time() + SEARCH_TIMEOUT if SEARCH_TIMEOUT is not None else None
+
+    def send(event, data):
+        # Wait for room in the queue, but give up once the client has gone
+        future = asyncio.run_coroutine_threadsafe(events.put((event, data)), loop)
+        while True:
+            try:
+                return future.result(timeout=0.1)
+            except concurrent.futures.TimeoutError:
+                if stream.cancelled:
+                    future.cancel()
+                    raise SearchCancelled() from None
+
+    stream = VisitStream(grid.cols, chunk_size, lambda chunk: send('visited', chunk), deadline)
+
+    def run():
+        try:
+            response, _, stats = solve_safely(grid, start, goals, algorithm, stream, deadline=deadline)
+            metrics.observe_search(stats)
+            stream.finish(response.visited_nodes)
+            response = response.model_copy(update={'visited_nodes': []})
+        except SearchCancelled:
+            return
+        except Exception as e:
+            response = error_response(str(e))
+        try:
+            send('result', response.model_dump_json())
+        except SearchCancelled:
+            pass
+
+    task = asyncio.ensure_future(run_in_threadpool(run))  # referenced until the stream ends
+    try:
+        while True:
+            event, data = await events.get()
+            yield sse_event(event, data)
+            if event == 'result':
+                break
+    finally:
+        # A pending send gives up, and the search stops at its next chunk
+        stream.cancelled = True
+        while not events.empty():
+            events.get_nowait()
+
+
+@app.post("/search/stream")
+async def stream_search_route(request: SearchRequest, chunk_size: int = 1024):
+    """Like /search, but streamed as server-sent events (see stream_events)
+    so the visualizer can draw the exploration as it happens instead of
+    waiting for the whole visited list."""
+    key = await run_in_threadpool(request_key, request)
+    return StreamingResponse(
+        stream_events(key, lambda: build_grid(request), request.start, request.goals, request.algorithm, max(chunk_size, 1)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+def search_body(response, request, cols, accept):
+    """response as JSON, or encoded in binary if the request asks for it."""
+    if wants_binary(request.format, accept):
+        body = encode_search_response(response, cols, request.start, request.path_encoding == 'actions')
+        return Response(body, media_type=BINARY_MEDIA_TYPE)
+    return response
+
+
+def get_session(session_id):
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return session
+
+
+def session_response(session):
+    return SessionResponse(session_id=session.id, rows=session.grid.rows, cols=session.grid.cols,
+                           version=session.grid.version, expires_in=sessions.expires_in(session))
+
+
+@app.post("/sessions", response_model=SessionResponse)
+def create_session_route(request: SessionRequest):
+    """Upload a map once: its grid is kept server-side and later requests
+    refer to it by session_id, sending only wall deltas and queries."""
+    if request.rows <= 0 or request.cols <= 0:
+        raise HTTPException(status_code=422, detail="rows and cols must be positive")
+    try:
+        # Checked before the grid is allocated, so an oversized map costs nothing
+        sessions.check_size(request.rows, request.cols)
+        grid = Grid(request.rows, request.cols)
+        if request.walls:
+            grid.create_wall_with_positions(request.walls)
+        session = sessions.create(grid)
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return session_response(session)
+
+
+@app.get("/sessions/{session_id}", response_model=SessionResponse)
+def session_route(session_id: str):
+    return session_response(get_session(session_id))
+
+
+@app.patch("/sessions/{session_id}", response_model=SessionDeltaResponse)
+async def session_delta_route(session_id: str, delta: SessionDelta):
+    """Add and remove walls of a session's grid; D* Lite planners of the
+    session only repair what the changed cells affect."""
+    session = get_session(session_id)
+    async with session.lock:
+        changed = session.apply_delta(delta.add, delta.remove)
+    return SessionDeltaResponse(version=session.grid.version, changed=changed)
+
+
+@app.post("/sessions/{session_id}/search", response_model=SearchResponse)
+async def session_search_route(session_id: str, request: SessionSearchRequest, accept: Optional[str] = Header(None)):
+    """/search on a session's grid. 'dstar' queries reuse the session's
+    planner for the goal set, so after a delta they replan incrementally."""
+    session = get_session(session_id)
+    grid = session.grid
+    async with session.lock:
+        if request.algorithm == 'dstar':
+            metrics.observe_query(request.algorithm, grid.rows * grid.cols, False)
+            deadline = time.time() + SEARCH_TIMEOUT if SEARCH_TIMEOUT is not None else None
+            response, _, stats = await run_in_threadpool(solve_safely, grid, request.start, request.goals, request.algorithm,
+                                                          None, lambda problem, _: session.plan(problem), deadline)
+            metrics.observe_search(stats)
+        else:
+            key = await run_in_threadpool(grid_key, grid)
+            response = (await answer_queries(key, lambda: grid, [(request.start, request.goals, request.algorithm)]))[0]
+    # The search may have added planners or a neighbor table to the session
+    sessions.evict()
+    return search_body(response, request, grid.cols, accept)
+
+
+@app.delete("/sessions/{session_id}", status_code=204)
+def delete_session_route(session_id: str):
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return Response(status_code=204)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_route():
+    """Search metrics in the Prometheus text format: per-algorithm latency,
+    expansion rate, frontier peak and request size histograms, search and
+    query counters, and the result cache and session store occupancy."""
+    cache = result_cache.stats()
+    store = sessions.stats()
+    return metrics.render((
+        ('search_cache_entries', 'gauge', 'Responses held in the result cache.', cache['entries']),
+        ('search_cache_bytes', 'gauge', 'Approximate size of the result cache.', cache['bytes']),
+        ('search_cache_hits_total', 'counter', 'Result cache hits.', cache['hits']),
+        ('search_cache_misses_total', 'counter', 'Result cache misses.', cache['misses']),
+        ('search_cache_evictions_total', 'counter', 'Result cache evictions.', cache['evictions']),
+        ('search_sessions', 'gauge', 'Grid sessions held.', store['sessions']),
+        ('search_sessions_bytes', 'gauge', 'Approximate memory held by grid sessions.', store['bytes']),
+        ('search_sessions_evicted_total', 'counter', 'Sessions evicted to stay within the count or memory limit.', store['evictions']),
+        ('search_sessions_expired_total', 'counter', 'Sessions dropped after SESSION_TTL idle seconds.', store['expirations']),
+    ))
+
+
+@app.get("/search/cache")
+def search_cache_route():
+    """Hit/miss counters and occupancy of the /search result cache."""
+    return result_cache.stats()
+
+
+@app.post("/flowfield", response_model=FlowFieldResponse)
+def flow_field_route(request: FlowFieldRequest):
+    """Per-cell next move towards the nearest goal, from the cached goal
+    distance field, so a fleet heading for the same goals shares one BFS."""
+    grid = build_grid(request)
+    field = distance_field(grid, request.goals)
+    return FlowFieldResponse(
+        rows=grid.rows,
+        cols=grid.cols,
+        moves=field.flow_rows(grid),
+        distances=field.dist.reshape(grid.rows, grid.cols).tolist() if request.include_distances else None,
+    )
+
 
 # ______________________________________________________________________________
 # Main function to create the grid and problem instance
 
 if __name__ == "__main__":
-    data = parse_file(filename)
+    # python search.py <map> <method> [--binary]; --binary reads a map written by MapIO.py
+    filename = sys.argv[1]
+    method = sys.argv[2]
+    binary = '--binary' in sys.argv[3:]
+    data = load_binary_map(filename) if binary else parse_file(filename)
     rows, cols = data['rows'], data['cols']
     initial_state = data['initial_state']
     goals = data['goals']
     walls = data['walls']
 
-    # Create the grid and add walls
-    grid = Grid(rows, cols)
-    for wall in walls:
-        x, y, w, h = wall
-        grid.create_wall(x, y, w, h)
+    # Create the grid and add walls (a binary map comes with its grid)
+    if binary:
+        grid = data['grid']
+    else:
+        grid = Grid(rows, cols)
+        grid.create_walls(walls)
 
     print("grid created", grid.grid)
     # Create the problem instance
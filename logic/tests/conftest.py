@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules under logic/ import each other by flat names (e.g. "from Grid import Grid")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
@@ -0,0 +1,57 @@
+import random
+
+from Grid import Grid
+from RobotProblem import GridRobotProblem
+from SearchHandle.InformedSearch import bidirectional_astar_search, robot_manhattan_heuristic
+from SearchHandle.UninformedSearch import breadth_first_graph_search
+
+
+class NodeGridRobotProblem(GridRobotProblem):
+    """GridRobotProblem that opts out of compilation, forcing the Node-based searchers."""
+
+    def compile(self):
+        return None
+
+
+def sample_grid():
+    # Testcase/test1.txt
+    grid = Grid(5, 11)
+    grid.create_walls([(2, 0, 2, 2), (8, 0, 1, 2), (10, 0, 1, 1), (2, 3, 1, 2),
+                       (3, 4, 3, 1), (9, 3, 1, 1), (8, 4, 2, 1)])
+    return grid
+
+
+def path_cost(result):
+    node = result[0]
+    return node.path_cost if node else None
+
+
+def test_wall_goal_is_not_reached():
+    grid = sample_grid()
+    assert not grid.isMovable(9, 3) and grid.isMovable(10, 1)
+    # A heuristic other than robot_manhattan_heuristic keeps the Node-based search even on grid problems
+    heuristic = lambda node, problem, backtrack=False: robot_manhattan_heuristic(node, problem, backtrack)
+    for problem, h in ((NodeGridRobotProblem((6, 2), [(9, 3), (10, 1)], grid), robot_manhattan_heuristic),
+                       (GridRobotProblem((6, 2), [(9, 3), (10, 1)], grid), heuristic)):
+        node = bidirectional_astar_search(problem, h=h)[0]
+        assert node.state == (10, 1)
+        assert node.path_cost == 5
+
+
+def test_only_wall_goals():
+    problem = NodeGridRobotProblem((0, 1), [(2, 0), (-1, 0)], sample_grid())
+    assert bidirectional_astar_search(problem)[0] is None
+
+
+def test_matches_breadth_first_search():
+    rng = random.Random(0)
+    for _ in range(300):
+        rows, cols = rng.randint(1, 12), rng.randint(1, 12)
+        grid = Grid(rows, cols)
+        for _ in range(rng.randint(0, rows * cols // 2)):
+            grid.create_wall(rng.randrange(cols), rng.randrange(rows), rng.randint(1, 2), 1)
+        start = (rng.randrange(cols), rng.randrange(rows))
+        goals = [(rng.randrange(cols), rng.randrange(rows)) for _ in range(rng.randint(1, 3))]
+        expected = path_cost(breadth_first_graph_search(GridRobotProblem(start, goals, grid)))
+        assert path_cost(bidirectional_astar_search(NodeGridRobotProblem(start, goals, grid))) == expected
+        assert path_cost(bidirectional_astar_search(GridRobotProblem(start, goals, grid))) == expected
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from Grid import Grid
+from RobotProblem import GridRobotProblem
+from Sessions import GridSession
+from Streaming import SearchTimedOut
+from SearchHandle.InformedSearch import astar_search, bidirectional_astar_search
+from SearchHandle.UninformedSearch import (breadth_first_graph_search, depth_first_graph_search,
+                                           iterative_deepening_search, wavefront_breadth_first_search)
+from SearchHandle.IncrementalSearch import dstar_lite_search
+
+
+class NodeGridRobotProblem(GridRobotProblem):
+    """GridRobotProblem that opts out of compilation, forcing the Node-based searchers."""
+
+    def compile(self):
+        return None
+
+
+def expired_problem(problem_class=GridRobotProblem, n=200):
+    # Walls across the middle, so no search reaches the goal within a few thousand visits
+    grid = Grid(n, n)
+    grid.create_walls([(0, n // 2, n - 1, 1)])
+    problem = problem_class((0, 0), [(0, n - 1)], grid)
+    problem.deadline = time.time() - 1
+    return problem
+
+
+@pytest.mark.parametrize('search', [astar_search, breadth_first_graph_search, depth_first_graph_search,
+                                    wavefront_breadth_first_search, dstar_lite_search])
+def test_grid_searchers_stop_at_deadline(search):
+    with pytest.raises(SearchTimedOut):
+        search(expired_problem())
+
+
+@pytest.mark.parametrize('search', [astar_search, bidirectional_astar_search, breadth_first_graph_search,
+                                    depth_first_graph_search, iterative_deepening_search])
+def test_node_searchers_stop_at_deadline(search):
+    with pytest.raises(SearchTimedOut):
+        search(expired_problem(NodeGridRobotProblem))
+
+
+def test_timed_out_session_planner_still_plans():
+    problem = expired_problem()
+    session = GridSession('s', problem.grid)
+    with pytest.raises(SearchTimedOut):
+        session.plan(problem)
+    problem.deadline = None
+    node = session.plan(problem)[0]
+    assert node.state == (0, 199) and node.path_cost == 199 + 2 * 199
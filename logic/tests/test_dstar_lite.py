@@ -0,0 +1,85 @@
+import random
+
+from Grid import Grid
+from RobotProblem import GridRobotProblem
+from SearchHandle.IncrementalSearch import DStarLite
+from SearchHandle.UninformedSearch import breadth_first_graph_search
+
+
+def random_grid(rng, rows, cols):
+    grid = Grid(rows, cols)
+    for _ in range(rng.randint(0, rows * cols // 4)):
+        grid.create_wall(rng.randrange(cols), rng.randrange(rows), rng.randint(1, 3), 1)
+    return grid
+
+
+def random_cell(rng, grid):
+    return (rng.randrange(grid.cols), rng.randrange(grid.rows))
+
+
+def check_plan(planner, grid, start, goals):
+    """plan() finds a path exactly when BFS does, of the same length, made of
+    single steps onto open cells."""
+    node = planner.plan()[0]
+    expected = breadth_first_graph_search(GridRobotProblem(start, goals, grid))[0]
+    assert (node is None) == (expected is None)
+    if node is None:
+        return
+    assert node.path_cost == expected.path_cost
+    states = [n.state for n in node.path()]
+    assert states[0] == start and states[-1] in goals
+    for (x1, y1), (x2, y2) in zip(states, states[1:]):
+        assert abs(x1 - x2) + abs(y1 - y2) == 1 and grid.isMovable(x2, y2)
+
+
+def test_replans_like_breadth_first_search():
+    rng = random.Random(0)
+    for _ in range(40):
+        grid = random_grid(rng, rng.randint(2, 14), rng.randint(2, 14))
+        start = random_cell(rng, grid)
+        goals = [random_cell(rng, grid) for _ in range(rng.randint(1, 3))]
+        planner = DStarLite(GridRobotProblem(start, goals, grid))
+        check_plan(planner, grid, start, goals)
+        for step in range(8):
+            if rng.random() < 0.5:
+                # Walls added and removed (possibly on the start or a goal), told through update_cells
+                add = [(rng.randrange(grid.rows), rng.randrange(grid.cols)) for _ in range(rng.randint(0, 4))]
+                remove = [(rng.randrange(grid.rows), rng.randrange(grid.cols)) for _ in range(rng.randint(0, 4))]
+                changed = grid.update_walls_with_positions(add, remove)
+                planner.update_cells((col, row) for row, col in changed.tolist())
+            else:
+                start = random_cell(rng, grid)
+                planner.move_start(start)
+            check_plan(planner, grid, start, goals)
+
+
+def test_sync_picks_up_untold_changes():
+    rng = random.Random(1)
+    for _ in range(30):
+        grid = random_grid(rng, 12, 12)
+        start, goals = random_cell(rng, grid), [random_cell(rng, grid)]
+        planner = DStarLite(GridRobotProblem(start, goals, grid))
+        planner.plan()
+        for _ in range(5):
+            grid.create_wall(rng.randrange(12), rng.randrange(12), rng.randint(1, 3), 1)
+            grid.update_walls_with_positions([], [(rng.randrange(12), rng.randrange(12)) for _ in range(3)])
+        planner.sync()
+        check_plan(planner, grid, start, goals)
+
+
+def test_robot_walking_its_plan():
+    # The start moves along the planned path while walls appear ahead of it
+    rng = random.Random(2)
+    grid = random_grid(rng, 20, 20)
+    start, goals = (0, 0), [(19, 19)]
+    grid.update_walls_with_positions([], [(0, 0), (19, 19)])
+    planner = DStarLite(GridRobotProblem(start, goals, grid))
+    for _ in range(10):
+        node = planner.plan()[0]
+        if node is None or node.state == start:
+            break
+        start = node.path()[1].state
+        planner.move_start(start)
+        changed = grid.update_walls_with_positions([(rng.randrange(20), rng.randrange(20)) for _ in range(3)], [])
+        planner.update_cells((col, row) for row, col in changed.tolist())
+        check_plan(planner, grid, start, goals)
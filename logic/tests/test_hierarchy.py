@@ -0,0 +1,87 @@
+import random
+
+import numpy as np
+
+from Grid import Grid
+from Hierarchy import Hierarchy, grid_hierarchy, hierarchy_cache
+from RobotProblem import GridRobotProblem
+from SearchHandle.InformedSearch import hierarchical_search
+from SearchHandle.UninformedSearch import breadth_first_graph_search
+
+
+def random_grid(rng, rows, cols, density=5):
+    grid = Grid(rows, cols)
+    for _ in range(rng.randint(0, rows * cols // density)):
+        grid.create_wall(rng.randrange(cols), rng.randrange(rows), rng.randint(1, 4), rng.randint(1, 2))
+    return grid
+
+
+def random_cell(rng, grid):
+    return (rng.randrange(grid.cols), rng.randrange(grid.rows))
+
+
+def check_path(node, start, goals, grid):
+    """The path is a chain of single steps over open cells from start to a goal."""
+    states = [n.state for n in node.path()]
+    assert states[0] == tuple(start) and states[-1] in goals
+    for (x1, y1), (x2, y2) in zip(states, states[1:]):
+        assert abs(x1 - x2) + abs(y1 - y2) == 1 and grid.isMovable(x2, y2)
+
+
+def test_paths_are_valid_and_near_shortest():
+    # HPA* paths are optimal in the abstract graph only: entrances placed away from
+    # the shortest route cost a detour of up to about a cluster per crossing
+    rng = random.Random(0)
+    for cluster_size in (4, 8, 16):
+        ratios = []
+        for _ in range(150):
+            grid = random_grid(rng, rng.randint(3, 48), rng.randint(3, 48))
+            start = random_cell(rng, grid)
+            goals = [random_cell(rng, grid) for _ in range(rng.randint(1, 3))]
+            expected = breadth_first_graph_search(GridRobotProblem(start, goals, grid))[0]
+            node = hierarchical_search(GridRobotProblem(start, goals, grid), cluster_size)[0]
+            assert (node is None) == (expected is None)
+            if node is None:
+                continue
+            check_path(node, start, goals, grid)
+            assert node.path_cost <= 1.25 * expected.path_cost + 2 * cluster_size
+            if expected.path_cost:
+                ratios.append(node.path_cost / expected.path_cost)
+        assert sum(ratios) / len(ratios) < 1.1
+
+
+def assert_same_hierarchy(rebuilt, fresh):
+    assert rebuilt.cells == fresh.cells
+    assert rebuilt.entrances == fresh.entrances
+    assert rebuilt.links == fresh.links
+    for a, b in zip(rebuilt.intra, fresh.intra):
+        assert (a is None and b is None) or np.array_equal(a, b)
+
+
+def test_partial_rebuild_matches_fresh_build():
+    rng = random.Random(1)
+    for _ in range(20):
+        grid = random_grid(rng, 64, 64)
+        hierarchy = Hierarchy(grid, 8)
+        # A few walls added and removed in one corner, as a session delta would
+        add = [(rng.randrange(16), rng.randrange(16)) for _ in range(6)]
+        remove = [(rng.randrange(16), rng.randrange(16)) for _ in range(6)]
+        grid.update_walls_with_positions(add, remove)
+        rebuilt = hierarchy.rebuilt(grid)
+        fresh = Hierarchy(grid, 8)
+        assert rebuilt.rebuilt_clusters < rebuilt.clusters
+        assert_same_hierarchy(rebuilt, fresh)
+        for _ in range(10):
+            start, goals = random_cell(rng, grid), [random_cell(rng, grid)]
+            assert rebuilt.search(start, goals) == fresh.search(start, goals)
+
+
+def test_grid_hierarchy_rebuilds_latest():
+    hierarchy_cache.clear()
+    grid = random_grid(random.Random(2), 48, 48)
+    first = grid_hierarchy(grid, 8)
+    assert grid_hierarchy(grid, 8) is first
+    grid.update_walls_with_positions([(3, 3), (3, 4)], [])
+    second = grid_hierarchy(grid, 8)
+    assert second is not first and second.rebuilt_clusters <= 4
+    assert_same_hierarchy(second, Hierarchy(grid, 8))
@@ -0,0 +1,57 @@
+import random
+import time
+
+import pytest
+
+from Grid import Grid
+from RobotProblem import GridRobotProblem
+from Streaming import SearchTimedOut
+from SearchHandle.InformedSearch import iterative_deepening_astar_search, robot_manhattan_heuristic
+from SearchHandle.UninformedSearch import breadth_first_graph_search
+
+
+def path_cost(result):
+    node = result[0]
+    return node.path_cost if node else None
+
+
+# A heuristic other than robot_manhattan_heuristic keeps the Node-based search on grid problems
+def node_heuristic(node, problem, backtrack=False):
+    return robot_manhattan_heuristic(node, problem, backtrack)
+
+
+def test_matches_breadth_first_search():
+    rng = random.Random(0)
+    for _ in range(200):
+        rows, cols = rng.randint(1, 10), rng.randint(1, 10)
+        grid = Grid(rows, cols)
+        for _ in range(rng.randint(0, rows * cols // 2)):
+            grid.create_wall(rng.randrange(cols), rng.randrange(rows), rng.randint(1, 2), 1)
+        start = (rng.randrange(cols), rng.randrange(rows))
+        goals = [(rng.randrange(cols), rng.randrange(rows)) for _ in range(rng.randint(1, 3))]
+        expected = path_cost(breadth_first_graph_search(GridRobotProblem(start, goals, grid)))
+        assert path_cost(iterative_deepening_astar_search(GridRobotProblem(start, goals, grid))) == expected
+        assert path_cost(iterative_deepening_astar_search(GridRobotProblem(start, goals, grid), h=node_heuristic)) == expected
+
+
+@pytest.mark.parametrize('h', [robot_manhattan_heuristic, node_heuristic])
+def test_unreachable_goal_returns_at_once(h):
+    # An open 40 x 40 map whose goal corner is walled off: without the reachability
+    # check every bound up to the map's longest path would be searched
+    grid = Grid(40, 40)
+    grid.create_walls([(37, 39, 1, 1), (38, 38, 2, 1)])
+    began = time.perf_counter()
+    node, total_nodes, visited_nodes = iterative_deepening_astar_search(GridRobotProblem((0, 0), [(39, 39)], grid), h=h)
+    assert node is None and total_nodes == 0 and visited_nodes == []
+    assert time.perf_counter() - began < 1
+
+
+@pytest.mark.parametrize('h', [robot_manhattan_heuristic, node_heuristic])
+def test_stops_at_deadline(h):
+    # Reachable, but around a long wall that takes IDA* many iterations
+    grid = Grid(60, 60)
+    grid.create_walls([(0, 30, 59, 1)])
+    problem = GridRobotProblem((0, 0), [(0, 59)], grid)
+    problem.deadline = time.time() - 1
+    with pytest.raises(SearchTimedOut):
+        iterative_deepening_astar_search(problem, h=h)
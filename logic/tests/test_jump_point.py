@@ -0,0 +1,59 @@
+import random
+
+from Grid import Grid
+from RobotProblem import GridRobotProblem
+from SearchHandle.InformedSearch import astar_search, jump_cache, jump_point_search
+from SearchHandle.UninformedSearch import breadth_first_graph_search
+
+
+def path_cost(result):
+    node = result[0]
+    return node.path_cost if node else None
+
+
+def check_path(node, start, goals, grid):
+    states = [n.state for n in node.path()]
+    assert states[0] == tuple(start) and states[-1] in goals
+    for (x1, y1), (x2, y2) in zip(states, states[1:]):
+        assert abs(x1 - x2) + abs(y1 - y2) == 1 and grid.isMovable(x2, y2)
+
+
+def check_search(grid, start, goals):
+    expected = path_cost(breadth_first_graph_search(GridRobotProblem(start, goals, grid)))
+    assert path_cost(astar_search(GridRobotProblem(start, goals, grid))) == expected
+    node = jump_point_search(GridRobotProblem(start, goals, grid))[0]
+    assert path_cost((node,)) == expected
+    if node is not None:
+        check_path(node, start, goals, grid)
+
+
+def test_optimal_like_breadth_first_search():
+    rng = random.Random(0)
+    for _ in range(300):
+        rows, cols = rng.randint(1, 16), rng.randint(1, 16)
+        grid = Grid(rows, cols)
+        for _ in range(rng.randint(0, rows * cols // 3)):
+            grid.create_wall(rng.randrange(cols), rng.randrange(rows), rng.randint(1, 4), rng.randint(1, 2))
+        start = (rng.randrange(cols), rng.randrange(rows))
+        goals = [(rng.randrange(cols), rng.randrange(rows)) for _ in range(rng.randint(1, 3))]
+        check_search(grid, start, goals)
+
+
+def test_cache_follows_wall_changes():
+    jump_cache.clear()
+    grid = Grid(8, 8)
+    start, goals = (0, 0), [(7, 7)]
+    check_search(grid, start, goals)
+    assert len(jump_cache) == 1
+    # A wall across the direct routes: the tables of the open grid must not be reused
+    changed = grid.update_walls_with_positions([(4, x) for x in range(7)], [])
+    assert len(changed) == 7
+    check_search(grid, start, goals)
+    assert len(jump_cache) == 2
+    # Another goal set on the same walls gets its own tables
+    check_search(grid, start, [(0, 7)])
+    assert len(jump_cache) == 3
+    # Back to the open grid: its tables are found again, and still right
+    grid.update_walls_with_positions([], [(4, x) for x in range(7)])
+    check_search(grid, start, goals)
+    assert len(jump_cache) == 3
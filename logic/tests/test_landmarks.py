@@ -0,0 +1,91 @@
+import random
+
+import numpy as np
+
+from Grid import Grid
+from Landmarks import Landmarks
+
+
+def true_distances(grid, targets):
+    """Step distance from every cell to the nearest open target (-1 if none
+    is reachable), walls included: a wall cell may be left but not entered."""
+    graph = grid.neighbor_table()
+    sources = [y * grid.cols + x for x, y in targets
+               if 0 <= x < grid.cols and 0 <= y < grid.rows and grid.isMovable(x, y)]
+    if not sources:
+        return np.full(graph.size, -1)
+    dist = graph.distances(sources).astype(np.int64)
+    for index in np.flatnonzero(~graph.movable).tolist():
+        steps = [dist[graph.indices[k]] for k in range(graph.indptr[index], graph.indptr[index + 1])]
+        steps = [d for d in steps if d >= 0]
+        dist[index] = 1 + min(steps) if steps else -1
+    return dist
+
+
+def check_table(grid, landmarks, targets):
+    table = landmarks.table(targets).astype(np.int64)
+    dist = true_distances(grid, targets)
+    reachable = dist >= 0
+    # Admissible wherever a target can be reached; 0 on the open targets
+    assert (table[reachable] <= dist[reachable]).all()
+    assert (table[dist == 0] == 0).all()
+    # Consistent: neighboring open cells differ by at most one step
+    movable = grid.grid.reshape(-1) != 1
+    for shift, edge in ((1, np.arange(grid.rows * grid.cols) % grid.cols < grid.cols - 1), (grid.cols, None)):
+        a = np.arange(grid.rows * grid.cols - shift)
+        b = a + shift
+        pairs = movable[a] & movable[b] & (edge[a] if edge is not None else True)
+        assert (np.abs(table[a] - table[b])[pairs & reachable[a]] <= 1).all()
+
+
+def test_table_is_admissible_and_consistent():
+    rng = random.Random(0)
+    for _ in range(60):
+        rows, cols = rng.randint(1, 30), rng.randint(1, 30)
+        grid = Grid(rows, cols)
+        for _ in range(rng.randint(0, rows * cols // 3)):
+            grid.create_wall(rng.randrange(cols), rng.randrange(rows), rng.randint(1, 4), rng.randint(1, 2))
+        if rng.random() < 0.5:
+            # A full wall splitting the map into separate areas
+            grid.create_wall(rng.randrange(cols), 0, 1, rows)
+        landmarks = Landmarks(grid, rng.randint(1, 8))
+        for _ in range(5):
+            targets = [(rng.randrange(-1, cols + 1), rng.randrange(-1, rows + 1)) for _ in range(rng.randint(1, 4))]
+            check_table(grid, landmarks, targets)
+
+
+def pocket_grid():
+    """40 x 40: a row of 20 one-cell pockets above a wall, then a 30 x 37 area
+    and a 9 x 37 area split by a wall column."""
+    grid = Grid(40, 40)
+    grid.create_walls([(0, 1, 40, 2), (30, 3, 1, 37)])
+    grid.create_walls([(x, 0, 1, 1) for x in range(1, 40, 2)])
+    return grid
+
+
+def test_separate_areas_get_landmarks():
+    grid = pocket_grid()
+    landmarks = Landmarks(grid, 4)
+    areas = [x < 30 for x, y in ((l % 40, l // 40) for l in landmarks.landmarks)]
+    assert len(areas) == 4 and any(areas) and not all(areas)
+    # Cells of the other area are unknown to a landmark (-1), never a distance
+    for row, landmark in zip(landmarks.dist, landmarks.landmarks):
+        left = landmark % 40 < 30
+        right_cells = np.arange(3 * 40 + 31, 40 * 40, 40)
+        assert (row[right_cells] < 0).all() == left
+    check_table(grid, landmarks, [(35, 20)])
+    check_table(grid, landmarks, [(5, 20), (0, 0)])
+
+
+def test_small_areas_are_skipped():
+    # More pockets than the landmark count: none of them gets a landmark,
+    # and they do not use up the landmarks of the large areas
+    grid = pocket_grid()
+    for count in (1, 2, 4, 8):
+        landmarks = Landmarks(grid, count)
+        assert len(landmarks.landmarks) == count
+        assert all(landmark // 40 >= 3 for landmark in landmarks.landmarks)
+    # When every area is small (here: the only one), it still gets a landmark
+    single = Grid(3, 3)
+    single.create_walls([(0, 0, 3, 1), (0, 2, 3, 1), (0, 1, 1, 1), (2, 1, 1, 1)])
+    assert Landmarks(single, 4).landmarks == [4]
@@ -0,0 +1,160 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+from Benchmark.map_parsing import legacy_parse_file, write_wall_file
+from Grid import Grid
+from MapIO import _HEADER, _parse_walls, is_binary_map, load_binary_map, load_text_map, parse_file, write_binary_map
+
+
+def random_grid(rng, rows, cols):
+    grid = Grid(rows, cols)
+    for _ in range(rng.randint(0, rows * cols // 4)):
+        grid.create_wall(rng.randrange(cols), rng.randrange(rows), rng.randint(1, 4), rng.randint(1, 3))
+    return grid
+
+
+@pytest.mark.parametrize('packed', [False, True])
+def test_binary_round_trip(tmp_path, packed):
+    rng = random.Random(0)
+    # Sizes around the 8-cell packing boundary, and an empty map
+    for rows, cols in ((1, 1), (3, 5), (8, 8), (7, 9), (33, 17), (0, 0)):
+        grid = random_grid(rng, rows, cols)
+        goals = [(rng.randrange(-1, cols + 1), rng.randrange(-1, rows + 1)) for _ in range(rng.randint(0, 5))]
+        filename = str(tmp_path / 'map.bin')
+        write_binary_map(filename, grid, (cols // 2, -1), goals, packed)
+        assert is_binary_map(filename)
+        data = load_binary_map(filename)
+        assert (data['rows'], data['cols'], data['map_size']) == (rows, cols, (rows, cols))
+        assert data['initial_state'] == (cols // 2, -1)
+        assert data['goals'] == goals
+        assert data['grid'].fingerprint() == grid.fingerprint()
+        assert np.array_equal(data['grid'].grid, grid.grid)
+
+
+def test_loaded_map_changes_stay_private(tmp_path):
+    filename = str(tmp_path / 'map.bin')
+    write_binary_map(filename, Grid(4, 4), (0, 0), [(3, 3)])
+    grid = load_binary_map(filename)['grid']
+    grid.create_wall(1, 1, 2, 2)
+    assert not grid.isMovable(1, 1)
+    assert load_binary_map(filename)['grid'].isMovable(1, 1)
+
+
+def test_text_map_converts(tmp_path):
+    text = tmp_path / 'map.txt'
+    text.write_text("[5, 11]\n(0, 1)\n(7, 0) | (10, 3)\n(2,0,2,2)\n(8,0,1,2)\n(10,0,1,1)\n(2,3,1,2)\n")
+    data = load_text_map(str(text))
+    filename = str(tmp_path / 'map.bin')
+    write_binary_map(filename, data['grid'], data['initial_state'], data['goals'], packed=True)
+    loaded = load_binary_map(filename)
+    assert loaded['grid'].fingerprint() == data['grid'].fingerprint()
+    assert (loaded['initial_state'], loaded['goals']) == ((0, 1), [(7, 0), (10, 3)])
+
+
+@pytest.mark.parametrize('packed', [False, True])
+def test_truncated_map(tmp_path, packed):
+    filename = str(tmp_path / 'map.bin')
+    write_binary_map(filename, Grid(20, 20), (0, 0), [(1, 1), (2, 2)], packed)
+    with open(filename, 'rb') as file:
+        data = file.read()
+    for size in (len(data) - 1, _HEADER.size + 4, _HEADER.size):
+        with open(filename, 'wb') as file:
+            file.write(data[:size])
+        with pytest.raises(ValueError, match='truncated'):
+            load_binary_map(filename)
+    for size in (_HEADER.size - 1, 0):
+        with open(filename, 'wb') as file:
+            file.write(data[:size])
+        with pytest.raises(ValueError, match='too short'):
+            load_binary_map(filename)
+
+
+def test_bad_magic(tmp_path):
+    filename = str(tmp_path / 'map.bin')
+    write_binary_map(filename, Grid(4, 4), (0, 0), [(3, 3)])
+    with open(filename, 'r+b') as file:
+        file.write(b'PFM2')
+    assert not is_binary_map(filename)
+    with pytest.raises(ValueError, match='bad magic'):
+        load_binary_map(filename)
+
+
+def test_occupancy_must_be_zero_or_one(tmp_path):
+    filename = str(tmp_path / 'map.bin')
+    write_binary_map(filename, Grid(4, 4), (0, 0), [(3, 3)])
+    size = os.path.getsize(filename)
+    with open(filename, 'r+b') as file:
+        file.seek(size - 16 + 6)
+        file.write(b'\x02')
+    with pytest.raises(ValueError, match='occupancy byte 2 at cell 6'):
+        load_binary_map(filename)
+
+
+# ______________________________________________________________________________
+# Text map wall lines
+
+@pytest.mark.parametrize('block, walls', [
+    (b'1,2,3,4\n', [(1, 2, 3, 4)]),
+    (b'(1, -2, 3, 4)\n[-5,6 , 7,8]\n', [(1, -2, 3, 4), (-5, 6, 7, 8)]),
+    (b'  (1,2,3,4)\t\n\n   \n(5,6,7,8)\n', [(1, 2, 3, 4), (5, 6, 7, 8)]),
+    (b'# walls\n1,2,3,4\n  # (9,9,9,9)\n#\n5,6,7,8\n', [(1, 2, 3, 4), (5, 6, 7, 8)]),
+    (b'1,2,3,4\r\n5,6,7,8\r\n', [(1, 2, 3, 4), (5, 6, 7, 8)]),
+    (b'1,2,3,4\n5,6,7,8', [(1, 2, 3, 4), (5, 6, 7, 8)]),
+    (b'# only a comment\n\n', []),
+])
+def test_parse_walls(block, walls):
+    assert [tuple(wall) for wall in _parse_walls(block, 'map', 1).tolist()] == walls
+
+
+@pytest.mark.parametrize('line', [
+    '1,2,3', '1,2,3,4,5', '1,2\n3,4', '1 - 2,3,4', '1,2-,3,4', '1,2,3,4-', '1,--2,3,4', '-,1,2,3,4',
+    '1,2,3,x', '1,2,3,4 # note', '1.5,2,3,4',
+])
+def test_malformed_wall_line_is_named(line):
+    block = '1,2,3,4\n# comment\n\n{}\n5,6,7,8\n'.format(line).encode()
+    with pytest.raises(ValueError, match=r'^map:13: expected a wall as 4 integers'):
+        _parse_walls(block, 'map', 10)
+
+
+def text_map(tmp_path, wall_lines):
+    filename = tmp_path / 'map.txt'
+    filename.write_bytes(b'# header comment\n[6, 7]\n\n(0, 0)\n(6, 5)\n' + wall_lines)
+    return str(filename)
+
+
+@pytest.mark.parametrize('block_size', [1, 5, 16, 1 << 20])
+def test_line_numbers_across_blocks(tmp_path, block_size):
+    lines = [b'(%d,%d,1,1)' % (i % 7, i % 6) for i in range(30)]
+    lines[3] = b'# comment'
+    lines[12] = b''
+    for bad in (7, 19, 29):
+        broken = list(lines)
+        broken[bad] = b'(1,2,3)'
+        filename = text_map(tmp_path, b'\n'.join(broken) + b'\n')
+        # The header takes lines 1 to 5, walls start on line 6
+        with pytest.raises(ValueError, match=r':{}: expected a wall'.format(bad + 6)):
+            load_text_map(filename, block_size)
+    filename = text_map(tmp_path, b'\r\n'.join(lines))
+    data = load_text_map(filename, block_size)
+    assert data['wall_count'] == 28
+    assert data['grid'].fingerprint() == load_text_map(filename)['grid'].fingerprint()
+
+
+def test_matches_legacy_parser(tmp_path):
+    filename = str(tmp_path / 'walls.txt')
+    for seed in range(3):
+        write_wall_file(filename, 50, 2000, seed)
+        legacy, data = legacy_parse_file(filename), parse_file(filename)
+        for key in ('rows', 'cols', 'initial_state', 'goals', 'walls'):
+            assert data[key] == legacy[key]
+        grid = Grid(legacy['rows'], legacy['cols'])
+        grid.create_walls(legacy['walls'])
+        assert load_text_map(filename, 1 << 10)['grid'].fingerprint() == grid.fingerprint()
+    testcases = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'Testcase')
+    for name in sorted(os.listdir(testcases)):
+        path = os.path.join(testcases, name)
+        legacy, data = legacy_parse_file(path), parse_file(path)
+        assert [data[key] for key in legacy] == list(legacy.values())
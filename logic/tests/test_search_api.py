@@ -0,0 +1,34 @@
+from fastapi.testclient import TestClient
+
+import search
+
+
+def search_body(walls, algorithm='astar'):
+    return {'grid': [[0] * 6 for _ in range(5)], 'walls': walls, 'start': [0, 0], 'goals': [[5, 4]],
+            'algorithm': algorithm}
+
+
+def test_cache_hit_builds_no_grid(monkeypatch):
+    built = []
+    build_grid = search.build_grid
+    monkeypatch.setattr(search, 'build_grid', lambda request: built.append(request) or build_grid(request))
+    search.result_cache.clear()
+    with TestClient(search.app) as client:
+        first = client.post('/search', json=search_body([[1, 0], [1, 1], [1, 2], [1, 3]])).json()
+        second = client.post('/search', json=search_body([[1, 0], [1, 1], [1, 2], [1, 3]])).json()
+        other = client.post('/search', json=search_body([[1, 1]])).json()
+    assert first == second and first['success'] and other['success']
+    assert len(built) == 2
+
+
+def test_batch_and_stream_share_the_cache():
+    search.result_cache.clear()
+    hits = search.result_cache.stats()['hits']
+    body = search_body([[2, 2]], 'bfs')
+    with TestClient(search.app) as client:
+        batch = client.post('/search/batch', json={'grid': body['grid'], 'walls': body['walls'],
+                                                   'queries': [{'start': [0, 0], 'goals': [[5, 4]], 'algorithm': 'bfs'}]}).json()
+        streamed = client.post('/search/stream', json=body).text
+    assert batch['results'][0]['success']
+    assert search.result_cache.stats()['hits'] == hits + 1
+    assert streamed.rstrip().splitlines()[-1].startswith('data: {"path"')
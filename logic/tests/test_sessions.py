@@ -0,0 +1,96 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import search
+from Grid import Grid
+from Sessions import GridSession, SessionStore
+
+
+def test_delta_cell_in_add_and_remove_is_cleared():
+    grid = Grid(4, 5)
+    grid.create_wall_with_positions([(1, 1)])
+    session = GridSession('s', grid)
+    version = grid.version
+    # (1, 1) was a wall and (2, 2) was open: both end up clear; (9, 9) is off the grid
+    changed = session.apply_delta([(1, 1), (2, 2), (0, 3), (9, 9)], [(1, 1), (2, 2)])
+    assert changed == 2
+    assert grid.isMovable(1, 1) and grid.isMovable(2, 2) and not grid.isMovable(3, 0)
+    assert grid.version == version + 1
+    assert session.apply_delta([(0, 3)], []) == 0
+    assert grid.version == version + 1
+
+
+def test_delta_reaches_planners():
+    grid = Grid(3, 3)
+    session = GridSession('s', grid)
+    problem = search.GridRobotProblem((0, 0), [(2, 0)], grid)
+    assert session.plan(problem)[0].path_cost == 2
+    session.apply_delta([(0, 1), (1, 1)], [])
+    assert session.plan(problem)[0].path_cost == 6
+    session.apply_delta([(1, 1)], [(0, 1), (1, 1)])
+    assert session.plan(problem)[0].path_cost == 2
+
+
+def test_store_evicts_least_recently_used_by_count():
+    store = SessionStore(maxsize=2)
+    first, second = store.create(Grid(2, 2)), store.create(Grid(2, 2))
+    assert store.get(first.id) is first  # now second is the least recently used
+    third = store.create(Grid(2, 2))
+    assert store.get(second.id) is None
+    assert store.get(first.id) is first and store.get(third.id) is third
+    assert store.stats()['evictions'] == 1
+
+
+def test_store_evicts_by_bytes():
+    store = SessionStore(maxbytes=250)
+    sessions = [store.create(Grid(10, 10)) for _ in range(3)]
+    assert len(store) == 2 and store.get(sessions[0].id) is None
+    with pytest.raises(ValueError):
+        store.create(Grid(20, 20))
+    # A session's planners count too (about 9 bytes per cell each)
+    store = SessionStore(maxbytes=1050)
+    first, second = store.create(Grid(10, 10)), store.create(Grid(10, 10))
+    second.plan(search.GridRobotProblem((0, 0), [(9, 9)], second.grid))
+    store.evict()
+    assert store.get(first.id) is None and store.get(second.id) is second
+
+
+def test_store_expires_idle_sessions():
+    store = SessionStore(ttl=60)
+    idle, used = store.create(Grid(2, 2)), store.create(Grid(2, 2))
+    idle.last_used -= 61
+    assert store.get(idle.id) is None
+    assert store.get(used.id) is used
+    assert store.stats()['expirations'] == 1
+    used.last_used -= 61
+    store.evict()
+    assert len(store) == 0 and store.stats()['expirations'] == 2
+
+
+def test_session_routes(monkeypatch):
+    monkeypatch.setattr(search, 'sessions', SessionStore(maxbytes=1 << 16))
+    with TestClient(search.app) as client:
+        created = client.post('/sessions', json={'rows': 3, 'cols': 4, 'walls': [[0, 1], [1, 1]]}).json()
+        session_id = created['session_id']
+        assert (created['rows'], created['cols']) == (3, 4)
+        assert client.get('/sessions/' + session_id).json()['version'] == created['version']
+
+        query = {'start': [0, 0], 'goals': [[3, 0]], 'algorithm': 'dstar'}
+        before = client.post('/sessions/{}/search'.format(session_id), json=query).json()
+        assert before['success'] and len(before['path']) == 7
+
+        # (0, 1) cleared, (1, 1) both added and removed: cleared as well
+        delta = client.patch('/sessions/' + session_id, json={'add': [[1, 1]], 'remove': [[0, 1], [1, 1]]}).json()
+        assert delta == {'version': created['version'] + 1, 'changed': 2}
+        for algorithm in ('dstar', 'bfs'):
+            after = client.post('/sessions/{}/search'.format(session_id), json=dict(query, algorithm=algorithm)).json()
+            assert after['success'] and len(after['path']) == 3
+
+        assert client.delete('/sessions/' + session_id).status_code == 204
+        assert client.get('/sessions/' + session_id).status_code == 404
+        assert client.patch('/sessions/' + session_id, json={}).status_code == 404
+        assert client.post('/sessions/{}/search'.format(session_id), json=query).status_code == 404
+        assert client.delete('/sessions/' + session_id).status_code == 404
+
+        assert client.post('/sessions', json={'rows': 0, 'cols': 4}).status_code == 422
+        assert client.post('/sessions', json={'rows': 1000, 'cols': 1000}).status_code == 413
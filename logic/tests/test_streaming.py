@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import pytest
+
+import search
+from Grid import Grid
+from Streaming import SearchCancelled, SearchTimedOut, VisitStream
+
+
+def test_cancel_between_chunks_of_one_flush():
+    chunks = []
+
+    def emit(chunk):
+        chunks.append(chunk)
+        stream.cancelled = True
+
+    stream = VisitStream(10, 2, emit)
+    with pytest.raises(SearchCancelled):
+        stream.extend(range(6))
+    assert chunks == [[[0, 0], [1, 0]]]
+
+
+def test_finish_stops_once_cancelled():
+    chunks = []
+    stream = VisitStream(10, 2, chunks.append)
+    stream.cancelled = True
+    with pytest.raises(SearchCancelled):
+        stream.finish([(0, 0), (1, 0), (2, 0)])
+    assert chunks == []
+
+
+def test_deadline_stops_search():
+    chunks = []
+    stream = VisitStream(10, 4, chunks.append, deadline=time.time() - 1)
+    stream.extend(range(3))
+    with pytest.raises(SearchTimedOut):
+        stream.append(3)
+    assert chunks == []
+
+
+def test_disconnect_stops_search(monkeypatch):
+    finished = []
+    solve_safely = search.solve_safely
+
+    def watched(*args, **kwargs):
+        try:
+            return solve_safely(*args, **kwargs)
+        finally:
+            finished.append(time.time())
+
+    monkeypatch.setattr(search, 'solve_safely', watched)
+
+    async def disconnect():
+        grid = Grid(1000, 1000)
+        events = search.stream_events(search.grid_key(grid), lambda: grid, (0, 0), [(999, 999)], 'bfs', 16)
+        for _ in range(3):
+            await events.__anext__()
+        await events.aclose()
+        for _ in range(100):
+            if finished:
+                return
+            await asyncio.sleep(0.02)
+
+    asyncio.run(disconnect())
+    assert finished
+
+
+def test_stream_times_out(monkeypatch):
+    monkeypatch.setattr(search, 'SEARCH_TIMEOUT', 0.05)
+
+    grid = Grid(1000, 1000)
+
+    async def collect():
+        return [event async for event in search.stream_events(search.grid_key(grid), lambda: grid, (0, 0), [(999, 999)], 'bfs', 64)]
+
+    events = asyncio.run(collect())
+    assert events[-1].startswith('event: result') and 'search timed out' in events[-1]
@@ -777,6 +777,184 @@ class PriorityQueue:
         heapq.heapify(self.heap)
 
 
+class IndexedPriorityQueue:
+    """A PriorityQueue that keeps a position map from each item to its slot
+    in the heap, so membership and priority lookup are O(1) and removal or
+    re-prioritisation of an item is O(log n). Items are unique: appending an
+    item that is already queued replaces its priority (decrease-key).
+    Items must be hashable; equal items (e.g. Nodes with the same state)
+    share one slot."""
+
+    def __init__(self, order='min', f=lambda x: x):
+        self.heap = []
+        self.index = {}
+        if order == 'min':
+            self.f = f
+        elif order == 'max':  # now item with max f(x)
+            self.f = lambda x: -f(x)  # will be popped first
+        else:
+            raise ValueError("Order must be either 'min' or 'max'.")
+
+    def append(self, item):
+        """Insert item at its correct position, replacing any equal item."""
+        if item in self.index:
+            del self[item]
+        self.heap.append((self.f(item), item))
+        self._sift_up(len(self.heap) - 1)
+
+    def extend(self, items):
+        """Insert each item in items at its correct position."""
+        for item in items:
+            self.append(item)
+
+    def pop(self):
+        """Pop and return the item (with min or max f(x) value)
+        depending on the order."""
+        if not self.heap:
+            raise Exception('Trying to pop from empty PriorityQueue.')
+        return self._remove_at(0)[1]
+
+    def peek(self):
+        """Return (priority, item) of the entry pop() would return next,
+        without removing it (the priority is negated for order='max')."""
+        if not self.heap:
+            raise Exception('Trying to peek into empty PriorityQueue.')
+        return self.heap[0]
+
+    def __len__(self):
+        """Return current capacity of PriorityQueue."""
+        return len(self.heap)
+
+    def __contains__(self, key):
+        """Return True if the key is in PriorityQueue."""
+        return key in self.index
+
+    def __getitem__(self, key):
+        """Returns the value associated with key in PriorityQueue.
+        Raises KeyError if key is not present."""
+        try:
+            return self.heap[self.index[key]][0]
+        except KeyError:
+            raise KeyError(str(key) + " is not in the priority queue")
+
+    def __delitem__(self, key):
+        """Delete key from the queue."""
+        try:
+            pos = self.index[key]
+        except KeyError:
+            raise KeyError(str(key) + " is not in the priority queue")
+        self._remove_at(pos)
+
+    def _remove_at(self, pos):
+        heap = self.heap
+        entry = heap[pos]
+        del self.index[entry[1]]
+        last = heap.pop()
+        if pos < len(heap):
+            heap[pos] = last
+            self.index[last[1]] = pos
+            if pos > 0 and last < heap[(pos - 1) >> 1]:
+                self._sift_up(pos)
+            else:
+                self._sift_down(pos)
+        return entry
+
+    def _sift_up(self, pos):
+        heap, index = self.heap, self.index
+        entry = heap[pos]
+        while pos > 0:
+            parent_pos = (pos - 1) >> 1
+            parent = heap[parent_pos]
+            if not entry < parent:
+                break
+            heap[pos] = parent
+            index[parent[1]] = pos
+            pos = parent_pos
+        heap[pos] = entry
+        index[entry[1]] = pos
+
+    def _sift_down(self, pos):
+        heap, index = self.heap, self.index
+        size = len(heap)
+        entry = heap[pos]
+        child_pos = 2 * pos + 1
+        while child_pos < size:
+            right_pos = child_pos + 1
+            if right_pos < size and heap[right_pos] < heap[child_pos]:
+                child_pos = right_pos
+            child = heap[child_pos]
+            if not child < entry:
+                break
+            heap[pos] = child
+            index[child[1]] = pos
+            pos = child_pos
+            child_pos = 2 * pos + 1
+        heap[pos] = entry
+        index[entry[1]] = pos
+
+
+class LazyPriorityQueue:
+    """A PriorityQueue with lazy deletion: removing or re-prioritising an
+    item only marks its heap entry as dead, and dead entries are skipped
+    when they reach the top. Same interface as IndexedPriorityQueue; kept
+    to compare the two decrease-key strategies."""
+
+    def __init__(self, order='min', f=lambda x: x):
+        self.heap = []
+        self.index = {}
+        if order == 'min':
+            self.f = f
+        elif order == 'max':  # now item with max f(x)
+            self.f = lambda x: -f(x)  # will be popped first
+        else:
+            raise ValueError("Order must be either 'min' or 'max'.")
+
+    def append(self, item):
+        """Insert item, invalidating the entry of any equal item."""
+        if item in self.index:
+            del self[item]
+        entry = [self.f(item), item, True]
+        self.index[item] = entry
+        heapq.heappush(self.heap, entry)
+
+    def extend(self, items):
+        """Insert each item in items at its correct position."""
+        for item in items:
+            self.append(item)
+
+    def pop(self):
+        """Pop and return the live item with min or max f(x) value."""
+        while self.heap:
+            _, item, alive = heapq.heappop(self.heap)
+            if alive:
+                del self.index[item]
+                return item
+        raise Exception('Trying to pop from empty PriorityQueue.')
+
+    def __len__(self):
+        """Return the number of live items."""
+        return len(self.index)
+
+    def __contains__(self, key):
+        """Return True if the key is in PriorityQueue."""
+        return key in self.index
+
+    def __getitem__(self, key):
+        """Returns the value associated with key in PriorityQueue.
+        Raises KeyError if key is not present."""
+        try:
+            return self.index[key][0]
+        except KeyError:
+            raise KeyError(str(key) + " is not in the priority queue")
+
+    def __delitem__(self, key):
+        """Mark the entry of key as dead."""
+        try:
+            self.index.pop(key)[2] = False
+        except KeyError:
+            raise KeyError(str(key) + " is not in the priority queue")
+
+
 # ______________________________________________________________________________
 # Useful Shorthands
 
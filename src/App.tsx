@@ -7,6 +7,7 @@ import { mapPresets } from './mapPresets.ts';
 import { parseMapFile } from './utils/parseMap.ts';
 import { GridState, AlgorithmType, VisualizationState, Cell } from './types/type.ts';
 import { createEmptyGrid, resetGrid } from './utils/gridUtils.ts';
+import { BINARY_MEDIA_TYPE, decodeSearchResponse } from './utils/decodeResponse.ts';
 
 
 function App() {
@@ -216,11 +217,14 @@ function App() {
 
     const response = await fetch("https://path-finding-backend.onrender.com/search", {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: { "Content-Type": "application/json", "Accept": `${BINARY_MEDIA_TYPE}, application/json` },
       body: JSON.stringify(requestbody),
     });
 
-    const data = await response.json();
+    // Servers that support it answer with the compact binary encoding
+    const data = response.headers.get("Content-Type")?.startsWith(BINARY_MEDIA_TYPE)
+      ? decodeSearchResponse(await response.arrayBuffer())
+      : await response.json();
 
     const endTime = performance.now();
 
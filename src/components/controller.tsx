@@ -42,7 +42,7 @@ const Controls: React.FC<ControlsProps> = ({
     { id: 'dfs' as AlgorithmType, name: 'DFS (Depth First Search)', description: 'Explores deep, not optimal' },
     { id: 'gbfs' as AlgorithmType, name: "GBFS (Greedy best first search)", description: 'Heuristic-based optimal' },
     { id: 'astar' as AlgorithmType, name: 'A* Search', description: 'Heuristic-based optimal' },
-    { id: 'cus1' as AlgorithmType, name: 'Iterative deepening search (custom 1)', description: 'Advantage of the completeness of BFS inn less memory' },
+    { id: 'cus1' as AlgorithmType, name: 'Iterative deepening A* (custom 1)', description: 'Optimal like A*, searched depth-first in rising f bounds' },
     { id: 'cus2' as AlgorithmType, name: 'Bidirectional A* search (custom 2)', description: 'Searching both in start and goal nodes' },
   ];
 
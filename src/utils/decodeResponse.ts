@@ -0,0 +1,73 @@
+// Decoder for the binary /search response (see logic/Encoding.py).
+// Layout (little-endian): 28-byte header, visited int32[], path, message.
+
+export const BINARY_MEDIA_TYPE = 'application/octet-stream';
+
+export interface SearchResult {
+  path: number[][];          // [col, row] cells, same order as the JSON response
+  pathActions: string | null; // run-length encoded actions (e.g. "R3D1") when requested
+  total_nodes: number;
+  visited_nodes: number[][]; // [col, row] cells in visit order
+  success: boolean;
+  message: string;
+}
+
+const SUCCESS = 1;
+const PATH_ACTIONS = 2;
+
+export function decodeSearchResponse(buffer: ArrayBuffer): SearchResult {
+  const view = new DataView(buffer);
+  const flags = view.getUint32(4, true);
+  const totalNodes = view.getInt32(8, true);
+  const cols = view.getUint32(12, true);
+  const pathLength = view.getUint32(16, true);
+  const visitedLength = view.getUint32(20, true);
+  const messageLength = view.getUint32(24, true);
+
+  let offset = 28;
+  const visited = toCells(new Int32Array(buffer, offset, visitedLength), cols);
+  offset += visitedLength * 4;
+
+  let path: number[][] = [];
+  let pathActions: string | null = null;
+  if (flags & PATH_ACTIONS) {
+    pathActions = new TextDecoder().decode(new Uint8Array(buffer, offset, pathLength));
+    offset += pathLength;
+  } else {
+    path = toCells(new Int32Array(buffer, offset, pathLength), cols);
+    offset += pathLength * 4;
+  }
+
+  return {
+    path,
+    pathActions,
+    total_nodes: totalNodes,
+    visited_nodes: visited,
+    success: (flags & SUCCESS) !== 0,
+    message: new TextDecoder().decode(new Uint8Array(buffer, offset, messageLength)),
+  };
+}
+
+// Expand "R3D1" into the cells visited after start, as [col, row]
+export function actionsToCells(start: number[], actions: string): number[][] {
+  const steps: Record<string, number[]> = { U: [0, -1], D: [0, 1], L: [-1, 0], R: [1, 0] };
+  const cells: number[][] = [];
+  let [col, row] = start;
+  for (const [, letter, count] of actions.matchAll(/([UDLR])(\d+)/g)) {
+    const [dx, dy] = steps[letter];
+    for (let i = 0; i < Number(count); i++) {
+      col += dx;
+      row += dy;
+      cells.push([col, row]);
+    }
+  }
+  return cells;
+}
+
+function toCells(indices: Int32Array, cols: number): number[][] {
+  const cells: number[][] = new Array(indices.length);
+  for (let i = 0; i < indices.length; i++) {
+    cells[i] = [indices[i] % cols, Math.floor(indices[i] / cols)];
+  }
+  return cells;
+}